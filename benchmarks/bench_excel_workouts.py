@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark dell'elaborazione del foglio Workouts in excel_to_yaml.
+
+Crea un workbook sintetico (di default 2000 righe) e confronta, sullo stesso
+DataFrame, il vecchio ciclo con DataFrame.iterrows() e la normalizzazione per
+colonna di normalize_workouts_frame() seguita dall'analisi della sola colonna
+Steps, nel processo corrente e con un pool di processi.
+
+Uso:
+    python benchmarks/bench_excel_workouts.py [--rows N] [--rounds N] [--workers N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Assicurati che la directory del progetto sia nel path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import openpyxl
+import pandas as pd
+
+from planner.excel_to_yaml_converter import (ExcelWorkbook, normalize_workouts_frame,
+                                             parse_steps_column, parse_workout_steps)
+
+STEPS = [
+    "warmup: 2km @ Z1\nrepeat 6:\n  interval: 800m @ Z4\n  recovery: 2min @ Z1\ncooldown: 1km @ Z1",
+    "warmup: 15min @ Z1_HR\ninterval: 40min @ Z2\ncooldown: 10min @ Z1_HR",
+    "warmup: 10min @ Z1\nrepeat 3:\n  interval: 10min @pwr Z4\n  recovery: 5min @pwr Z1\ncooldown: 10min @ Z1",
+]
+SPORTS = ["🏃 Running", "🚴 Cycling", "🏊 Swimming"]
+
+
+def build_workbook(path, rows):
+    """Crea un workbook con il foglio Workouts nel formato di yaml_to_excel"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Workouts'
+    ws.append(["Atleta: Benchmark"])
+    ws.append(['Week', 'Date', 'Session', 'Sport', 'Description', 'Steps'])
+    start = datetime(2026, 1, 5)
+    for index in range(rows):
+        ws.append([index // 7 + 1, start + timedelta(days=index), index % 7 + 1,
+                   SPORTS[index % len(SPORTS)], f"Allenamento {index}", STEPS[index % len(STEPS)]])
+    wb.save(path)
+
+
+def iterrows_loop(df):
+    """Elaborazione riga per riga come nella versione precedente di excel_to_yaml"""
+    plan = {}
+    for _, row in df.iterrows():
+        if pd.isna(row['Week']) or pd.isna(row['Session']) or pd.isna(row['Description']) or pd.isna(row['Steps']):
+            continue
+        week = str(int(row['Week'])).zfill(2)
+        session = str(int(row['Session'])).zfill(2)
+        description = str(row['Description']).strip()
+        if "athlete_name" in description.lower():
+            continue
+        full_name = f"W{week}S{session} {description}"
+        steps_str = str(row['Steps']).strip()
+
+        workout_sport = "running"
+        if 'Sport' in df.columns and pd.notna(row['Sport']):
+            sport_value = str(row['Sport']).strip().lower()
+            if "running" in sport_value:
+                workout_sport = "running"
+            elif "cycling" in sport_value:
+                workout_sport = "cycling"
+            elif "swimming" in sport_value:
+                workout_sport = "swimming"
+
+        workout_steps = parse_workout_steps(steps_str, full_name, workout_sport)
+        workout_steps.insert(0, {"sport_type": workout_sport})
+        if 'Date' in df.columns and pd.notna(row['Date']):
+            date_value = row['Date']
+            formatted_date = date_value if isinstance(date_value, str) else date_value.strftime("%Y-%m-%d")
+            workout_steps.insert(1, {"date": formatted_date})
+        plan[full_name] = workout_steps
+    return plan
+
+
+def vectorized(df, workers=None):
+    """Normalizzazione per colonna e analisi della sola colonna Steps"""
+    workouts = normalize_workouts_frame(df)
+    parsed = parse_steps_column(workouts['steps'], workouts['name'], workouts['sport'], workers)
+    plan = {}
+    for name, sport, date, steps in zip(workouts['name'], workouts['sport'], workouts['date'], parsed):
+        steps.insert(0, {"sport_type": sport})
+        if date is not None:
+            steps.insert(1, {"date": date})
+        plan[name] = steps
+    return plan
+
+
+def best_time(func, rounds):
+    """Tempo migliore su più ripetizioni, con l'output del parser soppresso"""
+    best, result = float("inf"), None
+    for _ in range(rounds):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dell'elaborazione del foglio Workouts")
+    parser.add_argument("--rows", type=int, default=2000, help="Righe del foglio Workouts")
+    parser.add_argument("--rounds", type=int, default=3, help="Ripetizioni della misura (si usa la migliore)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processi per il pool")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.xlsx")
+        build_workbook(path, args.rows)
+        df = ExcelWorkbook(path).dataframe('Workouts', header=1)
+
+    legacy_time, legacy = best_time(lambda: iterrows_loop(df), args.rounds)
+    column_time, column = best_time(lambda: vectorized(df), args.rounds)
+    pool_time, pool = best_time(lambda: vectorized(df, args.workers), args.rounds)
+
+    if not (legacy == column == pool):
+        print("ATTENZIONE: i risultati delle diverse versioni non coincidono")
+
+    print(f"Righe: {args.rows}, processi: {args.workers}")
+    print(f"iterrows:             {legacy_time * 1000:8.1f} ms")
+    print(f"per colonna:          {column_time * 1000:8.1f} ms  ({legacy_time / column_time:4.1f}x)")
+    print(f"per colonna + pool:   {pool_time * 1000:8.1f} ms  ({legacy_time / pool_time:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark end-to-end dei piani in training_plans/.
+
+Per ogni piano del repository, e per le sue versioni sintetiche ingrandite
+(di default 10x e 100x, con gli allenamenti duplicati e rinominati), misura
+separatamente le fasi della pipeline:
+
+    yaml_load        planner.plan_io.load_plan
+    from_yaml_steps  Workout.from_yaml_steps per ogni allenamento
+    dist_to_time     Workout.dist_to_time
+    garminconnect    Workout.garminconnect_json
+    yaml_to_excel    esportazione Excel
+    excel_to_yaml    importazione dello stesso file Excel
+    schedule         schedule_workouts_by_week
+    upload           (solo con --upload) GarminClient.add_workouts verso planner.garmin_standin
+
+I risultati sono scritti in JSON; con --compare vengono confrontati con un file
+precedente e lo script termina con codice 1 se una fase è più lenta della soglia.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--scales 1 10 100] [--rounds N] [--output FILE]
+                                        [--compare BASELINE] [--threshold 1.25] [--upload]
+"""
+
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+# Assicurati che la directory del progetto sia nel path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from planner.plan_io import dump_plan, load_plan, normalize_plan, normalize_steps
+from planner.workout import Workout
+from planner.zones import ZoneTable
+
+PLANS_DIR = os.path.join(parent_dir, "training_plans")
+
+# Giorni della settimana usati per la pianificazione (martedì, giovedì, sabato, domenica)
+PREFERRED_DAYS = [1, 3, 5, 6]
+
+WORKOUT_NAME = re.compile(r'W(\d{2})S(\d{2})\s')
+
+
+def plan_workouts(plan):
+    """Allenamenti di un piano come lista di tuple (nome, step)"""
+    return [(name, steps) for name, steps in plan.items()
+            if name != 'config' and isinstance(steps, list)]
+
+
+def scale_plan(plan, factor):
+    """
+    Piano sintetico con ogni allenamento ripetuto factor volte.
+
+    Le copie mantengono il prefisso WxxSyy, così restano pianificabili, e hanno
+    un suffisso che rende il nome univoco.
+    """
+    if factor == 1:
+        return plan
+    scaled = {'config': plan.get('config', {})}
+    for copy in range(factor):
+        for name, steps in plan_workouts(plan):
+            scaled[f"{name} #{copy + 1}"] = steps
+    return scaled
+
+
+def count_steps(steps):
+    """Conta gli step, compresi quelli annidati nelle ripetute"""
+    return sum(1 + count_steps(step.workout_steps) for step in steps)
+
+
+def build_workouts(plan):
+    config = plan.get('config', {}) or {}
+    zones = ZoneTable.from_config(config)
+    return [Workout.from_yaml_steps(name, normalize_steps(steps),
+                                    paces=config.get('paces'),
+                                    heart_rates=config.get('heart_rates'),
+                                    zones=zones)
+            for name, steps in plan_workouts(plan)]
+
+
+def race_date(plan):
+    """Data di gara che lascia spazio a tutte le settimane del piano"""
+    weeks = [int(match.group(1)) for match in (WORKOUT_NAME.match(name) for name, _ in plan_workouts(plan)) if match]
+    return datetime.date.today() + datetime.timedelta(weeks=max(weeks, default=1) + 1)
+
+
+class Timer:
+    """Tempo migliore per fase su più ripetizioni"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.stages[name] = min(self.stages.get(name, float("inf")), elapsed)
+
+
+def run_upload(workouts, latency):
+    """Carica e pianifica gli allenamenti sullo stand-in locale di Garmin Connect"""
+    from planner.garmin_client import GarminClient
+    from planner.garmin_standin import GarminStandIn
+
+    with GarminStandIn(latency=latency, seed=0) as server:
+        client = GarminClient(base_url=server.url, cache=False, rate_limiter=False)
+        dates = [datetime.date.today() + datetime.timedelta(days=index % 365) for index in range(len(workouts))]
+        results = client.add_workouts(workouts, dates=dates)
+    errors = sum(1 for result in results if result['error'] or result['schedule_error'])
+    if errors:
+        logging.warning(f"upload: {errors} errori")
+
+
+def bench_plan(path, label, factor, rounds, tmp, upload=False, latency=0.0):
+    """Misura tutte le fasi per un piano alla scala indicata"""
+    plan = scale_plan(load_plan(path), factor)
+    if factor != 1:
+        path = os.path.join(tmp, f"scaled_{factor}.yaml")
+        dump_plan(plan, path)
+
+    xlsx_path = os.path.join(tmp, "plan.xlsx")
+    roundtrip_path = os.path.join(tmp, "roundtrip.yaml")
+    timer = Timer()
+    sink = io.StringIO()
+
+    from garmin_planner_gui.gui.scheduling import schedule_workouts_by_week
+    from planner.excel_to_yaml_converter import excel_to_yaml, yaml_to_excel
+
+    for _ in range(rounds):
+        with timer.stage("yaml_load"):
+            loaded = load_plan(path)
+
+        with timer.stage("from_yaml_steps"):
+            workouts = build_workouts(loaded)
+
+        with timer.stage("dist_to_time"):
+            for workout in workouts:
+                workout.dist_to_time()
+
+        with timer.stage("garminconnect"):
+            for workout in workouts:
+                workout.garminconnect_json()
+
+        # Il convertitore stampa messaggi di debug: vengono scartati
+        excel_plan = normalize_plan(loaded)
+        with contextlib.redirect_stdout(sink):
+            with timer.stage("yaml_to_excel"):
+                if not yaml_to_excel(excel_plan, xlsx_path, create_new=True):
+                    raise RuntimeError(f"yaml_to_excel non riuscito per {label}")
+            with timer.stage("excel_to_yaml"):
+                excel_to_yaml(xlsx_path, roundtrip_path)
+        sink.seek(0)
+        sink.truncate()
+
+        with timer.stage("schedule"):
+            schedule_workouts_by_week(plan_workouts(loaded), race_date(loaded), PREFERRED_DAYS)
+
+    if upload:
+        with timer.stage("upload"):
+            run_upload(build_workouts(plan), latency)
+
+    return {
+        'plan': label,
+        'scale': factor,
+        'workouts': len(workouts),
+        'steps': sum(count_steps(workout.workout_steps) for workout in workouts),
+        'stages': {name: round(seconds, 6) for name, seconds in timer.stages.items()},
+        'total': round(sum(timer.stages.values()), 6),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Confronta i risultati con un file precedente.
+
+    Returns:
+        list: Regressioni come stringhe descrittive
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(entry['plan'], entry['scale']): entry for entry in baseline.get('results', [])}
+
+    regressions = []
+    for entry in results:
+        before = previous.get((entry['plan'], entry['scale']))
+        if not before:
+            continue
+        for stage, seconds in entry['stages'].items():
+            old = before['stages'].get(stage)
+            # Le fasi sotto il millisecondo sono troppo rumorose per un confronto
+            if old and max(old, seconds) >= 0.001 and seconds > old * threshold:
+                regressions.append(f"{entry['plan']} x{entry['scale']} {stage}: "
+                                   f"{old * 1000:.2f} ms -> {seconds * 1000:.2f} ms ({seconds / old:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end dei piani in training_plans/")
+    parser.add_argument("--plans", nargs="*", help="Piani YAML da usare (default tutti quelli in training_plans/)")
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100], help="Fattori di scala dei piani")
+    parser.add_argument("--rounds", type=int, default=3, help="Ripetizioni della misura (si usa la migliore)")
+    parser.add_argument("--output", default="bench_pipeline.json", help="File JSON dei risultati")
+    parser.add_argument("--compare", help="File JSON di riferimento con cui confrontare i risultati")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Rapporto oltre il quale una fase è considerata una regressione")
+    parser.add_argument("--upload", action="store_true",
+                        help="Misura anche il caricamento sullo stand-in locale di Garmin Connect")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latenza dello stand-in per --upload (secondi)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler(os.devnull)])
+
+    plans = args.plans or sorted(glob.glob(os.path.join(PLANS_DIR, "**", "*.yaml"), recursive=True))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in plans:
+            label = os.path.relpath(path, PLANS_DIR) if path.startswith(PLANS_DIR) else os.path.basename(path)
+            for factor in args.scales:
+                # Un solo giro per le scale più grandi, che richiedono secondi
+                rounds = args.rounds if factor < 100 else 1
+                entry = bench_plan(path, label, factor, rounds, tmp, args.upload, args.latency)
+                results.append(entry)
+                stages = "  ".join(f"{name} {seconds * 1000:8.2f}" for name, seconds in entry['stages'].items())
+                print(f"{label:<45} x{factor:<4} {entry['workouts']:6d} all. {entry['steps']:7d} step  "
+                      f"{stages}  (ms)")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rounds': args.rounds,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Risultati salvati in {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSIONE: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"Nessuna regressione rispetto a {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark della lettura e scrittura YAML dei piani.
+
+Confronta, su un piano del repository (di default 18w_115km.yaml), il percorso
+precedente (yaml.safe_load, SafeDumper in puro Python e seconda passata sul file
+per aggiungere i commenti) con planner.plan_io (CSafeLoader/CSafeDumper e
+commenti scritti durante la serializzazione).
+
+Uso:
+    python benchmarks/bench_plan_io.py [--plan FILE] [--rounds N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+# Assicurati che la directory del progetto sia nel path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import yaml
+
+from planner.plan_io import LIBYAML, dump_plan, load_plan
+
+DEFAULT_PLAN = os.path.join(parent_dir, "training_plans", "marathon", "advanced_marathoning", "18w_115km.yaml")
+
+
+class PythonNoAliasDumper(yaml.SafeDumper):
+    """Dumper in puro Python usato prima di planner.plan_io"""
+    def ignore_aliases(self, data):
+        return True
+
+
+def legacy_save(plan, path, comments):
+    """Serializzazione seguita dalla seconda passata di lettura e riscrittura per i commenti"""
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.dump(plan, f, default_flow_style=False, sort_keys=False, Dumper=PythonNoAliasDumper)
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for name, description in comments.items():
+        content = re.sub(f"^{re.escape(name)}:", f"{name}: # {description}", content, flags=re.MULTILINE)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def legacy_load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def best_time(func, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark della lettura e scrittura YAML dei piani")
+    parser.add_argument("--plan", default=DEFAULT_PLAN, help="Piano YAML da usare")
+    parser.add_argument("--rounds", type=int, default=10, help="Ripetizioni della misura (si usa la migliore)")
+    args = parser.parse_args()
+
+    plan = legacy_load(args.plan)
+    comments = {name: name.split(' ', 1)[-1] for name in plan if isinstance(plan[name], list)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plan.yaml")
+
+        load_before = best_time(lambda: legacy_load(args.plan), args.rounds)
+        load_after = best_time(lambda: load_plan(args.plan), args.rounds)
+        save_before = best_time(lambda: legacy_save(plan, path, comments), args.rounds)
+        save_after = best_time(lambda: dump_plan(plan, path, comments=comments), args.rounds)
+
+        if load_plan(path) != plan:
+            print("ATTENZIONE: il piano salvato non coincide con l'originale")
+
+    with open(args.plan, encoding='utf-8') as f:
+        lines = sum(1 for _ in f)
+    print(f"Piano: {os.path.basename(args.plan)} ({lines} righe), libyaml: {'sì' if LIBYAML else 'no'}")
+    print(f"lettura:   prima {load_before * 1000:7.2f} ms, dopo {load_after * 1000:7.2f} ms "
+          f"({load_before / load_after:4.1f}x)")
+    print(f"scrittura: prima {save_before * 1000:7.2f} ms, dopo {save_after * 1000:7.2f} ms "
+          f"({save_before / save_after:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark della serializzazione JSON degli allenamenti.
+
+Costruisce un piano con molti step (riscaldamento, ripetute, defaticamento) e
+misura il costo per step di Workout.dist_to_time() e della serializzazione per il
+caricamento, con il logging configurato come nella GUI (livello INFO) ma scritto
+su os.devnull.
+
+La serializzazione viene confrontata con il percorso precedente: target risolto
+risalendo lo stack con inspect per trovare lo step che lo contiene, log INFO per
+ogni target e seconda passata sul JSON per forzare il target di riscaldamento e
+defaticamento.
+
+Uso:
+    python benchmarks/bench_serialization.py [--workouts N] [--repeats N] [--rounds N]
+"""
+
+import argparse
+import inspect
+import logging
+import os
+import sys
+import time
+
+# Assicurati che la directory del progetto sia nel path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from planner.garmin_client import WARMUP_HR_RANGE
+from planner.workout import END_CONDITIONS, SPORT_TYPES, STEP_TYPES, TARGET_TYPES, Workout, WorkoutStep, Target
+
+
+def build_workout(index, repeats):
+    """Crea un allenamento di corsa con riscaldamento, ripetute e defaticamento"""
+    workout = Workout("running", f"W{index:02d}S01 Bench")
+    workout.add_step(WorkoutStep(0, "warmup", end_condition="time", end_condition_value="15:00",
+                                 target=Target("heart.rate.zone", 120, 140)))
+    repeat = WorkoutStep(0, "repeat", end_condition="iterations", end_condition_value=repeats)
+    repeat.add_step(WorkoutStep(0, "interval", end_condition="distance", end_condition_value="1km",
+                                target=Target("pace.zone", 4.2, 4.4)))
+    repeat.add_step(WorkoutStep(0, "recovery", end_condition="time", end_condition_value="2:00"))
+    workout.add_step(repeat)
+    for _ in range(repeats):
+        workout.add_step(WorkoutStep(0, "interval", end_condition="distance", end_condition_value="400m",
+                                     target=Target("pace.zone", 4.8, 5.0)))
+        workout.add_step(WorkoutStep(0, "recovery", end_condition="time", end_condition_value="1:30",
+                                     target=Target("heart.rate.zone", 110, 130)))
+    workout.add_step(WorkoutStep(0, "cooldown", end_condition="time", end_condition_value="10:00"))
+    return workout
+
+
+def legacy_target_json(target):
+    """Target risolto risalendo lo stack fino allo step che lo contiene"""
+    parent_step = None
+    frame = inspect.currentframe()
+    try:
+        while frame:
+            candidate = frame.f_locals.get('step')
+            if candidate is not None and hasattr(candidate, 'step_type'):
+                parent_step = candidate
+                break
+            frame = frame.f_back
+    finally:
+        del frame
+
+    logging.info(f"Target iniziale: {target.target}, from={target.from_value}, to={target.to_value}, "
+                 f"zone={target.zone}, is_heart_rate={target.is_heart_rate}")
+    target_type = "heart.rate.zone" if target.is_heart_rate else target.target
+    if parent_step is not None:
+        logging.info(f"Esaminando target per step tipo={parent_step.step_type}, ordine={parent_step.order}")
+        if parent_step.step_type in ('warmup', 'cooldown'):
+            target_type = "heart.rate.zone"
+
+    result = {
+        "targetType": {
+            "workoutTargetTypeId": TARGET_TYPES.get(target_type, TARGET_TYPES["no.target"]),
+            "workoutTargetTypeKey": target_type,
+        },
+        "targetValueOne": target.from_value,
+        "targetValueTwo": target.to_value,
+        "zoneNumber": target.zone,
+    }
+    logging.info(f"Target finale JSON: {result}")
+    return result
+
+
+def legacy_step_json(step):
+    base_json = {
+        "type": 'RepeatGroupDTO' if step.step_type == 'repeat' else 'ExecutableStepDTO',
+        "stepId": None,
+        "stepOrder": step.order,
+        "childStepId": step.child_step_id,
+        "stepType": {
+            "stepTypeId": STEP_TYPES[step.step_type],
+            "stepTypeKey": step.step_type,
+        },
+        "endCondition": {
+            "conditionTypeKey": step.end_condition,
+            "conditionTypeId": END_CONDITIONS[step.end_condition],
+        },
+        "endConditionValue": step.parsed_end_condition_value(),
+    }
+    if step.workout_steps:
+        base_json["workoutSteps"] = [legacy_step_json(child) for child in step.workout_steps]
+    if step.step_type == 'repeat':
+        base_json['smartRepeat'] = True
+        base_json['numberOfIterations'] = step.end_condition_value
+    else:
+        base_json.update({
+            "description": step.description,
+            "preferredEndConditionUnit": step.end_condition_unit(),
+            "endConditionCompare": None,
+            "endConditionZone": None,
+            **legacy_target_json(step.target),
+        })
+    return base_json
+
+
+def legacy_upload_json(workout):
+    """JSON di caricamento come prima: serializzazione e poi correzione di riscaldamento e defaticamento"""
+    sport_type = {"sportTypeId": SPORT_TYPES[workout.sport_type], "sportTypeKey": workout.sport_type}
+    workout_json = {
+        "sportType": sport_type,
+        "workoutName": workout.workout_name,
+        "description": workout.description,
+        "workoutSegments": [{
+            "segmentOrder": 1,
+            "sportType": dict(sport_type),
+            "workoutSteps": [legacy_step_json(step) for step in workout.workout_steps],
+        }],
+    }
+    for segment in workout_json["workoutSegments"]:
+        for step in segment["workoutSteps"]:
+            step_type = step.get("stepType", {}).get("stepTypeKey", "")
+            if step_type in ("warmup", "cooldown"):
+                step["targetType"]["workoutTargetTypeKey"] = "heart.rate.zone"
+                step["targetType"]["workoutTargetTypeId"] = 4
+                step["targetValueOne"], step["targetValueTwo"] = WARMUP_HR_RANGE
+                logging.info(f"Forzato target a heart.rate.zone per step {step_type} con valori "
+                             f"{WARMUP_HR_RANGE[0]}-{WARMUP_HR_RANGE[1]} bpm")
+    return workout_json
+
+
+def count_steps(steps):
+    """Conta gli step, compresi quelli annidati nelle ripetute"""
+    return sum(1 + count_steps(step.workout_steps) for step in steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark della serializzazione degli allenamenti")
+    parser.add_argument("--workouts", type=int, default=50, help="Numero di allenamenti nel piano")
+    parser.add_argument("--repeats", type=int, default=10, help="Coppie di step ripetute per allenamento")
+    parser.add_argument("--rounds", type=int, default=5, help="Ripetizioni della misura (si usa la migliore)")
+    parser.add_argument("--log-level", default="INFO", help="Livello di logging (default INFO, come la GUI)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()),
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler(os.devnull)])
+
+    best_convert = best_serialize = best_legacy = float("inf")
+    for _ in range(args.rounds):
+        # Allenamenti nuovi a ogni giro, perché dist_to_time modifica gli step
+        workouts = [build_workout(i, args.repeats) for i in range(args.workouts)]
+        steps = sum(count_steps(workout.workout_steps) for workout in workouts)
+
+        start = time.perf_counter()
+        for workout in workouts:
+            workout.dist_to_time()
+        best_convert = min(best_convert, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for workout in workouts:
+            legacy_upload_json(workout)
+        best_legacy = min(best_legacy, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for workout in workouts:
+            workout.garminconnect_json(warmup_hr_range=WARMUP_HR_RANGE)
+        best_serialize = min(best_serialize, time.perf_counter() - start)
+
+    # I due percorsi devono produrre lo stesso JSON
+    for workout in workouts:
+        if legacy_upload_json(workout) != workout.garminconnect_json(warmup_hr_range=WARMUP_HR_RANGE):
+            raise RuntimeError(f"JSON diverso dal percorso precedente per {workout.workout_name}")
+
+    print(f"Allenamenti: {len(workouts)}, step totali: {steps}, log: {args.log_level.upper()}")
+    print(f"dist_to_time:       {best_convert * 1000:8.2f} ms  ({best_convert / steps * 1e6:6.2f} us/step)")
+    print(f"serializzazione prima (inspect): {best_legacy * 1000:8.2f} ms  ({best_legacy / steps * 1e6:6.2f} us/step)")
+    print(f"serializzazione dopo:            {best_serialize * 1000:8.2f} ms  ({best_serialize / steps * 1e6:6.2f} us/step)")
+    print(f"Riduzione: {best_legacy / best_serialize:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
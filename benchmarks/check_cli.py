@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Verifica del riepilogo JSON di garmin-planner contro lo stand-in di Garmin Connect.
+
+Avvia planner.garmin_standin, carica un piano di prova con `garmin-planner upload`,
+modifica un allenamento e lo sincronizza con `garmin-planner sync`. Per ogni
+comando lo stdout deve essere esattamente il riepilogo JSON (i log vanno su
+stderr): qualsiasi altra riga, ad esempio una print rimasta nel percorso delle
+PUT, rende il riepilogo illeggibile per gli strumenti che lo usano.
+
+Al termine la cache locale non deve contenere dati dell'account reale: quelli
+ottenuti dallo stand-in vanno tenuti separati, altrimenti un'esecuzione
+successiva su Garmin Connect userebbe liste e hash dello stand-in.
+
+Lo script termina con codice 1 se un controllo non riesce.
+
+Uso:
+    python benchmarks/check_cli.py
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+# Assicurati che la directory del progetto sia nel path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from planner.garmin_standin import GarminStandIn
+
+PLAN = """config:
+  name_prefix: 'CHECK '
+W01S01 Easy:
+- warmup: 10min
+- interval: {minutes}min
+- cooldown: 5min
+W01S02 Intervals:
+- warmup: 10min
+- repeat 4:
+  - interval: 1000m
+  - recovery: 2min
+- cooldown: 10min
+"""
+
+
+def run_cli(args, home):
+    """Esegue garmin-planner e restituisce il riepilogo letto dallo stdout"""
+    env = dict(os.environ, HOME=home, PYTHONPATH=parent_dir)
+    process = subprocess.run([sys.executable, "-m", "planner.cli"] + args, cwd=parent_dir, env=env,
+                             capture_output=True, text=True)
+    try:
+        summary = json.loads(process.stdout)
+    except ValueError as e:
+        raise AssertionError(f"stdout di '{' '.join(args[:1])}' non è JSON ({e}):\n{process.stdout[:500]}")
+    if process.returncode != 0:
+        raise AssertionError(f"'{' '.join(args[:1])}' terminato con codice {process.returncode}:\n{process.stderr[-2000:]}")
+    return summary
+
+
+def cached_accounts(home):
+    """Account presenti nella cache locale creata sotto la home indicata"""
+    path = os.path.join(home, ".garmin_planner", "cache.sqlite")
+    if not os.path.exists(path):
+        return set()
+    connection = sqlite3.connect(path)
+    try:
+        return {row[0] for table in ("workouts", "workout_lists", "calendar_months", "uploaded_workouts")
+                for row in connection.execute(f"SELECT DISTINCT account FROM {table}")}
+    finally:
+        connection.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp, GarminStandIn(seed=0) as server:
+        plan_path = os.path.join(tmp, "plan.yaml")
+        oauth_folder = os.path.join(tmp, "oauth")
+        athlete = ["--athlete", plan_path, oauth_folder, "--base-url", server.url]
+
+        with open(plan_path, 'w', encoding='utf-8') as f:
+            f.write(PLAN.format(minutes=30))
+        summary = run_cli(["upload"] + athlete, tmp)
+        uploaded = summary['results'][0]['uploaded']
+        if uploaded != 2:
+            raise AssertionError(f"upload: attesi 2 allenamenti caricati, trovati {uploaded}")
+
+        with open(plan_path, 'w', encoding='utf-8') as f:
+            f.write(PLAN.format(minutes=35))
+        summary = run_cli(["sync"] + athlete, tmp)
+        modified = summary['results'][0]['modified']
+        if modified != 1:
+            raise AssertionError(f"sync: atteso 1 allenamento modificato, trovati {modified}")
+
+        summary = run_cli(["sync"] + athlete, tmp)
+        if summary['results'][0]['requests'] != 0:
+            raise AssertionError(f"sync: il piano non è allineato dopo la sincronizzazione: {summary}")
+
+        accounts = cached_accounts(tmp)
+        if os.path.abspath(oauth_folder) in accounts:
+            raise AssertionError(f"la cache dell'account reale contiene dati dello stand-in: {sorted(accounts)}")
+
+    print("Riepiloghi JSON di upload e sync validi, cache dell'account reale intatta")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as e:
+        print(f"ERRORE: {e}")
+        sys.exit(1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Verifiche di compatibilità con il comportamento precedente alle ottimizzazioni.
+
+Ogni controllo confronta il risultato del codice attuale con quello atteso dal
+formato già in uso (file Excel, JSON inviato a Garmin Connect) e lo script
+termina con codice 1 se almeno un controllo non riesce.
+
+Uso:
+    python benchmarks/check_compat.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+# Assicurati che la directory del progetto sia nel path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from planner.plan_io import load_plan, normalize_plan
+
+PLAN_18W = os.path.join(parent_dir, "training_plans", "marathon", "advanced_marathoning", "18w_115km.yaml")
+
+
+def check_repeat_excel_rows():
+    """
+    Le righe 'repeat N: [...]' che yaml_to_excel scrive per un piano non normalizzato
+    devono tornare ripetizioni con i propri step, come le righe 'repeat N:' seguite
+    dagli step indentati.
+    """
+    from planner.excel_to_yaml_converter import excel_to_yaml, yaml_to_excel
+
+    plan = load_plan(PLAN_18W)
+    expected = normalize_plan(plan)
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx_path = os.path.join(tmp, "plan.xlsx")
+        yaml_path = os.path.join(tmp, "plan.yaml")
+        with contextlib.redirect_stdout(io.StringIO()):
+            yaml_to_excel(plan, xlsx_path, create_new=True)
+            excel_to_yaml(xlsx_path, yaml_path)
+        converted = load_plan(yaml_path)
+
+        import openpyxl
+        rows = [cell for row in openpyxl.load_workbook(xlsx_path)['Workouts'].iter_rows(values_only=True)
+                for cell in row if isinstance(cell, str) and 'repeat 6: [' in cell]
+    if not rows:
+        raise AssertionError("il file Excel non contiene righe 'repeat N: [...]'")
+
+    for name, steps in expected.items():
+        if name == 'config':
+            continue
+        actual = [step for step in converted.get(name, []) if 'sport_type' not in step]
+        if actual != steps:
+            raise AssertionError(f"{name}: step diversi dopo Excel -> YAML\n  attesi:  {steps}\n  trovati: {actual}")
+
+
+def _garmin_steps(steps):
+    """Step semplici di un allenamento esportato da Garmin Connect, ripetizioni comprese"""
+    for step in steps:
+        if step.get('workoutSteps'):
+            yield from _garmin_steps(step['workoutSteps'])
+        else:
+            yield step
+
+
+def check_pace_target_json():
+    """
+    Gli step con un intervallo di ritmo devono produrre gli stessi targetValueOne e
+    targetValueTwo dell'allenamento esportato da Garmin Connect (sample_workout.yaml):
+    prima la velocità del ritmo più veloce, poi quella del ritmo più lento.
+    """
+    import yaml
+    from planner.workout import create_workout_step_from_text
+
+    with open(os.path.join(parent_dir, "sample_workout.yaml"), 'r', encoding='utf-8') as f:
+        sample = yaml.safe_load(f)
+
+    checked = 0
+    for segment in sample['workoutSegments']:
+        for step in _garmin_steps(segment['workoutSteps']):
+            if step.get('targetType', {}).get('workoutTargetTypeKey') != 'pace.zone':
+                continue
+            fast, slow = (round(1000 / step[key]) for key in ('targetValueOne', 'targetValueTwo'))
+            detail = f"1km @ {slow // 60}:{slow % 60:02d}-{fast // 60}:{fast % 60:02d}"
+            actual = create_workout_step_from_text('interval', detail).garminconnect_json()
+            for key in ('targetValueOne', 'targetValueTwo'):
+                if abs(actual[key] - step[key]) > 1e-6:
+                    raise AssertionError(f"'{detail}': {key} = {actual[key]}, atteso {step[key]} come in Garmin Connect")
+            checked += 1
+    if not checked:
+        raise AssertionError("sample_workout.yaml non contiene step con target di ritmo")
+
+    # La frequenza cardiaca segue lo stesso ordine: prima il limite alto
+    actual = create_workout_step_from_text('interval', "10min @hr 140-150").garminconnect_json()
+    if (actual['targetValueOne'], actual['targetValueTwo']) != (150, 140):
+        raise AssertionError(f"'@hr 140-150': targetValueOne/Two = {actual['targetValueOne']}/{actual['targetValueTwo']}, attesi 150/140")
+
+
+CHECKS = [
+    check_repeat_excel_rows,
+    check_pace_target_json,
+]
+
+
+def main():
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"OK      {check.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"ERRORE  {check.__name__}: {e}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,100 @@ import calendar
 import re
 import logging
 from .styles import COLORS, SPORT_ICONS
+from .calendar_model import CalendarModel, ActivityStore, adjacent_months
+from .jobs import JobQueue, JobProgressWindow
+from planner import metrics
 import json
 import webbrowser
 
+# Elementi mostrati al massimo in una cella del calendario
+MAX_DAY_ITEMS = 3
+
+
+class DayCell:
+    """
+    Cella persistente della griglia 6x7 del calendario.
+    
+    I widget vengono creati una sola volta; al cambio di mese la cella viene
+    aggiornata sul posto e solo se il suo contenuto è cambiato.
+    """
+    
+    def __init__(self, parent, row, column, on_day_click, on_item_click):
+        self.date = None
+        self.items = []
+        self._signature = None
+        self._visible = False
+        self._row = row
+        self._column = column
+        
+        self.frame = ttk.Frame(parent, borderwidth=1, relief="solid")
+        self.day_label = ttk.Label(self.frame, anchor=tk.NW, padding=(5, 5, 0, 0))
+        self.day_label.pack(fill=tk.X)
+        
+        # Frame per gli allenamenti e le attività
+        self.container = ttk.Frame(self.frame)
+        self.container.pack(fill=tk.BOTH, expand=True, padx=5, pady=2)
+        
+        self.item_labels = []
+        for index in range(MAX_DAY_ITEMS):
+            label = ttk.Label(self.container, anchor=tk.W)
+            label.bind("<Button-1>", lambda e, i=index: on_item_click(self.items[i]) if i < len(self.items) else None)
+            self.item_labels.append(label)
+        self.more_label = ttk.Label(self.container, anchor=tk.W)
+        
+        # Associa un evento di click al giorno
+        for widget in (self.frame, self.day_label, self.container):
+            widget.bind("<Button-1>", lambda e: on_day_click(self.date) if self.date else None)
+    
+    def hide(self):
+        """Nasconde la cella (giorno fuori dal mese visualizzato)"""
+        self.date = None
+        self.items = []
+        if self._visible:
+            self.frame.grid_remove()
+            self._visible = False
+    
+    def show(self, date, day, is_today, items):
+        """
+        Mostra un giorno nella cella.
+        
+        Args:
+            date: Data completa (YYYY-MM-DD)
+            day: Numero del giorno
+            is_today: True se è la data odierna
+            items: Lista di tuple (is_activity, elemento, testo)
+        """
+        self.date = date
+        self.items = [(is_activity, item) for is_activity, item, _ in items[:MAX_DAY_ITEMS]]
+        
+        if not self._visible:
+            self.frame.grid(row=self._row, column=self._column, sticky="nsew", padx=1, pady=1)
+            self._visible = True
+        
+        # Aggiorna i widget solo se il contenuto visualizzato è cambiato
+        signature = (day, is_today, tuple((is_activity, text) for is_activity, _, text in items[:MAX_DAY_ITEMS]),
+                     len(items))
+        if signature == self._signature:
+            return
+        self._signature = signature
+        
+        self.day_label.configure(text=str(day), style="Today.TLabel" if is_today else "TLabel")
+        self.frame.configure(style="Today.TFrame" if is_today else "TFrame")
+        
+        for label in self.item_labels:
+            label.pack_forget()
+        self.more_label.pack_forget()
+        
+        for label, (is_activity, _, text) in zip(self.item_labels, items):
+            label.configure(text=text, foreground=COLORS["success"] if is_activity else "")
+            label.pack(fill=tk.X, pady=1)
+        
+        # Se ci sono più elementi di quelli visualizzabili, mostra quanti ne mancano
+        if len(items) > MAX_DAY_ITEMS:
+            self.more_label.configure(text=f"+ altri {len(items) - MAX_DAY_ITEMS}...")
+            self.more_label.pack(fill=tk.X)
+
+
 class CalendarFrame(ttk.Frame):
     """Frame per la gestione del calendario di allenamenti"""
     
@@ -22,8 +113,16 @@ class CalendarFrame(ttk.Frame):
         super().__init__(parent)
         self.controller = controller
         self.garmin_client = None
-        self.scheduled_workouts = []
-        self.activities = []  # Nuova lista per memorizzare le attività
+        
+        # Allenamenti programmati e attività indicizzati per data
+        self.calendar_model = CalendarModel()
+        
+        # Coda delle operazioni di rete eseguite in background
+        self.jobs = JobQueue(self)
+        
+        # Attività scaricate per mese, con una coda separata per non attendere la sincronizzazione
+        self.activity_store = ActivityStore()
+        self.activity_jobs = JobQueue(self)
         
         # Mese e anno correnti per la visualizzazione
         self.current_month = datetime.datetime.now().month
@@ -35,6 +134,24 @@ class CalendarFrame(ttk.Frame):
         # Inizializza l'interfaccia
         self.init_ui()
     
+    @property
+    def scheduled_workouts(self):
+        """Allenamenti programmati, ordinati per data"""
+        return self.calendar_model.workouts
+    
+    @scheduled_workouts.setter
+    def scheduled_workouts(self, workouts):
+        self.calendar_model.set_workouts(workouts)
+    
+    @property
+    def activities(self):
+        """Attività svolte nel mese visualizzato"""
+        return self.calendar_model.activities
+    
+    @activities.setter
+    def activities(self, activities):
+        self.calendar_model.set_activities(activities)
+    
     def init_ui(self):
         """Inizializza l'interfaccia utente"""
         # Frame principale con padding
@@ -68,7 +185,7 @@ class CalendarFrame(ttk.Frame):
         
         # Pulsante per sincronizzare con Garmin Connect
         self.sync_button = ttk.Button(nav_frame, text="Sincronizza calendario", 
-                                     command=self.sync_calendar)
+                                     command=lambda: self.sync_calendar(refresh=True))
         self.sync_button.pack(side=tk.RIGHT, padx=5)
         
         # Disabilitato fino al login
@@ -99,6 +216,13 @@ class CalendarFrame(ttk.Frame):
         for i in range(7):
             self.month_frame.columnconfigure(i, weight=1)
         
+        # Griglia persistente di 6 settimane x 7 giorni, aggiornata sul posto a ogni cambio di mese
+        self.day_cells = [
+            DayCell(self.month_frame, index // 7, index % 7, self.on_day_click, self.on_day_item_click)
+            for index in range(42)
+        ]
+        self.visible_weeks = None
+        
         # Frame per i dettagli dell'allenamento selezionato
         details_frame = ttk.LabelFrame(main_frame, text="Dettagli allenamento")
         details_frame.pack(fill=tk.X, pady=(0, 10))
@@ -294,58 +418,102 @@ class CalendarFrame(ttk.Frame):
         show = self.show_activities.get()
         logging.info(f"Toggle attività: {show}")
         
-        # Se abbiamo attivato le attività e siamo loggati, sincronizza il calendario
-        if show and self.garmin_client:
-            self.sync_calendar(show_messages=False)
-        else:
-            # Altrimenti ridisegna semplicemente il calendario
-            self.draw_calendar()
+        # Mostra le attività già scaricate e richiedi quelle mancanti
+        self.show_month_activities()
+        self.draw_calendar()
+        if show:
+            self.load_month_activities()
 
-    def fetch_activities(self):
-        """Recupera le attività da Garmin Connect"""
-        if not self.garmin_client:
-            logging.error("Nessun client Garmin disponibile")
+    def fetch_activities(self, client, year, month, job=None):
+        """
+        Recupera tutte le attività di un mese da Garmin Connect, pagina per pagina.
+        
+        Non tocca l'interfaccia: può essere chiamata dal thread di un lavoro in background.
+        
+        Args:
+            client: GarminClient da usare
+            year: Anno
+            month: Mese (1-12)
+            job: Lavoro in background (opzionale), interrotto tra una pagina e l'altra se annullato
+        
+        Returns:
+            list: Attività del mese
+        """
+        # Calcola le date di inizio e fine del mese
+        _, last_day = calendar.monthrange(year, month)
+        start_str = datetime.date(year, month, 1).strftime('%Y-%m-%d')
+        end_str = datetime.date(year, month, last_day).strftime('%Y-%m-%d')
+        
+        logging.info(f"Ricerca attività dal {start_str} al {end_str}")
+        
+        activities = client.get_activities_range(
+            start_str, end_str,
+            page_callback=(lambda count: job.check()) if job else None
+        )
+        
+        # Log dettagli delle attività
+        for activity in activities[:5]:  # Log solo prime 5 per brevità
+            activity_date = activity.get('startTimeLocal', '').split('T')[0] if 'startTimeLocal' in activity else 'Sconosciuta'
+            activity_name = activity.get('activityName', 'Sconosciuta')
+            activity_type = activity.get('activityType', {}).get('typeKey', 'Sconosciuto')
+            logging.debug(f"Attività: {activity_name} ({activity_type}) il {activity_date}")
+        
+        return activities
+
+    def show_month_activities(self):
+        """Mostra le attività già scaricate per il mese visualizzato (nessuna se mancano)"""
+        activities = self.activity_store.get(self.current_year, self.current_month)
+        self.activities = activities or []
+
+    def load_month_activities(self):
+        """
+        Scarica in background le attività del mese visualizzato, se mancano,
+        e in anticipo quelle del mese precedente e successivo.
+        """
+        if not self.garmin_client or not self.show_activities.get():
             return
         
-        logging.info("Recupero attività...")
+        # I mesi ancora in coda per una visualizzazione precedente non servono più
+        self.activity_jobs.cancel_pending()
         
-        try:
-            # Calcola le date di inizio e fine per il mese corrente
-            start_date = datetime.date(self.current_year, self.current_month, 1)
-            _, last_day = calendar.monthrange(self.current_year, self.current_month)
-            end_date = datetime.date(self.current_year, self.current_month, last_day)
-            
-            # Formatta le date
-            start_str = start_date.strftime('%Y-%m-%d')
-            end_str = end_date.strftime('%Y-%m-%d')
-            
-            logging.info(f"Ricerca attività dal {start_str} al {end_str}")
-            
-            # Recupera le attività
-            activities = self.garmin_client.get_activities(
-                start_date=start_str,
-                end_date=end_str,
-                limit=100  # Limite alto per recuperare più attività possibili
-            )
-            
-            # Imposta le attività recuperate
-            self.activities = activities if activities else []
-            
-            logging.info(f"Recuperate {len(self.activities)} attività")
-            
-            # Log dettagli delle attività
-            for activity in self.activities[:5]:  # Log solo prime 5 per brevità
-                activity_date = activity.get('startTimeLocal', '').split('T')[0] if 'startTimeLocal' in activity else 'Sconosciuta'
-                activity_name = activity.get('activityName', 'Sconosciuta')
-                activity_type = activity.get('activityType', {}).get('typeKey', 'Sconosciuto')
-                logging.info(f"Attività: {activity_name} ({activity_type}) il {activity_date}")
+        self.request_activity_month(self.current_year, self.current_month)
+        for year, month in adjacent_months(self.current_year, self.current_month):
+            self.request_activity_month(year, month)
+
+    def request_activity_month(self, year, month):
+        """Accoda lo scaricamento delle attività di un mese, se non sono già disponibili"""
+        if not self.activity_store.needs_fetch(year, month):
+            return
+        
+        client = self.garmin_client
+        self.activity_store.mark_pending(year, month)
+        
+        def fetch_done(activities):
+            self.activity_store.put(year, month, activities)
+            logging.info(f"Attività {year}-{month:02d}: {len(activities)}")
             
-            if len(self.activities) > 5:
-                logging.info(f"... e altre {len(self.activities) - 5} attività")
-                
-        except Exception as e:
-            logging.error(f"Errore nel recupero delle attività: {str(e)}")
-            self.activities = []
+            # Ridisegna solo se il mese è ancora quello visualizzato
+            if (year, month) == (self.current_year, self.current_month) and self.show_activities.get():
+                self.show_month_activities()
+                self.draw_calendar()
+        
+        def fetch_failed(error):
+            logging.error(f"Errore nel recupero delle attività di {year}-{month:02d}: {str(error)}")
+            self.activity_store.discard_pending(year, month)
+        
+        self.activity_jobs.submit(
+            lambda job: self.fetch_activities(client, year, month, job),
+            name="activities",
+            on_done=fetch_done,
+            on_error=fetch_failed,
+            on_cancel=lambda: self.activity_store.discard_pending(year, month))
+
+    def on_month_changed(self):
+        """Aggiorna etichetta, calendario e attività dopo un cambio di mese o anno"""
+        self.update_date_label()
+        self.show_month_activities()
+        self.draw_calendar()
+        self.load_month_activities()
 
     def update_date_label(self):
         """Aggiorna l'etichetta con mese e anno correnti"""
@@ -359,13 +527,7 @@ class CalendarFrame(ttk.Frame):
             self.current_month = 12
             self.current_year -= 1
         
-        self.update_date_label()
-        
-        # Se è attiva l'opzione "Mostra attività", sincronizza automaticamente il calendario
-        if hasattr(self, 'show_activities') and self.show_activities.get() and self.garmin_client:
-            self.sync_calendar(show_messages=False)
-        else:
-            self.draw_calendar()
+        self.on_month_changed()
     
     def next_month(self):
         """Passa al mese successivo"""
@@ -374,35 +536,17 @@ class CalendarFrame(ttk.Frame):
             self.current_month = 1
             self.current_year += 1
         
-        self.update_date_label()
-        
-        # Se è attiva l'opzione "Mostra attività", sincronizza automaticamente il calendario
-        if hasattr(self, 'show_activities') and self.show_activities.get() and self.garmin_client:
-            self.sync_calendar(show_messages=False)
-        else:
-            self.draw_calendar()
+        self.on_month_changed()
     
     def prev_year(self):
         """Passa all'anno precedente"""
         self.current_year -= 1
-        self.update_date_label()
-        
-        # Se è attiva l'opzione "Mostra attività", sincronizza automaticamente il calendario
-        if hasattr(self, 'show_activities') and self.show_activities.get() and self.garmin_client:
-            self.sync_calendar(show_messages=False)
-        else:
-            self.draw_calendar()
+        self.on_month_changed()
 
     def next_year(self):
         """Passa all'anno successivo"""
         self.current_year += 1
-        self.update_date_label()
-        
-        # Se è attiva l'opzione "Mostra attività", sincronizza automaticamente il calendario
-        if hasattr(self, 'show_activities') and self.show_activities.get() and self.garmin_client:
-            self.sync_calendar(show_messages=False)
-        else:
-            self.draw_calendar()
+        self.on_month_changed()
     
     def goto_today(self):
         """Torna al mese e anno correnti"""
@@ -410,142 +554,67 @@ class CalendarFrame(ttk.Frame):
         self.current_month = today.month
         self.current_year = today.year
         
-        self.update_date_label()
-        
-        # Se è attiva l'opzione "Mostra attività", sincronizza automaticamente il calendario
-        if hasattr(self, 'show_activities') and self.show_activities.get() and self.garmin_client:
-            self.sync_calendar(show_messages=False)
-        else:
-            self.draw_calendar()
+        self.on_month_changed()
     
+    @metrics.timed("gui.calendar.draw")
     def draw_calendar(self):
-        """Disegna il calendario del mese corrente"""
+        """Aggiorna la griglia del calendario con il mese corrente"""
         logging.info(f"Drawing calendar for {self.current_year}-{self.current_month}")
         
-        # Pulisci il frame attuale
-        for widget in self.month_frame.winfo_children():
-            widget.destroy()
-        
-        # Ottieni il primo giorno del mese
-        first_day = datetime.date(self.current_year, self.current_month, 1)
-        
-        # Ottieni il numero di giorni nel mese
-        _, num_days = calendar.monthrange(self.current_year, self.current_month)
-        
-        # Ottieni il giorno della settimana del primo giorno (0 = lunedì in calendar.monthrange)
-        first_weekday = first_day.weekday()
-        
-        # Log workouts that should be in this month for debugging
-        if self.scheduled_workouts:
-            this_month_workouts = []
-            for workout in self.scheduled_workouts:
-                workout_date = workout.get('date', '')
-                if workout_date.startswith(f"{self.current_year}-{self.current_month:02d}-"):
-                    this_month_workouts.append(workout)
-            
-            logging.info(f"Found {len(this_month_workouts)} workouts for {self.current_year}-{self.current_month}")
-            for workout in this_month_workouts:
-                logging.info(f"  Workout in current month: {workout.get('title')} on {workout.get('date')}")
-        else:
-            logging.info("No scheduled workouts found for any month")
-        
-        # Disegna i giorni
-        for day in range(1, num_days + 1):
-            # Calcola riga e colonna
-            row = (first_weekday + day - 1) // 7
-            col = (first_weekday + day - 1) % 7
-            
-            # Crea un frame per il giorno
-            day_frame = ttk.Frame(self.month_frame, borderwidth=1, relief="solid")
-            day_frame.grid(row=row, column=col, sticky="nsew", padx=1, pady=1)
-            
-            # Assicurati che tutti i frame dei giorni abbiano la stessa altezza
-            self.month_frame.rowconfigure(row, weight=1, minsize=80)
-            
-            # Crea l'etichetta con il numero del giorno
-            day_label = ttk.Label(day_frame, text=str(day), anchor=tk.NW, padding=(5, 5, 0, 0))
-            day_label.pack(fill=tk.X)
+        # Ottieni il giorno della settimana del primo giorno (0 = lunedì) e il numero di giorni nel mese
+        first_weekday, num_days = calendar.monthrange(self.current_year, self.current_month)
+        
+        logging.debug(f"Found {self.calendar_model.workout_count(self.current_year, self.current_month)} "
+                      f"workouts for {self.current_year}-{self.current_month}")
+        
+        # Le settimane effettivamente usate dal mese hanno tutte la stessa altezza
+        weeks = (first_weekday + num_days + 6) // 7
+        if weeks != self.visible_weeks:
+            for row in range(6):
+                self.month_frame.rowconfigure(row, weight=1 if row < weeks else 0,
+                                              minsize=80 if row < weeks else 0)
+            self.visible_weeks = weeks
+        
+        today = datetime.date.today()
+        for index, cell in enumerate(self.day_cells):
+            day = index - first_weekday + 1
+            if day < 1 or day > num_days:
+                cell.hide()
+                continue
             
             # Formatta la data completa
             full_date = f"{self.current_year}-{self.current_month:02d}-{day:02d}"
             
             # Verifica se è oggi
-            today = datetime.date.today()
             is_today = (self.current_year == today.year and 
                         self.current_month == today.month and
                         day == today.day)
             
-            if is_today:
-                day_frame.configure(style="Today.TFrame")
-                day_label.configure(style="Today.TLabel")
-            
-            # Crea un frame per gli allenamenti
-            workouts_container = ttk.Frame(day_frame)
-            workouts_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=2)
-            
-            # Aggiungi gli allenamenti programmati per questo giorno
-            self.add_workouts_to_day(workouts_container, full_date)
-            
-            # Associa un evento di click al giorno
-            day_frame.bind("<Button-1>", lambda e, d=full_date: self.on_day_click(d))
+            cell.show(full_date, day, is_today, self.day_items(full_date))
         
         logging.info("Calendar drawing completed")
     
-
-
-    def add_workouts_to_day(self, container, date):
-        """Aggiungi gli allenamenti programmati e le attività a un giorno"""
-        # Filtra gli allenamenti per questa data
-        day_workouts = [w for w in self.scheduled_workouts if w.get('date') == date]
-        
-        # Filtra le attività per questa data (se l'opzione è attiva)
-        day_activities = []
-        if hasattr(self, 'show_activities') and self.show_activities.get() and hasattr(self, 'activities') and self.activities:
-            for activity in self.activities:
-                # Le attività hanno una data in formato "2025-04-29 20:05:43"
-                # Dobbiamo confrontare solo la parte della data (YYYY-MM-DD) con il formato del calendario
-                activity_date = None
-                if 'startTimeLocal' in activity:
-                    # Estrai solo la parte della data (prima dello spazio)
-                    activity_date = activity['startTimeLocal'].split(' ')[0]
-                    
-                # Confronta la data dell'attività con la data del calendario
-                if activity_date == date:
-                    day_activities.append(activity)
-                    logging.debug(f"Aggiunta attività '{activity.get('activityName', 'Sconosciuta')}' per la data {date}")
-        
-        # Debug logging
-        if day_workouts:
-            logging.info(f"Aggiunta di {len(day_workouts)} allenamenti per {date}")
-            for workout in day_workouts:
-                logging.info(f"  Aggiunta allenamento: {workout.get('title')} (ID: {workout.get('workoutId')})")
-            
-        if day_activities:
-            logging.info(f"Aggiunta di {len(day_activities)} attività per {date}")
-            for activity in day_activities:
-                activity_name = activity.get('activityName', 'Sconosciuta')
-                activity_id = activity.get('activityId', 'Sconosciuto')
-                logging.info(f"  Aggiunta attività: {activity_name} (ID: {activity_id})")
-        
-        # Combina gli elementi (allenamenti prima, poi attività)
-        all_items = day_workouts + day_activities
-        
-        # Se non ci sono elementi, esci
-        if not all_items:
-            return
+    def day_items(self, date):
+        """
+        Allenamenti programmati e attività di un giorno, con il testo da visualizzare.
         
-        # Aggiungi al massimo i primi 3 elementi, per non sovraffollare
-        for i, item in enumerate(all_items[:3]):
-            # Crea un frame per l'elemento
-            item_frame = ttk.Frame(container)
-            item_frame.pack(fill=tk.X, pady=1)
-            
-            # Determina se è un allenamento o un'attività
-            is_activity = item in day_activities
-            
-            if is_activity:
-                # È un'attività
-                activity = item
+        Returns:
+            list: Tuple (is_activity, elemento, testo), prima gli allenamenti e poi le attività
+        """
+        items = []
+        
+        # Allenamenti programmati di questa data, dall'indice del modello
+        for workout in self.calendar_model.workouts_on(date):
+            sport_type = workout.get('sportTypeKey', 'running')
+            icon = SPORT_ICONS.get(sport_type, "•")
+            name = workout.get('title', 'Sconosciuto')
+            if len(name) > 25:
+                name = name[:22] + "..."
+            items.append((False, workout, f"{icon} {name}"))
+        
+        # Attività di questa data (se l'opzione è attiva)
+        if self.show_activities.get():
+            for activity in self.calendar_model.activities_on(date):
                 # Determina il tipo di sport
                 sport_type = 'running'  # Default
                 if 'activityType' in activity and 'typeKey' in activity['activityType']:
@@ -556,42 +625,19 @@ class CalendarFrame(ttk.Frame):
                 if len(name) > 25:
                     name = name[:22] + "..."
                 
-                # Stile speciale per le attività (altro colore o icona diversa)
-                icon = SPORT_ICONS.get(sport_type, "•")
-                activity_label = ttk.Label(item_frame, text=f"✓ {icon} {name}", anchor=tk.W, foreground=COLORS["success"])
-                activity_label.pack(fill=tk.X)
-                
-                # Associa evento di click
-                item_frame.bind("<Button-1>", 
-                             lambda e, a=activity: self.show_activity_details(a))
-                activity_label.bind("<Button-1>", 
-                                 lambda e, a=activity: self.show_activity_details(a))
-            else:
-                # È un allenamento programmato (codice esistente)
-                workout = item
-                sport_type = workout.get('sportTypeKey', 'running')
+                # Stile speciale per le attività (altro colore e segno di spunta)
                 icon = SPORT_ICONS.get(sport_type, "•")
-                name = workout.get('title', 'Sconosciuto')
-                
-                if len(name) > 25:
-                    name = name[:22] + "..."
-                
-                workout_label = ttk.Label(item_frame, text=f"{icon} {name}", anchor=tk.W)
-                workout_label.pack(fill=tk.X)
-                
-                # Associa evento di click
-                item_frame.bind("<Button-1>", 
-                             lambda e, w=workout: self.show_workout_details(w))
-                workout_label.bind("<Button-1>", 
-                                 lambda e, w=workout: self.show_workout_details(w))
-        
-        # Se ci sono più di 3 elementi, mostra quanti ne mancano
-        if len(all_items) > 3:
-            more_label = ttk.Label(container, 
-                                  text=f"+ altri {len(all_items) - 3}...", 
-                                  anchor=tk.W)
-            more_label.pack(fill=tk.X)
-
+                items.append((True, activity, f"✓ {icon} {name}"))
+        
+        return items
+    
+    def on_day_item_click(self, entry):
+        """Gestisce il click su un allenamento o un'attività di una cella"""
+        is_activity, item = entry
+        if is_activity:
+            self.show_activity_details(item)
+        else:
+            self.show_workout_details(item)
 
     def show_activity_details(self, activity):
         """Mostra i dettagli di un'attività"""
@@ -711,8 +757,8 @@ class CalendarFrame(ttk.Frame):
     
     def show_day_workouts(self, date):
         """Mostra gli allenamenti per una data specifica"""
-        # Filtra gli allenamenti per questa data
-        day_workouts = [w for w in self.scheduled_workouts if w.get('date') == date]
+        # Allenamenti di questa data
+        day_workouts = self.calendar_model.workouts_on(date)
         
         # Se non ci sono allenamenti, mostra un messaggio
         if not day_workouts:
@@ -826,8 +872,8 @@ class CalendarFrame(ttk.Frame):
             if self.garmin_client:
                 self.garmin_client.unschedule_workout(schedule_id)
                 
-                # Aggiorna la lista
-                self.fetch_scheduled_workouts()
+                # Aggiorna il modello del calendario
+                self.calendar_model.remove_workout(schedule_id)
                 
                 # Ridisegna il calendario
                 self.draw_calendar()
@@ -874,10 +920,14 @@ class CalendarFrame(ttk.Frame):
                 self.garmin_client.unschedule_workout(schedule_id)
                 
                 # Programma di nuovo per la nuova data
-                self.garmin_client.schedule_workout(workout_id, new_date)
+                response = self.garmin_client.schedule_workout(workout_id, new_date)
                 
-                # Aggiorna la lista
-                self.fetch_scheduled_workouts()
+                # Aggiorna il modello del calendario (o riscarica se manca l'ID della nuova programmazione)
+                new_schedule_id = self.schedule_id_from_response(response)
+                if new_schedule_id is not None:
+                    self.calendar_model.move_workout(schedule_id, new_date, new_schedule_id)
+                else:
+                    self.fetch_scheduled_workouts()
                 
                 # Ridisegna il calendario
                 self.draw_calendar()
@@ -924,10 +974,21 @@ class CalendarFrame(ttk.Frame):
         try:
             # Programma l'allenamento
             if self.garmin_client:
-                self.garmin_client.schedule_workout(workout_id, date)
+                response = self.garmin_client.schedule_workout(workout_id, date)
                 
-                # Aggiorna la lista
-                self.fetch_scheduled_workouts()
+                # Aggiorna il modello del calendario (o riscarica se manca l'ID della programmazione)
+                schedule_id = self.schedule_id_from_response(response)
+                if schedule_id is not None:
+                    self.calendar_model.add_workout({
+                        'id': schedule_id,
+                        'itemType': 'workout',
+                        'workoutId': workout_id,
+                        'title': name,
+                        'date': date,
+                        'sportTypeKey': self.available_workout_sport(workout_id),
+                    })
+                else:
+                    self.fetch_scheduled_workouts()
                 
                 # Ridisegna il calendario
                 self.draw_calendar()
@@ -945,6 +1006,19 @@ class CalendarFrame(ttk.Frame):
                                f"Impossibile pianificare l'allenamento: {str(e)}", 
                                parent=self)
     
+    def schedule_id_from_response(self, response):
+        """Estrae l'ID della programmazione dalla risposta di schedule_workout (None se assente)"""
+        if isinstance(response, dict):
+            return response.get('workoutScheduleId')
+        return None
+    
+    def available_workout_sport(self, workout_id):
+        """Tipo di sport di un allenamento disponibile (default running)"""
+        for workout in getattr(self, 'available_workouts', None) or []:
+            if str(workout.get('workoutId')) == str(workout_id):
+                return workout.get('sportType', {}).get('sportTypeKey', 'running')
+        return 'running'
+    
     def ask_for_date(self, title, prompt, initial_date=None):
         """Chiede una data utilizzando un calendario se disponibile, altrimenti un semplice input"""
         # Se non è specificata una data iniziale, usa oggi
@@ -1044,8 +1118,18 @@ class CalendarFrame(ttk.Frame):
             del self.current_workout
 
 
-    def sync_calendar(self, show_messages=True):
-        """Sincronizza il calendario con Garmin Connect"""
+    def sync_calendar(self, show_messages=True, refresh=False):
+        """
+        Sincronizza il calendario con Garmin Connect
+        
+        Le richieste vengono eseguite in background: la finestra resta reattiva e la
+        sincronizzazione può essere annullata. Una nuova sincronizzazione annulla
+        quella ancora in corso. Le attività vengono scaricate a parte, mese per mese.
+        
+        Args:
+            show_messages: Se True mostra la finestra di progresso e i messaggi
+            refresh: Se True ignora la cache locale e riscarica calendario e allenamenti
+        """
         logging.info(f"sync_calendar chiamato: garmin_client è {'presente' if self.garmin_client else 'assente'}")
         if not self.garmin_client:
             if show_messages:
@@ -1054,264 +1138,161 @@ class CalendarFrame(ttk.Frame):
                                    parent=self)
             return
         
-        # Mostra indicatore di progresso
-        try:
-            # Crea una finestra di progresso
-            if show_messages:
-                progress = tk.Toplevel(self)
-                progress.title("Sincronizzazione in corso")
-                progress.geometry("300x100")
-                progress.transient(self)
-                progress.grab_set()
-                
-                # Etichetta
-                ttk.Label(progress, text="Sincronizzazione del calendario in corso...").pack(pady=(20, 10))
-                
-                # Barra di progresso
-                progressbar = ttk.Progressbar(progress, mode='indeterminate')
-                progressbar.pack(fill=tk.X, padx=20)
-                progressbar.start()
-                
-                # Aggiorna la finestra
-                progress.update()
+        self.jobs.cancel_all()
+        
+        client = self.garmin_client
+        year, month = self.current_year, self.current_month
+        
+        # Finestra di progresso con pulsante di annullamento
+        progress = None
+        if show_messages:
+            progress = JobProgressWindow(self, "Sincronizzazione in corso",
+                                         "Sincronizzazione del calendario in corso...")
+        
+        def sync(job):
+            # Eseguita in background: nessun accesso ai widget
+            result = {}
+            
+            job.progress("Recupero degli allenamenti programmati...")
+            result['scheduled'] = self.load_scheduled_workouts(client, refresh)
+            
+            # Aggiorna la lista degli allenamenti disponibili
+            job.progress("Recupero degli allenamenti disponibili...")
+            try:
+                result['available'] = client.list_workouts(refresh=refresh)
+            except Exception as avail_err:
+                logging.error(f"Errore nel recupero degli allenamenti disponibili: {str(avail_err)}")
+                result['available_error'] = avail_err
+            
+            return result
+        
+        def sync_done(result):
+            self.scheduled_workouts = result['scheduled']
+            
+            # Le attività del mese visualizzato (o tutte, se richiesto) vengono riscaricate
+            if refresh:
+                self.activity_store.invalidate()
             else:
-                progress = None
+                self.activity_store.invalidate(year, month)
+            self.show_month_activities()
+            
+            if 'available' in result:
+                self.available_workouts = result['available']
+                self.update_workout_list()
+            elif show_messages:
+                # Continuiamo comunque, perché gli allenamenti programmati sono più importanti
+                messagebox.showerror("Errore", 
+                                  f"Impossibile recuperare gli allenamenti disponibili: {str(result['available_error'])}", 
+                                  parent=self)
             
+            # Ridisegna il calendario
+            logging.info(f"Drawing calendar with {len(result['scheduled'])} scheduled workouts")
             try:
-                # TEST DIRECT CALENDAR ACCESS
-                # Try to get calendar data for the current month
-                current_month = datetime.datetime.now().month
-                current_year = datetime.datetime.now().year
-                
-                logging.info(f"Trying direct calendar access for {current_year}-{current_month}")
-                try:
-                    direct_response = self.garmin_client.get_calendar(current_year, current_month)
-                    logging.info(f"Direct calendar response: {json.dumps(direct_response, indent=2)}")
-                    
-                    # Check if there are any calendar items
-                    calendar_items = direct_response.get('calendarItems', [])
-                    workout_items = [item for item in calendar_items if item.get('itemType') == 'workout']
-                    logging.info(f"Found {len(workout_items)} workout items directly in calendar")
-                    
-                    # Log details of each workout found
-                    for item in workout_items:
-                        workout_id = item.get('workoutId', 'Unknown')
-                        workout_name = item.get('title', 'Untitled')
-                        workout_date = item.get('date', 'No date')
-                        logging.info(f"Found workout: {workout_name} (ID: {workout_id}) on {workout_date}")
-                except Exception as e:
-                    logging.error(f"Error in direct calendar access: {str(e)}")
-                
-                # Now we proceed with the normal scheduled workouts fetch
-                logging.info("Recupero degli allenamenti programmati...")
-                try:
-                    self.fetch_scheduled_workouts()
-                except Exception as sched_err:
-                    logging.error(f"Errore nel recupero degli allenamenti programmati: {str(sched_err)}")
-                    if show_messages:
-                        messagebox.showerror("Errore", 
-                                          f"Impossibile recuperare gli allenamenti programmati: {str(sched_err)}", 
-                                          parent=self)
-                    raise
-                
-                # Recupera anche le attività
-                logging.info("Recupero delle attività...")
-                try:
-                    self.fetch_activities()
-                except Exception as act_err:
-                    logging.error(f"Errore nel recupero delle attività: {str(act_err)}")
-                    if show_messages:
-                        messagebox.showwarning("Avviso", 
-                                            f"Impossibile recuperare le attività: {str(act_err)}", 
-                                            parent=self)
-                    # Continuiamo comunque, perché gli allenamenti programmati sono più importanti
-                
-                # Aggiorna la lista degli allenamenti disponibili
-                logging.info("Recupero degli allenamenti disponibili...")
-                try:
-                    self.fetch_available_workouts()
-                except Exception as avail_err:
-                    logging.error(f"Errore nel recupero degli allenamenti disponibili: {str(avail_err)}")
-                    if show_messages:
-                        messagebox.showerror("Errore", 
-                                          f"Impossibile recuperare gli allenamenti disponibili: {str(avail_err)}", 
-                                          parent=self)
-                    # Continuiamo comunque, perché gli allenamenti programmati sono più importanti
-                
-                # Ridisegna il calendario
-                logging.info("Aggiornamento grafico del calendario...")
-                try:
-                    # Log how many workouts we're going to display
-                    logging.info(f"Drawing calendar with {len(self.scheduled_workouts)} scheduled workouts and {len(self.activities)} activities")
-                    self.draw_calendar()
-                except Exception as draw_err:
-                    logging.error(f"Errore nel ridisegno del calendario: {str(draw_err)}")
-                    # Non blocchiamo l'operazione per un errore di disegno
-                
-                # Mostra messaggio di conferma solo se richiesto
-                if show_messages:
-                    messagebox.showinfo("Sincronizzazione completata", 
-                                      "Calendario sincronizzato con Garmin Connect", 
-                                      parent=self)
-                
-                logging.info("Sincronizzazione del calendario completata con successo")
-                
-            except Exception as e:
-                logging.error(f"Errore durante la sincronizzazione del calendario: {str(e)}")
-                if show_messages:
-                    messagebox.showerror("Errore", 
-                                       f"Impossibile sincronizzare il calendario: {str(e)}", 
-                                       parent=self)
+                self.draw_calendar()
+            except Exception as draw_err:
+                logging.error(f"Errore nel ridisegno del calendario: {str(draw_err)}")
+            self.load_month_activities()
             
-        finally:
-            # Chiudi la finestra di progresso se è stata creata
-            if show_messages and 'progress' in locals() and progress:
-                try:
-                    progress.destroy()
-                except:
-                    pass
+            # Mostra messaggio di conferma solo se richiesto
+            if show_messages:
+                messagebox.showinfo("Sincronizzazione completata", 
+                                  "Calendario sincronizzato con Garmin Connect", 
+                                  parent=self)
+            
+            logging.info("Sincronizzazione del calendario completata con successo")
+        
+        def sync_failed(error):
+            logging.error(f"Errore durante la sincronizzazione del calendario: {str(error)}")
+            if show_messages:
+                messagebox.showerror("Errore", 
+                                   f"Impossibile sincronizzare il calendario: {str(error)}", 
+                                   parent=self)
+        
+        job = self.jobs.submit(
+            sync, name="sync_calendar",
+            on_done=sync_done,
+            on_error=sync_failed,
+            on_cancel=lambda: logging.info("Sincronizzazione del calendario annullata"),
+            on_progress=progress.set_message if progress else None,
+            on_finally=progress.close if progress else None)
+        if progress:
+            progress.attach(job)
 
-    def fetch_scheduled_workouts(self):
-        """Ottiene gli allenamenti programmati da Garmin Connect"""
+    def load_scheduled_workouts(self, client, refresh=False):
+        """
+        Scarica gli allenamenti programmati da 3 mesi prima a 12 mesi dopo oggi.
+        
+        Non tocca l'interfaccia: può essere chiamata dal thread di un lavoro in background.
+        
+        Returns:
+            list: Elementi del calendario di tipo 'workout', ordinati per data
+        """
+        # Periodo di ricerca: 3 mesi prima e 12 mesi dopo
+        start_date = datetime.date.today() - datetime.timedelta(days=90)
+        end_date = datetime.date.today() + datetime.timedelta(days=365)
+        
+        logging.info(f"Searching for workouts from {start_date} to {end_date}")
+        
+        # Tutti i mesi del periodo vengono richiesti in parallelo, senza duplicati e ordinati per data
+        calendar_items = client.get_calendar_range(start_date, end_date, refresh=refresh)
+        scheduled_workouts = [item for item in calendar_items if item.get('itemType') == 'workout']
+        
+        logging.info(f"Total scheduled workouts found: {len(scheduled_workouts)}")
+        
+        # Log some details about what we found
+        for workout in scheduled_workouts[:5]:  # Log first 5 for brevity
+            logging.debug(f"Scheduled workout: {workout.get('title')} on {workout.get('date')}")
+        
+        return scheduled_workouts
+
+    def fetch_scheduled_workouts(self, refresh=False):
+        """
+        Ottiene gli allenamenti programmati da Garmin Connect in background
+        e ridisegna il calendario al termine
+        
+        Args:
+            refresh: Se True ignora i mesi presenti nella cache locale
+        """
         logging.info("Starting fetch_scheduled_workouts")
         if not self.garmin_client:
             logging.error("No Garmin client available")
             return
         
-        # Crea una finestra di progresso
-        progress = tk.Toplevel(self)
-        progress.title("Caricamento in corso")
-        progress.geometry("300x100")
-        progress.transient(self)
-        progress.grab_set()
+        client = self.garmin_client
+        progress = JobProgressWindow(self, "Caricamento in corso", "Recupero allenamenti programmati...")
         
-        # Etichetta
-        ttk.Label(progress, text="Recupero allenamenti programmati...").pack(pady=(20, 10))
-        
-        # Barra di progresso
-        progressbar = ttk.Progressbar(progress, mode='indeterminate')
-        progressbar.pack(fill=tk.X, padx=20)
-        progressbar.start()
-        
-        # Aggiorna la finestra
-        progress.update()
+        def fetch_done(scheduled_workouts):
+            # Indicizza gli allenamenti per data una sola volta per sincronizzazione
+            self.scheduled_workouts = scheduled_workouts
+            self.draw_calendar()
         
-        try:
-            # Periodo di ricerca: 3 mesi prima e 12 mesi dopo
-            start_date = datetime.date.today() - datetime.timedelta(days=90)
-            end_date = datetime.date.today() + datetime.timedelta(days=365)
-            
-            logging.info(f"Searching for workouts from {start_date} to {end_date}")
-            
-            self.scheduled_workouts = []
-            seen_ids = set()  # Set per tenere traccia degli ID già visti
-            
-            # First, let's check if we can get the current month's data directly
-            current_month_date = datetime.date.today()
-            try:
-                logging.info(f"Checking current month: {current_month_date.year}-{current_month_date.month}")
-                current_response = self.garmin_client.get_calendar(current_month_date.year, current_month_date.month)
-                
-                # Log the raw response for debugging
-                logging.debug(f"Current month response: {json.dumps(current_response, indent=2)}")
-                
-                if 'calendarItems' in current_response:
-                    calendar_items = current_response.get('calendarItems', [])
-                    logging.info(f"Current month has {len(calendar_items)} calendar items total")
-                    
-                    workout_items = [item for item in calendar_items if item.get('itemType') == 'workout']
-                    logging.info(f"Current month has {len(workout_items)} workout items")
-                    
-                    # Log details of each workout found
-                    for item in workout_items:
-                        workout_id = item.get('workoutId', 'Unknown')
-                        workout_name = item.get('title', 'Untitled')
-                        workout_date = item.get('date', 'No date')
-                        logging.info(f"Current month workout: {workout_name} (ID: {workout_id}) on {workout_date}")
-                else:
-                    logging.warning("No calendarItems found in the response for current month")
-            except Exception as e:
-                logging.error(f"Error checking current month: {str(e)}")
-            
-            # Now proceed with the regular month-by-month search
-            # Ottieni il calendario per ogni mese nel periodo
-            current_date = datetime.date(start_date.year, start_date.month, 1)
-            end_month = datetime.date(end_date.year, end_date.month, 1)
-            
-            while current_date <= end_month:
-                logging.info(f"Checking month: {current_date.year}-{current_date.month}")
-                # Ottieni il calendario per questo mese
-                response = self.garmin_client.get_calendar(current_date.year, current_date.month)
-                
-                # Cerca gli allenamenti
-                found_workouts = 0  # Reset for this month
-                if 'calendarItems' in response:
-                    calendar_items = response.get('calendarItems', [])
-                    logging.info(f"Month {current_date.year}-{current_date.month} has {len(calendar_items)} calendar items")
-                    
-                    workout_items = [item for item in calendar_items if item.get('itemType') == 'workout']
-                    logging.info(f"Month {current_date.year}-{current_date.month} has {len(workout_items)} workout items")
-                    
-                    for item in calendar_items:
-                        if item.get('itemType') == 'workout':
-                            workout_name = item.get('title', '')
-                            workout_id = item.get('workoutId', None)
-                            schedule_id = item.get('id', None)
-                            schedule_date = item.get('date', None)
-                            
-                            # Controlla se questo ID è già stato visto
-                            item_id = item.get('id')
-                            if item_id not in seen_ids:
-                                seen_ids.add(item_id)
-                                self.scheduled_workouts.append(item)
-                                found_workouts += 1
-                                logging.debug(f"Found workout: {workout_name} (ID: {workout_id}, Schedule ID: {schedule_id}) on {schedule_date}")
-                else:
-                    logging.warning(f"No calendarItems found in the response for {current_date.year}-{current_date.month}")
-                
-                logging.info(f"Found {found_workouts} workouts for {current_date.year}-{current_date.month}")
-                
-                # Passa al mese successivo
-                if current_date.month == 12:
-                    current_date = datetime.date(current_date.year + 1, 1, 1)
-                else:
-                    current_date = datetime.date(current_date.year, current_date.month + 1, 1)
-                
-                # Se non c'è una data di fine specifica e non sono stati trovati allenamenti in questo mese,
-                # interrompi la ricerca (non ha senso continuare a cercare oltre)
-                if not end_date and found_workouts == 0:
-                    logging.info(f"No workouts found for {current_date.year}-{current_date.month}, stopping search")
-                    break
-            
-            # Ordina per data
-            self.scheduled_workouts.sort(key=lambda x: x.get('date', ''))
-            logging.info(f"Total scheduled workouts found: {len(self.scheduled_workouts)}")
-            
-            # Log some details about what we found
-            if self.scheduled_workouts:
-                for workout in self.scheduled_workouts[:5]:  # Log first 5 for brevity
-                    logging.info(f"Scheduled workout: {workout.get('title')} on {workout.get('date')}")
-                if len(self.scheduled_workouts) > 5:
-                    logging.info(f"... and {len(self.scheduled_workouts) - 5} more workouts")
-            
-        except Exception as e:
-            logging.error(f"Error in fetch_scheduled_workouts: {str(e)}")
-            # Chiudi la finestra di progresso
-            progress.destroy()
-            raise e
+        def fetch_failed(error):
+            logging.error(f"Error in fetch_scheduled_workouts: {str(error)}")
+            messagebox.showerror("Errore", 
+                               f"Impossibile recuperare gli allenamenti programmati: {str(error)}", 
+                               parent=self)
         
-        # Chiudi la finestra di progresso
-        progress.destroy()
+        progress.attach(self.jobs.submit(
+            lambda job: self.load_scheduled_workouts(client, refresh),
+            name="fetch_scheduled_workouts",
+            on_done=fetch_done,
+            on_error=fetch_failed,
+            on_finally=progress.close))
 
         
-    def fetch_available_workouts(self):
-        """Ottiene gli allenamenti disponibili da Garmin Connect"""
+    def fetch_available_workouts(self, refresh=False):
+        """
+        Ottiene gli allenamenti disponibili da Garmin Connect
+        
+        Args:
+            refresh: Se True ignora la cache locale e riscarica la lista
+        """
         if not self.garmin_client:
             return
         
         try:
             # Ottieni la lista degli allenamenti
-            self.available_workouts = self.garmin_client.list_workouts()
+            self.available_workouts = self.garmin_client.list_workouts(refresh=refresh)
             
             # Aggiorna la lista
             self.update_workout_list()
@@ -1379,7 +1360,7 @@ class CalendarFrame(ttk.Frame):
     def refresh_workouts(self):
         """Aggiorna la lista degli allenamenti disponibili"""
         if self.garmin_client:
-            self.fetch_available_workouts()
+            self.fetch_available_workouts(refresh=True)
         else:
             messagebox.showerror("Errore", 
                                "Devi essere connesso a Garmin Connect", 
@@ -1410,6 +1391,10 @@ class CalendarFrame(ttk.Frame):
         """Gestisce l'evento di logout"""
         self.garmin_client = None
         
+        # Annulla le operazioni di rete in corso
+        self.jobs.cancel_all()
+        self.activity_jobs.cancel_all()
+        
         # Disabilita i pulsanti
         self.sync_button['state'] = 'disabled'
         self.schedule_button['state'] = 'disabled'
@@ -1419,6 +1404,8 @@ class CalendarFrame(ttk.Frame):
 
         # Pulisci i dati
         self.scheduled_workouts = []
+        self.activity_store.clear()
+        self.activities = []
         if hasattr(self, 'available_workouts'):
             del self.available_workouts
         
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Modello dati del calendario: allenamenti programmati e attività indicizzati per data
+"""
+
+import datetime
+import logging
+import time
+
+# Secondi per cui le attività del mese corrente (o futuro) sono considerate aggiornate;
+# quelle dei mesi passati non cambiano più e restano valide per tutta la sessione
+DEFAULT_ACTIVITY_TTL = 10 * 60
+
+
+def item_date(item):
+    """
+    Data ISO (YYYY-MM-DD) di un elemento del calendario o di un'attività.
+
+    Gli allenamenti programmati hanno il campo 'date', le attività 'startTimeLocal'
+    nel formato "2025-04-29 20:05:43" (o con 'T' come separatore).
+    """
+    date = item.get('date') or item.get('startTimeLocal') or ''
+    return date[:10]
+
+
+class CalendarModel:
+    """
+    Allenamenti programmati e attività indicizzati per data ISO.
+
+    Gli indici vengono costruiti una volta per sincronizzazione e aggiornati
+    incrementalmente quando un allenamento viene pianificato, spostato o cancellato,
+    così ogni cella del calendario richiede solo una ricerca nel dizionario.
+    """
+
+    def __init__(self):
+        self._workouts_by_date = {}
+        self._workouts_by_id = {}
+        self._activities_by_date = {}
+        self._activities = []
+
+    # --- Allenamenti programmati ---
+
+    @property
+    def workouts(self):
+        """Tutti gli allenamenti programmati, ordinati per data"""
+        return [workout for date in sorted(self._workouts_by_date)
+                for workout in self._workouts_by_date[date]]
+
+    def set_workouts(self, workouts):
+        """Sostituisce gli allenamenti programmati e ricostruisce l'indice"""
+        self._workouts_by_date = {}
+        self._workouts_by_id = {}
+        for workout in workouts or []:
+            self.add_workout(workout)
+        logging.debug(f"Indice calendario: {len(self._workouts_by_id)} allenamenti "
+                      f"in {len(self._workouts_by_date)} giorni")
+
+    def add_workout(self, workout):
+        """Aggiunge un allenamento programmato all'indice"""
+        self._workouts_by_date.setdefault(item_date(workout), []).append(workout)
+        if workout.get('id') is not None:
+            self._workouts_by_id[str(workout['id'])] = workout
+
+    def remove_workout(self, schedule_id):
+        """
+        Rimuove un allenamento programmato dall'indice.
+
+        Returns:
+            dict: L'allenamento rimosso, oppure None se non era presente
+        """
+        workout = self._workouts_by_id.pop(str(schedule_id), None)
+        if workout is None:
+            return None
+
+        date = item_date(workout)
+        day = [item for item in self._workouts_by_date.get(date, []) if item is not workout]
+        if day:
+            self._workouts_by_date[date] = day
+        else:
+            self._workouts_by_date.pop(date, None)
+        return workout
+
+    def move_workout(self, schedule_id, new_date, new_schedule_id=None):
+        """
+        Sposta un allenamento programmato a una nuova data.
+
+        Args:
+            schedule_id: ID della programmazione attuale
+            new_date: Nuova data (YYYY-MM-DD)
+            new_schedule_id: ID della nuova programmazione, se è cambiato
+
+        Returns:
+            dict: L'allenamento spostato, oppure None se non era presente
+        """
+        workout = self.remove_workout(schedule_id)
+        if workout is None:
+            return None
+
+        workout = dict(workout, date=new_date)
+        if new_schedule_id is not None:
+            workout['id'] = new_schedule_id
+        self.add_workout(workout)
+        return workout
+
+    def workouts_on(self, date):
+        """Allenamenti programmati in una data (YYYY-MM-DD)"""
+        return self._workouts_by_date.get(date, [])
+
+    def workout_count(self, year, month):
+        """Numero di allenamenti programmati in un mese"""
+        prefix = f"{year}-{month:02d}-"
+        return sum(len(items) for date, items in self._workouts_by_date.items()
+                   if date.startswith(prefix))
+
+    # --- Attività ---
+
+    @property
+    def activities(self):
+        """Tutte le attività, nell'ordine in cui sono state ricevute"""
+        return self._activities
+
+    def set_activities(self, activities):
+        """Sostituisce le attività e ricostruisce l'indice"""
+        self._activities = list(activities or [])
+        self._activities_by_date = {}
+        for activity in self._activities:
+            self._activities_by_date.setdefault(item_date(activity), []).append(activity)
+
+    def activities_on(self, date):
+        """Attività svolte in una data (YYYY-MM-DD)"""
+        return self._activities_by_date.get(date, [])
+
+    def clear(self):
+        """Svuota il modello"""
+        self.set_workouts([])
+        self.set_activities([])
+
+
+def adjacent_months(year, month):
+    """Mese precedente e mese successivo come tuple (anno, mese)"""
+    previous = (year - 1, 12) if month == 1 else (year, month - 1)
+    following = (year + 1, 1) if month == 12 else (year, month + 1)
+    return [previous, following]
+
+
+class ActivityStore:
+    """
+    Attività di Garmin Connect memorizzate per mese.
+
+    I mesi vengono scaricati solo quando servono (il mese visualizzato e i due
+    adiacenti, in anticipo), così la navigazione nello storico non richiede
+    di scaricare tutte le attività in una volta.
+    """
+
+    def __init__(self, ttl=DEFAULT_ACTIVITY_TTL):
+        """
+        Args:
+            ttl: Secondi di validità del mese corrente e dei mesi futuri
+        """
+        self.ttl = ttl
+        self._months = {}
+        self._pending = set()
+
+    def get(self, year, month):
+        """
+        Attività di un mese.
+
+        Returns:
+            list: Le attività, oppure None se il mese non è stato scaricato o è scaduto
+        """
+        entry = self._months.get((year, month))
+        if entry is None:
+            return None
+
+        fetched_at, activities = entry
+        today = datetime.date.today()
+        if (year, month) >= (today.year, today.month) and time.time() - fetched_at > self.ttl:
+            return None
+        return activities
+
+    def put(self, year, month, activities):
+        """Memorizza le attività di un mese"""
+        self._months[(year, month)] = (time.time(), list(activities or []))
+        self._pending.discard((year, month))
+
+    def needs_fetch(self, year, month):
+        """True se il mese non è disponibile e non è già in corso di scaricamento"""
+        return (year, month) not in self._pending and self.get(year, month) is None
+
+    def mark_pending(self, year, month):
+        """Segna un mese come in corso di scaricamento"""
+        self._pending.add((year, month))
+
+    def discard_pending(self, year, month):
+        """Rimuove il segno di scaricamento in corso (ad esempio dopo un errore o un annullamento)"""
+        self._pending.discard((year, month))
+
+    def invalidate(self, year=None, month=None):
+        """Dimentica un mese, oppure tutti i mesi se non ne viene indicato nessuno"""
+        if year is None:
+            self._months.clear()
+        else:
+            self._months.pop((year, month), None)
+
+    def clear(self):
+        """Svuota la memoria, compresi i mesi in corso di scaricamento"""
+        self._months.clear()
+        self._pending.clear()
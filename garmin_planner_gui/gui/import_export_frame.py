@@ -9,19 +9,13 @@ import os
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import logging
-import threading
 import json
-import yaml
 import re
 import datetime
 from .styles import COLORS
 from planner.excel_to_yaml_converter import normalize_pace_format
-
-
-class NoAliasDumper(yaml.SafeDumper):
-    """Custom YAML dumper that ignores aliases"""
-    def ignore_aliases(self, data):
-        return True
+from planner.plan_io import load_plan, dump_plan
+from .jobs import JobQueue, JobProgressWindow
 
 class ImportExportFrame(ttk.Frame):
     """Frame per l'importazione e l'esportazione degli allenamenti"""
@@ -31,6 +25,9 @@ class ImportExportFrame(ttk.Frame):
         self.controller = controller
         self.garmin_client = None
         
+        # Coda delle operazioni di rete eseguite in background
+        self.jobs = JobQueue(self)
+        
         # Inizializza l'interfaccia
         self.init_ui()
     
@@ -336,7 +333,7 @@ class ImportExportFrame(ttk.Frame):
         
         # Pulsante per aggiornare la lista
         self.garmin_refresh_button = ttk.Button(status_frame, text="Aggiorna", 
-                                              command=self.refresh_garmin_workouts)
+                                              command=lambda: self.refresh_garmin_workouts(refresh=True))
         self.garmin_refresh_button.pack(side=tk.RIGHT)
         
         # Disabilitato finché non si effettua il login
@@ -425,7 +422,7 @@ class ImportExportFrame(ttk.Frame):
         
         # Pulsante per aggiornare la lista
         self.export_refresh_button = ttk.Button(status_frame, text="Aggiorna", 
-                                              command=self.refresh_remote_workouts)
+                                              command=lambda: self.refresh_remote_workouts(refresh=True))
         self.export_refresh_button.pack(side=tk.RIGHT)
         
         # Disabilitato finché non si effettua il login
@@ -522,8 +519,7 @@ class ImportExportFrame(ttk.Frame):
                 
                 # Carica il file sorgente
                 if source_ext in ['.yaml', '.yml']:
-                    with open(source_file, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
+                    data = load_plan(source_file)
                     self.write_log("File YAML caricato")
                 elif source_ext == '.json':
                     with open(source_file, 'r', encoding='utf-8') as f:
@@ -551,8 +547,7 @@ class ImportExportFrame(ttk.Frame):
                 else:
                     # Prova prima come YAML per altri formati
                     try:
-                        with open(source_file, 'r', encoding='utf-8') as f:
-                            data = yaml.safe_load(f)
+                        data = load_plan(source_file)
                         self.write_log("File caricato come YAML")
                     except Exception as e:
                         messagebox.showerror("Errore", 
@@ -609,8 +604,7 @@ class ImportExportFrame(ttk.Frame):
                 # Normalizza tutti i ritmi prima dell'esportazione
                 normalized_data = self.prepare_data_for_yaml_export(data)
                 
-                with open(filename, 'w', encoding='utf-8') as f:
-                    yaml.dump(normalized_data, f, default_flow_style=False, sort_keys=False, Dumper=NoAliasDumper)
+                dump_plan(normalized_data, filename)
                 self.write_log("Esportato in formato YAML")
             elif ext == '.xlsx':
                 # Esporta in Excel
@@ -811,8 +805,7 @@ class ImportExportFrame(ttk.Frame):
     def import_from_file(self):
         """Importa allenamenti da un file (YAML o Excel)"""
         import os  # Reimportiamo os all'interno della funzione per assicurarci che sia disponibile
-        import openpyxl  # Per leggere direttamente Excel
-        from planner.excel_to_yaml_converter import normalize_pace_format
+        from planner.excel_to_yaml_converter import ExcelWorkbook, normalize_pace_format
         
         # Ottieni il nome del file
         filename = self.import_file_var.get().strip()
@@ -842,25 +835,28 @@ class ImportExportFrame(ttk.Frame):
             # Variabile per gestire il caso speciale delle frequenze cardiache
             heart_rates = {}
             
+            # Workbook Excel letto una sola volta e riutilizzato per la conversione
+            workbook = None
+            
             # Se è un file Excel, estrai direttamente le frequenze cardiache
             if ext == '.xlsx':
                 try:
                     # Carica il workbook
-                    wb = openpyxl.load_workbook(filename, data_only=True)
+                    workbook = ExcelWorkbook(filename)
                     
                     # Verifica se esiste il foglio HeartRates
-                    if 'HeartRates' in wb.sheetnames:
+                    if 'HeartRates' in workbook:
                         # Estrai le frequenze cardiache
-                        hr_sheet = wb['HeartRates']
+                        hr_rows = workbook.rows('HeartRates')
                         
                         # Stampa info sul foglio
-                        self.write_log(f"Foglio HeartRates trovato: {hr_sheet.dimensions}, righe: {hr_sheet.max_row}")
+                        self.write_log(f"Foglio HeartRates trovato, righe: {len(hr_rows)}")
                         
                         # Processa riga per riga, saltando l'intestazione
-                        for row in range(2, hr_sheet.max_row + 1):
+                        for row in range(2, len(hr_rows) + 1):
                             # Ottieni il nome e il valore
-                            name = hr_sheet.cell(row=row, column=1).value
-                            value = hr_sheet.cell(row=row, column=2).value
+                            name = workbook.cell('HeartRates', row, 1)
+                            value = workbook.cell('HeartRates', row, 2)
                             
                             # Verifica che entrambi non siano None
                             if name is not None and value is not None:
@@ -887,8 +883,7 @@ class ImportExportFrame(ttk.Frame):
             # Ora procedi con la normale importazione
             if ext in ['.yaml', '.yml']:
                 # Importa da YAML
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
+                data = load_plan(filename)
                 self.write_log("File YAML caricato")
             elif ext == '.json':
                 # Importa da JSON e converti in YAML
@@ -904,8 +899,8 @@ class ImportExportFrame(ttk.Frame):
                 with tempfile.NamedTemporaryFile(suffix='.yaml', delete=False) as tmp:
                     tmp_filename = tmp.name
                     
-                # Converti il file Excel in YAML
-                data = excel_to_yaml(filename, tmp_filename)
+                # Converti il file Excel in YAML (riusando il workbook già letto, se disponibile)
+                data = excel_to_yaml(workbook or filename, tmp_filename)
                 
                 # Elimina il file temporaneo
                 try:
@@ -927,8 +922,7 @@ class ImportExportFrame(ttk.Frame):
             else:
                 # Prova come YAML per altri formati
                 try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
+                    data = load_plan(filename)
                     self.write_log("File caricato come YAML")
                 except Exception as e:
                     messagebox.showerror("Errore", 
@@ -1349,8 +1343,7 @@ class ImportExportFrame(ttk.Frame):
     def import_from_yaml(self, filename):
         """Importa gli allenamenti da un file YAML"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                yaml_data = yaml.safe_load(f)
+            yaml_data = load_plan(filename)
             
             # Estrai configurazione
             config = yaml_data.get('config', {})
@@ -1668,8 +1661,13 @@ class ImportExportFrame(ttk.Frame):
                               parent=self)
             self.write_log(f"Errore: {str(e)}")
     
-    def refresh_garmin_workouts(self):
-        """Aggiorna la lista degli allenamenti disponibili su Garmin Connect"""
+    def refresh_garmin_workouts(self, refresh=False):
+        """
+        Aggiorna la lista degli allenamenti disponibili su Garmin Connect
+        
+        Args:
+            refresh: Se True ignora la cache locale e riscarica la lista
+        """
         if not self.garmin_client:
             messagebox.showerror("Errore", 
                                "Devi essere connesso a Garmin Connect", 
@@ -1679,46 +1677,20 @@ class ImportExportFrame(ttk.Frame):
         # Log
         self.write_log("Aggiornamento lista allenamenti da Garmin Connect")
         
-        # Crea una finestra di progresso
-        progress = tk.Toplevel(self)
-        progress.title("Caricamento in corso")
-        progress.geometry("300x100")
-        progress.transient(self)
-        progress.grab_set()
-        
-        # Etichetta
-        ttk.Label(progress, text="Recupero allenamenti...").pack(pady=(20, 10))
-        
-        # Barra di progresso
-        progressbar = ttk.Progressbar(progress, mode='indeterminate')
-        progressbar.pack(fill=tk.X, padx=20)
-        progressbar.start()
-        
-        # Aggiorna la finestra
-        progress.update()
-        
-        try:
-            # Ottieni la lista degli allenamenti
-            self.garmin_workouts = self.garmin_client.list_workouts()
-            
-            # Aggiorna la lista
+        def list_done(workouts):
+            self.garmin_workouts = workouts
             self.update_garmin_workout_list()
-            
-            # Log
             self.write_log(f"{len(self.garmin_workouts)} allenamenti trovati")
-            
-        except Exception as e:
-            messagebox.showerror("Errore", 
-                               f"Impossibile ottenere gli allenamenti: {str(e)}", 
-                               parent=self)
-            self.write_log(f"Errore: {str(e)}")
         
-        finally:
-            # Chiudi la finestra di progresso
-            progress.destroy()
+        self.stream_workout_list(refresh, "Recupero allenamenti...", list_done)
 
-    def refresh_remote_workouts(self):
-        """Aggiorna la lista degli allenamenti remoti per la scheda di esportazione"""
+    def refresh_remote_workouts(self, refresh=False):
+        """
+        Aggiorna la lista degli allenamenti remoti per la scheda di esportazione
+        
+        Args:
+            refresh: Se True ignora la cache locale e riscarica la lista
+        """
         if not self.garmin_client:
             messagebox.showerror("Errore", 
                               "Devi essere connesso a Garmin Connect", 
@@ -1728,44 +1700,53 @@ class ImportExportFrame(ttk.Frame):
         # Log
         self.write_log("Aggiornamento lista allenamenti remoti da Garmin Connect")
         
-        # Crea una finestra di progresso
-        progress = tk.Toplevel(self)
-        progress.title("Caricamento in corso")
-        progress.geometry("300x100")
-        progress.transient(self)
-        progress.grab_set()
+        def list_done(workouts):
+            self.remote_workouts = workouts
+            self.update_remote_workout_list()
+            self.write_log(f"{len(self.remote_workouts)} allenamenti remoti trovati")
         
-        # Etichetta
-        ttk.Label(progress, text="Recupero allenamenti remoti...").pack(pady=(20, 10))
+        self.stream_workout_list(refresh, "Recupero allenamenti remoti...", list_done)
+    
+    def stream_workout_list(self, refresh, message, on_done):
+        """
+        Scarica in background la lista degli allenamenti, una pagina alla volta.
         
-        # Barra di progresso
-        progressbar = ttk.Progressbar(progress, mode='indeterminate')
-        progressbar.pack(fill=tk.X, padx=20)
-        progressbar.start()
+        La finestra di progresso mostra quanti allenamenti sono arrivati; annullando,
+        le pagine successive non vengono richieste.
         
-        # Aggiorna la finestra
-        progress.update()
+        Args:
+            refresh: Se True ignora la cache locale e riscarica la lista
+            message: Messaggio della finestra di progresso
+            on_done: Callback con la lista degli allenamenti
+        """
+        client = self.garmin_client
+        progress = JobProgressWindow(self, "Caricamento in corso", message)
         
-        try:
-            # Ottieni la lista degli allenamenti remoti
-            self.remote_workouts = self.garmin_client.list_workouts()
-            
-            # Aggiorna la lista
-            self.update_remote_workout_list()
+        def download(job):
+            # Eseguita in background: nessun accesso ai widget
+            from planner.garmin_client import DEFAULT_WORKOUT_PAGE_SIZE
             
-            # Log
-            self.write_log(f"{len(self.remote_workouts)} allenamenti remoti trovati")
-            
-        except Exception as e:
+            workouts = []
+            for workout in client.iter_workouts(refresh=refresh):
+                workouts.append(workout)
+                if len(workouts) % DEFAULT_WORKOUT_PAGE_SIZE == 0:
+                    job.progress(len(workouts))
+            return workouts
+        
+        def list_failed(e):
             messagebox.showerror("Errore", 
-                              f"Impossibile ottenere gli allenamenti remoti: {str(e)}", 
-                              parent=self)
+                               f"Impossibile ottenere gli allenamenti: {str(e)}", 
+                               parent=self)
             self.write_log(f"Errore: {str(e)}")
         
-        finally:
-            # Chiudi la finestra di progresso
-            progress.destroy()
-    
+        progress.attach(self.jobs.submit(
+            download, name="list_workouts",
+            on_done=on_done,
+            on_error=list_failed,
+            on_progress=lambda count: progress.set_message(f"{message}\n{count} allenamenti ricevuti"),
+            on_cancel=lambda: self.write_log("Aggiornamento lista annullato"),
+            on_finally=progress.close))
+
     def update_garmin_workout_list(self):
         """Aggiorna la lista degli allenamenti disponibili su Garmin Connect"""
         # Pulisci la lista
@@ -1858,26 +1839,7 @@ class ImportExportFrame(ttk.Frame):
         # Log
         self.write_log(f"Importazione di {len(selection)} allenamenti da Garmin Connect")
         
-        # Crea una finestra di progresso
-        progress = tk.Toplevel(self)
-        progress.title("Importazione in corso")
-        progress.geometry("400x150")
-        progress.transient(self)
-        progress.grab_set()
-        
-        # Etichetta
-        status_var = tk.StringVar(value="Importazione in corso...")
-        status_label = ttk.Label(progress, textvariable=status_var)
-        status_label.pack(pady=(20, 10))
-        
-        # Barra di progresso
-        progressbar = ttk.Progressbar(progress, mode='determinate', length=300, maximum=len(selection))
-        progressbar.pack(pady=10)
-        
-        # Aggiorna la finestra
-        progress.update()
-        
-        try:
+        def import_done(results):
             # Ottieni gli allenamenti correnti dall'editor
             current_workouts = self.controller.workout_editor_frame.workouts
             current_names = [name for name, _ in current_workouts]
@@ -1888,22 +1850,10 @@ class ImportExportFrame(ttk.Frame):
             skipped = 0
             errors = 0
             
-            # Importa gli allenamenti selezionati
-            for i, index in enumerate(selection):
+            for name, steps, error in results:
                 try:
-                    # Aggiorna lo stato
-                    workout = self.garmin_workouts[index]
-                    name = workout.get('workoutName', '')
-                    status_var.set(f"Importazione {i+1}/{len(selection)}: {name}")
-                    progressbar['value'] = i
-                    progress.update()
-                    
-                    # Ottieni i dettagli dell'allenamento
-                    workout_id = workout.get('workoutId')
-                    workout_detail = self.garmin_client.get_workout(workout_id)
-                    
-                    # Converti in formato interno
-                    steps = self.convert_garmin_to_internal(workout_detail)
+                    if error is not None:
+                        raise ValueError(error)
                     
                     # Verifica se esiste già
                     if name in current_names:
@@ -1917,7 +1867,6 @@ class ImportExportFrame(ttk.Frame):
                             # Salta l'allenamento
                             skipped += 1
                             self.write_log(f"Allenamento saltato (già esistente): {name}")
-                            continue
                     else:
                         # Aggiungi il nuovo allenamento
                         current_workouts.append((name, steps))
@@ -1942,16 +1891,72 @@ class ImportExportFrame(ttk.Frame):
             
             # Log
             self.write_log(f"Importazione completata: {imported} importati, {updated} aggiornati, {skipped} saltati, {errors} errori")
+        
+        self.fetch_workout_details([self.garmin_workouts[index] for index in selection],
+                                   "Importazione", import_done)
+    
+    def fetch_workout_details(self, workouts, operation, on_done):
+        """
+        Scarica in background i dettagli degli allenamenti indicati e li converte nel formato interno.
+        
+        I dettagli vengono richiesti in parallelo con GarminClient.get_workouts e ciascuno
+        viene convertito appena arriva. Mostra una finestra di progresso annullabile; al
+        termine chiama nel thread dell'interfaccia on_done con una lista di tuple
+        (nome, step, errore), dove step è None ed errore è il messaggio se il download
+        o la conversione non sono riusciti.
+        
+        Args:
+            workouts: Allenamenti (come restituiti da list_workouts)
+            operation: Nome dell'operazione per la finestra e il log (es. "Importazione")
+            on_done: Callback con gli allenamenti convertiti
+        """
+        client = self.garmin_client
+        progress = JobProgressWindow(self, f"{operation} in corso", f"{operation} in corso...",
+                                     maximum=len(workouts))
+        
+        def download(job):
+            # Eseguita in background: nessun accesso ai widget
+            names = [workout.get('workoutName', '') for workout in workouts]
+            converted = [None] * len(workouts)
+            positions = {}
+            for index, workout in enumerate(workouts):
+                positions.setdefault(workout.get('workoutId'), []).append(index)
+            
+            def on_result(completed, total, result):
+                # Chiamata nel thread del lavoro appena arriva un dettaglio
+                for index in positions.get(result['workout_id'], []):
+                    if result['error']:
+                        converted[index] = (names[index], None, result['error'])
+                        continue
+                    try:
+                        steps = self.convert_garmin_to_internal(result['detail'])
+                        converted[index] = (names[index], steps, None)
+                    except Exception as e:
+                        converted[index] = (names[index], None, str(e))
+                job.progress(completed, total, names[positions[result['workout_id']][0]])
             
-        except Exception as e:
+            client.get_workouts(list(positions), progress_callback=on_result)
+            return converted
+        
+        def update_progress(completed, total, name):
+            progress.set_progress(completed, f"{operation} {completed}/{total}: {name}")
+        
+        def download_failed(e):
             messagebox.showerror("Errore", 
-                               f"Errore durante l'importazione: {str(e)}", 
+                               f"Errore durante l'operazione: {str(e)}", 
                                parent=self)
             self.write_log(f"Errore: {str(e)}")
         
-        finally:
-            # Chiudi la finestra di progresso
-            progress.destroy()
+        def download_cancelled():
+            self.write_log(f"{operation} annullata")
+        
+        progress.attach(self.jobs.submit(
+            download, name=operation,
+            on_done=on_done,
+            on_error=download_failed,
+            on_progress=update_progress,
+            on_cancel=download_cancelled,
+            on_finally=progress.close))
     
     def convert_garmin_to_internal(self, workout_detail):
         """Converte un allenamento dal formato Garmin al formato interno"""
@@ -1994,8 +1999,7 @@ class ImportExportFrame(ttk.Frame):
                 
                 # Carica il file in base all'estensione
                 if ext in ['.yaml', '.yml']:
-                    with open(source_file, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
+                    data = load_plan(source_file)
                     self.write_log("File YAML caricato")
                 elif ext == '.json':
                     with open(source_file, 'r', encoding='utf-8') as f:
@@ -2016,8 +2020,7 @@ class ImportExportFrame(ttk.Frame):
                 else:
                     # Estensione non riconosciuta, prova come YAML, poi come JSON
                     try:
-                        with open(source_file, 'r', encoding='utf-8') as f:
-                            data = yaml.safe_load(f)
+                        data = load_plan(source_file)
                         self.write_log("File caricato come YAML")
                     except:
                         with open(source_file, 'r', encoding='utf-8') as f:
@@ -2201,8 +2204,7 @@ class ImportExportFrame(ttk.Frame):
                 
                 # Carica il file in base all'estensione
                 if ext in ['.yaml', '.yml']:
-                    with open(source_file, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
+                    data = load_plan(source_file)
                     self.write_log("File YAML caricato")
                 elif ext == '.json':
                     with open(source_file, 'r', encoding='utf-8') as f:
@@ -2227,8 +2229,7 @@ class ImportExportFrame(ttk.Frame):
                 else:
                     # Estensione non riconosciuta, prova come YAML, poi come JSON
                     try:
-                        with open(source_file, 'r', encoding='utf-8') as f:
-                            data = yaml.safe_load(f)
+                        data = load_plan(source_file)
                         self.write_log("File caricato come YAML")
                     except:
                         with open(source_file, 'r', encoding='utf-8') as f:
@@ -2321,26 +2322,7 @@ class ImportExportFrame(ttk.Frame):
         # Log
         self.write_log(f"Scaricamento di {len(selection)} allenamenti da Garmin Connect")
         
-        # Crea una finestra di progresso
-        progress = tk.Toplevel(self)
-        progress.title("Scaricamento in corso")
-        progress.geometry("400x150")
-        progress.transient(self)
-        progress.grab_set()
-        
-        # Etichetta
-        status_var = tk.StringVar(value="Scaricamento in corso...")
-        status_label = ttk.Label(progress, textvariable=status_var)
-        status_label.pack(pady=(20, 10))
-        
-        # Barra di progresso
-        progressbar = ttk.Progressbar(progress, mode='determinate', length=300, maximum=len(selection))
-        progressbar.pack(pady=10)
-        
-        # Aggiorna la finestra
-        progress.update()
-        
-        try:
+        def download_done(results):
             # Ottieni gli allenamenti correnti dall'editor
             current_workouts = self.controller.workout_editor_frame.workouts
             current_names = [name for name, _ in current_workouts]
@@ -2348,25 +2330,12 @@ class ImportExportFrame(ttk.Frame):
             # Contatori
             downloaded = 0
             updated = 0
-            skipped = 0
             errors = 0
             
-            # Scarica gli allenamenti selezionati
-            for i, index in enumerate(selection):
+            for name, steps, error in results:
                 try:
-                    # Aggiorna lo stato
-                    workout = self.remote_workouts[index]
-                    name = workout.get('workoutName', '')
-                    status_var.set(f"Scaricamento {i+1}/{len(selection)}: {name}")
-                    progressbar['value'] = i
-                    progress.update()
-                    
-                    # Ottieni i dettagli dell'allenamento
-                    workout_id = workout.get('workoutId')
-                    workout_detail = self.garmin_client.get_workout(workout_id)
-                    
-                    # Converti in formato interno
-                    steps = self.convert_garmin_to_internal(workout_detail)
+                    if error is not None:
+                        raise ValueError(error)
                     
                     # Verifica se esiste già
                     if name in current_names:
@@ -2398,16 +2367,9 @@ class ImportExportFrame(ttk.Frame):
             
             # Log
             self.write_log(f"Download completato: {downloaded} scaricati, {updated} aggiornati, {errors} errori")
-            
-        except Exception as e:
-            messagebox.showerror("Errore", 
-                               f"Errore durante il download: {str(e)}", 
-                               parent=self)
-            self.write_log(f"Errore: {str(e)}")
         
-        finally:
-            # Chiudi la finestra di progresso
-            progress.destroy()
+        self.fetch_workout_details([self.remote_workouts[index] for index in selection],
+                                   "Scaricamento", download_done)
     
     def on_login(self, client):
         """Gestisce l'evento di login completato"""
@@ -2432,6 +2394,7 @@ class ImportExportFrame(ttk.Frame):
     
     def on_logout(self):
         """Gestisce l'evento di logout"""
+        self.jobs.cancel_all()
         self.garmin_client = None
         
         # Aggiorna lo stato
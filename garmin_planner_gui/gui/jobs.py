@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Esecuzione in background delle operazioni di rete dell'interfaccia.
+
+Tutti i frame condividono un unico pool di thread; ogni frame ha la propria
+JobQueue, che esegue i lavori uno alla volta nell'ordine di invio. Le funzioni
+dei lavori girano in un thread separato e non devono toccare i widget: i
+progressi, il risultato e gli errori vengono consegnati al thread di Tk
+tramite after(), così il ciclo principale non si blocca mai.
+"""
+
+import logging
+import threading
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from planner import metrics
+
+# Thread del pool condiviso da tutte le code
+MAX_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Restituisce il pool di thread condiviso, creandolo al primo utilizzo"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="gui-job")
+        return _executor
+
+
+class JobCancelled(Exception):
+    """Sollevata nel thread del lavoro quando il lavoro è stato annullato"""
+    pass
+
+
+class Job:
+    """
+    Lavoro in background.
+
+    La funzione del lavoro riceve l'oggetto Job e può chiamare progress() per
+    notificare l'interfaccia e check() per interrompersi se il lavoro è stato
+    annullato (progress() effettua lo stesso controllo).
+    """
+
+    def __init__(self, queue, func, name="", on_done=None, on_error=None,
+                 on_progress=None, on_cancel=None, on_finally=None):
+        self.queue = queue
+        self.func = func
+        self.name = name or getattr(func, '__name__', 'job')
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.on_finally = on_finally
+        self._cancel_event = threading.Event()
+        self.finished = False
+
+    @property
+    def cancelled(self):
+        """True se è stato richiesto l'annullamento"""
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Richiede l'annullamento del lavoro (effettivo al prossimo check/progress)"""
+        if not self.finished:
+            logging.info(f"Annullamento del lavoro '{self.name}'")
+            self._cancel_event.set()
+
+    def check(self):
+        """Solleva JobCancelled se il lavoro è stato annullato"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.name)
+
+    def progress(self, *args):
+        """
+        Notifica un progresso all'interfaccia (on_progress(*args) nel thread di Tk).
+
+        Raises:
+            JobCancelled: Se il lavoro è stato annullato
+        """
+        self.check()
+        if self.on_progress:
+            self.queue.deliver(self.on_progress, *args)
+
+    def run(self):
+        """Esegue il lavoro nel thread del pool"""
+        try:
+            self.check()
+            with metrics.timer(f"gui.job.{self.name}"):
+                result = self.func(self)
+            self.check()
+        except JobCancelled:
+            metrics.increment("gui.job.cancelled")
+            self.queue.deliver(self._finish, self.on_cancel)
+        except Exception as e:
+            logging.error(f"Errore nel lavoro '{self.name}': {str(e)}")
+            if self.cancelled:
+                self.queue.deliver(self._finish, self.on_cancel)
+            else:
+                self.queue.deliver(self._finish, self.on_error, e)
+        else:
+            self.queue.deliver(self._finish, self.on_done, result)
+
+    def _finish(self, callback, *args):
+        # Eseguito nel thread di Tk
+        self.finished = True
+        try:
+            if callback:
+                callback(*args)
+        finally:
+            if self.on_finally:
+                self.on_finally()
+            self.queue._job_finished(self)
+
+
+class JobQueue:
+    """
+    Coda dei lavori in background di un frame.
+
+    I lavori vengono eseguiti uno alla volta sul pool condiviso; le callback
+    (on_done, on_error, on_progress, on_cancel, on_finally) sono sempre chiamate
+    nel thread di Tk.
+    """
+
+    def __init__(self, widget):
+        """
+        Args:
+            widget: Widget Tk usato per consegnare le callback con after()
+        """
+        self.widget = widget
+        self._pending = deque()
+        self._current = None
+
+    @property
+    def busy(self):
+        """True se c'è un lavoro in esecuzione o in attesa"""
+        return self._current is not None or bool(self._pending)
+
+    @property
+    def current(self):
+        """Lavoro in esecuzione (o None)"""
+        return self._current
+
+    def submit(self, func, name="", on_done=None, on_error=None, on_progress=None,
+               on_cancel=None, on_finally=None):
+        """
+        Accoda un lavoro.
+
+        Args:
+            func: Funzione eseguita in background come func(job); il valore restituito
+                viene passato a on_done
+            name: Nome del lavoro (per il log)
+            on_done: Chiamata con il risultato
+            on_error: Chiamata con l'eccezione sollevata da func
+            on_progress: Chiamata con gli argomenti di job.progress()
+            on_cancel: Chiamata se il lavoro viene annullato
+            on_finally: Chiamata in ogni caso al termine del lavoro
+
+        Returns:
+            Job: Il lavoro accodato
+        """
+        job = Job(self, func, name, on_done, on_error, on_progress, on_cancel, on_finally)
+        self._pending.append(job)
+        self._start_next()
+        return job
+
+    def cancel_all(self):
+        """Annulla il lavoro in corso e quelli in attesa"""
+        self.cancel_pending()
+        if self._current is not None:
+            self._current.cancel()
+
+    def cancel_pending(self):
+        """Annulla i lavori in attesa, lasciando terminare quello in corso"""
+        while self._pending:
+            job = self._pending.popleft()
+            job.cancel()
+            job._finish(job.on_cancel)
+
+    def deliver(self, callback, *args):
+        """Chiama callback(*args) nel thread di Tk"""
+        try:
+            self.widget.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            # La finestra è stata chiusa: non c'è più nessuno da notificare
+            logging.debug("Callback di un lavoro scartata: finestra non più disponibile")
+
+    def _start_next(self):
+        if self._current is not None or not self._pending:
+            return
+        self._current = self._pending.popleft()
+        get_executor().submit(self._current.run)
+
+    def _job_finished(self, job):
+        if job is self._current:
+            self._current = None
+            self._start_next()
+
+
+class JobProgressWindow:
+    """
+    Finestra di progresso per un lavoro in background, con pulsante di annullamento.
+
+    A differenza delle finestre con progress.update(), l'interfaccia resta
+    reattiva perché il lavoro non gira nel thread di Tk.
+    """
+
+    def __init__(self, parent, title, message, maximum=None, cancellable=True):
+        """
+        Args:
+            parent: Widget padre
+            title: Titolo della finestra
+            message: Messaggio iniziale
+            maximum: Numero di passi per una barra determinata (None per una barra indeterminata)
+            cancellable: Se True mostra il pulsante "Annulla"
+        """
+        self.job = None
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.geometry("400x150")
+        self.window.transient(parent)
+        self.window.grab_set()
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        self.message_var = tk.StringVar(value=message)
+        ttk.Label(self.window, textvariable=self.message_var).pack(pady=(20, 10))
+
+        if maximum:
+            self.progressbar = ttk.Progressbar(self.window, mode='determinate', length=350, maximum=maximum)
+        else:
+            self.progressbar = ttk.Progressbar(self.window, mode='indeterminate', length=350)
+            self.progressbar.start()
+        self.progressbar.pack(padx=20)
+
+        if cancellable:
+            self.cancel_button = ttk.Button(self.window, text="Annulla", command=self.cancel)
+            self.cancel_button.pack(pady=10)
+
+    def attach(self, job):
+        """Collega il lavoro da annullare con il pulsante"""
+        self.job = job
+        return job
+
+    def set_message(self, message):
+        """Aggiorna il messaggio"""
+        self.message_var.set(message)
+
+    def set_progress(self, value, message=None):
+        """Aggiorna la barra determinata ed eventualmente il messaggio"""
+        self.progressbar['value'] = value
+        if message is not None:
+            self.message_var.set(message)
+
+    def cancel(self):
+        """Annulla il lavoro collegato"""
+        if self.job is not None and not self.job.finished:
+            self.message_var.set("Annullamento in corso...")
+            if hasattr(self, 'cancel_button'):
+                self.cancel_button['state'] = 'disabled'
+            self.job.cancel()
+
+    def close(self):
+        """Chiude la finestra"""
+        try:
+            self.window.destroy()
+        except tk.TclError:
+            pass
@@ -167,14 +167,14 @@ class LoginFrame(ttk.Frame):
         try:
             # Importa il client Garmin
             from planner.garmin_client import GarminClient
-            import garth
+            from planner.sessions import SESSIONS
             
             # Logga l'inizio del tentativo di login
             logging.info(f"Tentativo di login per l'utente: {email}")
             
             try:
-                # Prova a effettuare il login
-                garth.login(email, password)
+                # Prova a effettuare il login, con una sessione garth propria dell'account
+                session = SESSIONS.login(oauth_folder, email, password)
             except Exception as auth_err:
                 logging.error(f"Errore di autenticazione: {str(auth_err)}")
                 self.controller.after(0, self._login_failed, f"Errore di autenticazione: credenziali non valide o servizio non disponibile. Dettagli: {str(auth_err)}")
@@ -183,7 +183,7 @@ class LoginFrame(ttk.Frame):
             # Salva il token se richiesto
             if self.save_creds_var.get():
                 try:
-                    garth.save(oauth_folder)
+                    session.save()
                     logging.info(f"Token OAuth salvato in {oauth_folder}")
                 except Exception as save_err:
                     logging.warning(f"Impossibile salvare il token OAuth: {str(save_err)}")
@@ -199,7 +199,7 @@ class LoginFrame(ttk.Frame):
             
             # Verifica che il client funzioni
             try:
-                _ = client.list_workouts()
+                _ = client.verify_connection()
                 logging.info("Connessione a Garmin Connect verificata con successo")
             except Exception as api_err:
                 logging.error(f"Errore nell'accesso alle API di Garmin: {str(api_err)}")
@@ -271,6 +271,13 @@ class LoginFrame(ttk.Frame):
                     os.remove(session_file)
             except Exception as e:
                 logging.warning(f"Impossibile cancellare la sessione OAuth: {str(e)}")
+
+            # Chiude la sessione garth dell'account
+            try:
+                from planner.sessions import SESSIONS
+                SESSIONS.forget(oauth_folder)
+            except ImportError:
+                pass
             
             # Aggiorna lo stato
             self.status_var.set("In attesa di login")
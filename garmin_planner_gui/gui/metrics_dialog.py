@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pannello di debug con le metriche raccolte da planner.metrics
+"""
+
+import json
+import tkinter as tk
+from tkinter import ttk
+import logging
+
+from planner import metrics
+
+# Intervallo di aggiornamento automatico (millisecondi)
+REFRESH_INTERVAL = 2000
+
+
+def format_seconds(value):
+    """Durata leggibile: microsecondi, millisecondi o secondi"""
+    if value is None:
+        return ""
+    if value < 0.001:
+        return f"{value * 1e6:.0f} µs"
+    if value < 1:
+        return f"{value * 1000:.1f} ms"
+    return f"{value:.2f} s"
+
+
+def format_number(value):
+    if value is None:
+        return ""
+    return f"{value:.0f}" if float(value).is_integer() else f"{value:.2f}"
+
+
+class MetricsDialog(tk.Toplevel):
+    """Finestra con contatori, timer e istogrammi, più lo stato del rate limiter"""
+
+    def __init__(self, parent, controller=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.title("Metriche")
+        self.geometry("900x500")
+        self.transient(parent)
+
+        self.auto_refresh = tk.BooleanVar(value=True)
+        self._after_id = None
+
+        self.init_ui()
+        self.refresh()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def init_ui(self):
+        """Inizializza l'interfaccia utente"""
+        main_frame = ttk.Frame(self, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        columns = ("kind", "count", "total", "mean", "p50", "p95", "max")
+        headings = ("Tipo", "Conteggio", "Totale", "Media", "p50", "p95", "Max")
+        self.tree = ttk.Treeview(main_frame, columns=columns, show="tree headings")
+        self.tree.heading("#0", text="Metrica")
+        self.tree.column("#0", width=320)
+        for column, heading in zip(columns, headings):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=80, anchor=tk.E)
+
+        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        button_frame = ttk.Frame(self, padding=(10, 0, 10, 10))
+        button_frame.pack(fill=tk.X)
+
+        ttk.Checkbutton(button_frame, text="Aggiornamento automatico",
+                        variable=self.auto_refresh, command=self.schedule_refresh).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Chiudi", command=self.close).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Copia JSON", command=self.copy_json).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="Azzera", command=self.reset).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Aggiorna", command=self.refresh).pack(side=tk.RIGHT, padx=5)
+
+    def snapshot(self):
+        """Metriche correnti più lo stato del rate limiter del client connesso"""
+        data = metrics.snapshot()
+        client = getattr(self.controller, 'garmin_client', None)
+        if client is not None and hasattr(client, 'rate_limit_state'):
+            data['rate_limit'] = client.rate_limit_state()
+        return data
+
+    def refresh(self):
+        """Ridisegna la tabella con le metriche correnti"""
+        data = self.snapshot()
+        open_groups = {item for item in self.tree.get_children() if self.tree.item(item, "open")}
+        self.tree.delete(*self.tree.get_children())
+
+        timers = self.tree.insert("", tk.END, "timers", text="Timer", open=True)
+        for name, summary in data['timers'].items():
+            self.tree.insert(timers, tk.END, text=name, values=(
+                "timer", summary['count'], format_seconds(summary['total']), format_seconds(summary['mean']),
+                format_seconds(summary['p50']), format_seconds(summary['p95']), format_seconds(summary['max'])))
+
+        counters = self.tree.insert("", tk.END, "counters", text="Contatori", open=True)
+        for name, value in data['counters'].items():
+            self.tree.insert(counters, tk.END, text=name, values=("contatore", value))
+
+        histograms = self.tree.insert("", tk.END, "histograms", text="Istogrammi", open=True)
+        for name, summary in data['histograms'].items():
+            self.tree.insert(histograms, tk.END, text=name, values=(
+                "istogramma", summary['count'], format_number(summary['total']), format_number(summary['mean']),
+                format_number(summary['p50']), format_number(summary['p95']), format_number(summary['max'])))
+
+        limiter = (data.get('rate_limit') or {}).get('limiter')
+        if limiter:
+            group = self.tree.insert("", tk.END, "rate_limit", text="Rate limiter", open="rate_limit" in open_groups)
+            buckets = dict(limiter['endpoints'], totale=limiter['total'])
+            for name, state in buckets.items():
+                self.tree.insert(group, tk.END, text=f"{name} ({state['rate']:.1f}/{state['base_rate']:.1f} req/s)",
+                                 values=("bucket", state['acquired'], format_seconds(state['waited']), "",
+                                         "", "", f"429: {state['throttled']}"))
+
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        """Programma il prossimo aggiornamento automatico"""
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        if self.auto_refresh.get():
+            self._after_id = self.after(REFRESH_INTERVAL, self.refresh)
+
+    def reset(self):
+        """Azzera le metriche"""
+        metrics.reset()
+        logging.info("Metriche azzerate")
+        self.refresh()
+
+    def copy_json(self):
+        """Copia negli appunti le metriche in formato JSON"""
+        self.clipboard_clear()
+        self.clipboard_append(json.dumps(self.snapshot(), indent=2, default=str))
+
+    def close(self):
+        """Chiude la finestra"""
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self.destroy()
@@ -118,6 +118,10 @@ class SettingsFrame(ttk.Frame):
                              padding=10, justify=tk.LEFT)
         info_label.pack(fill=tk.BOTH, expand=True)
         
+        metrics_button = ttk.Button(info_frame, text="Metriche (F12)...", 
+                                  command=self.controller.show_metrics)
+        metrics_button.pack(anchor=tk.W, padx=10, pady=(0, 10))
+        
         # Pulsanti per salvare/annullare
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=(10, 0))
@@ -12,7 +12,6 @@ from tkinter import messagebox
 import logging
 import re
 import datetime
-import yaml
 
 # Costanti
 CONFIG_DIR = os.path.expanduser("~/.garmin_planner")
@@ -444,8 +443,8 @@ def parse_workout_name(name):
 def load_yaml_file(file_path):
     """Carica un file YAML"""
     try:
-        with open(file_path, 'r') as f:
-            return yaml.safe_load(f)
+        from planner.plan_io import load_plan
+        return load_plan(file_path)
     except Exception as e:
         logging.error(f"Errore nel caricamento del file YAML: {str(e)}")
         return None
@@ -453,8 +452,8 @@ def load_yaml_file(file_path):
 def save_yaml_file(data, file_path):
     """Salva dati in un file YAML"""
     try:
-        with open(file_path, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False)
+        from planner.plan_io import dump_plan
+        dump_plan(data, file_path, sort_keys=True)
         return True
     except Exception as e:
         logging.error(f"Errore nel salvataggio del file YAML: {str(e)}")
@@ -18,6 +18,8 @@ from .styles import COLORS, STEP_ICONS, SPORT_ICONS
 from .workout_step_dialog import StepDialog
 from .repeat_dialog import RepeatDialog
 from .workout_config_dialog import WorkoutConfigDialog
+from .jobs import JobQueue, JobProgressWindow
+from planner import metrics
 from garmin_planner_gui.gui.utils import (
     show_error, show_warning, show_info, ask_yes_no,
     format_workout_name, parse_workout_name
@@ -34,6 +36,9 @@ class WorkoutEditorFrame(ttk.Frame):
         self.garmin_client = None
         self.workouts = []  # Lista degli allenamenti in memoria
         
+        # Coda delle operazioni di rete eseguite in background
+        self.jobs = JobQueue(self)
+        
         # Carica la configurazione degli allenamenti
         self.workout_config = self.controller.config.get('workout_config', {})
         
@@ -1004,6 +1009,7 @@ class WorkoutEditorFrame(ttk.Frame):
             self.clear_editor()
             self.disable_editor()
     
+    @metrics.timed("gui.editor.refresh_list")
     def refresh_workout_list(self):
         """Aggiorna la lista degli allenamenti"""
         # Salva la selezione corrente
@@ -1149,7 +1155,7 @@ class WorkoutEditorFrame(ttk.Frame):
         # Crea un dialog personalizzato
         sync_dialog = tk.Toplevel(self)
         sync_dialog.title("Sincronizza con Garmin Connect")
-        sync_dialog.geometry("400x350")  # Aumentato l'altezza per la nuova opzione
+        sync_dialog.geometry("400x390")  # Aumentato l'altezza per la nuova opzione
         sync_dialog.transient(self)
         sync_dialog.grab_set()
         
@@ -1158,7 +1164,10 @@ class WorkoutEditorFrame(ttk.Frame):
                  style="Heading.TLabel").pack(pady=(10, 20))
         
         # Opzioni
-        sync_var = tk.IntVar(value=1)
+        sync_var = tk.IntVar(value=5)
+        ttk.Radiobutton(sync_dialog, text="Allinea Garmin Connect al piano (solo le differenze)", 
+                       variable=sync_var, value=5).pack(anchor=tk.W, padx=20, pady=5)
+        
         ttk.Radiobutton(sync_dialog, text="Carica tutti gli allenamenti su Garmin Connect", 
                        variable=sync_var, value=1).pack(anchor=tk.W, padx=20, pady=5)
         
@@ -1225,6 +1234,9 @@ class WorkoutEditorFrame(ttk.Frame):
         elif result["action"] == 4:
             # NUOVO: Rimuovi date dagli allenamenti selezionati
             self.clear_workout_dates()
+        elif result["action"] == 5:
+            # Invia solo le differenze tra il piano e Garmin Connect
+            self.sync_differences()
 
         
     def upload_all_workouts(self, replace=False):
@@ -1239,138 +1251,7 @@ class WorkoutEditorFrame(ttk.Frame):
                         parent=self):
             return
         
-        # Ottieni la lista degli allenamenti esistenti su Garmin Connect
-        try:
-            existing_workouts = self.garmin_client.list_workouts()
-        except Exception as e:
-            show_error("Errore", f"Impossibile ottenere la lista degli allenamenti: {str(e)}", parent=self)
-            return
-        
-        # Crea un dizionario nome -> id per gli allenamenti esistenti
-        existing_map = {}
-        for workout in existing_workouts:
-            existing_map[workout["workoutName"]] = workout["workoutId"]
-        
-        # Converti e carica gli allenamenti
-        from planner.workout import Workout
-        
-        # Conta i successi/errori
-        success_count = 0
-        error_count = 0
-        scheduled_count = 0
-        
-        # Crea una finestra di progresso
-        progress_window = tk.Toplevel(self)
-        progress_window.title("Caricamento in corso")
-        progress_window.geometry("400x170")
-        progress_window.transient(self)
-        progress_window.grab_set()
-        
-        # Label per lo stato
-        status_var = tk.StringVar(value="Caricamento in corso...")
-        status_label = ttk.Label(progress_window, textvariable=status_var)
-        status_label.pack(pady=(20, 10))
-        
-        # Barra di progresso
-        progress = ttk.Progressbar(progress_window, mode='determinate', length=350, maximum=len(self.workouts))
-        progress.pack(pady=10)
-        
-        # Label per il messaggio di pianificazione
-        schedule_status_var = tk.StringVar(value="")
-        schedule_label = ttk.Label(progress_window, textvariable=schedule_status_var)
-        schedule_label.pack(pady=5)
-        
-        # Aggiorna la finestra
-        progress_window.update()
-        
-        for i, (name, steps) in enumerate(self.workouts):
-            try:
-                # Aggiorna lo stato
-                status_var.set(f"Caricamento {i+1}/{len(self.workouts)}: {name}")
-                progress['value'] = i
-                progress_window.update()
-                
-                # Estrai il tipo di sport dagli step
-                sport_type = "running"  # Default
-                workout_date = None
-                
-                # Estrai metadati e passi effettivi
-                actual_steps = []
-                
-                for step in steps:
-                    if isinstance(step, dict):
-                        if 'sport_type' in step:
-                            sport_type = step['sport_type']
-                        elif 'date' in step:
-                            workout_date = step['date']
-                        else:
-                            actual_steps.append(step)
-                
-                # Verifica se il tipo di sport è supportato
-                from planner.workout import SPORT_TYPES
-                if sport_type not in SPORT_TYPES:
-                    logging.error(f"Tipo di sport '{sport_type}' non supportato")
-                    error_count += 1
-                    continue
-                
-                # Crea il workout
-                workout = Workout(sport_type, name)
-                
-                # Converti i passi
-                self.convert_steps_to_workout(workout, actual_steps)
-                
-                # ID dell'allenamento su Garmin (sarà impostato dopo il caricamento)
-                workout_id = None
-                
-                # Carica o aggiorna l'allenamento
-                if name in existing_map and replace:
-                    # Aggiorna l'allenamento esistente
-                    workout_id = existing_map[name]
-                    self.garmin_client.update_workout(workout_id, workout)
-                else:
-                    # Crea un nuovo allenamento
-                    response = self.garmin_client.add_workout(workout)
-                    # Estrai l'ID dal nuovo allenamento creato
-                    if response and "workoutId" in response:
-                        workout_id = response["workoutId"]
-                
-                # Pianifica l'allenamento se è stata specificata una data
-                if workout_date and workout_id:
-                    try:
-                        schedule_status_var.set(f"Pianificazione di '{name}' per il {workout_date}...")
-                        progress_window.update()
-                        
-                        # Pianifica l'allenamento
-                        self.garmin_client.schedule_workout(workout_id, workout_date)
-                        scheduled_count += 1
-                        
-                        schedule_status_var.set(f"Pianificato '{name}' per il {workout_date}")
-                        progress_window.update()
-                    except Exception as sch_err:
-                        logging.error(f"Errore nella pianificazione dell'allenamento '{name}': {str(sch_err)}")
-                        schedule_status_var.set(f"Errore nella pianificazione di '{name}'")
-                        progress_window.update()
-                
-                success_count += 1
-                
-            except Exception as e:
-                logging.error(f"Errore nel caricamento dell'allenamento '{name}': {str(e)}")
-                error_count += 1
-        
-        # Chiudi la finestra di progresso
-        progress_window.destroy()
-        
-        # Mostra il risultato
-        result_msg = f"Caricati {success_count} allenamenti su Garmin Connect."
-        if scheduled_count > 0:
-            result_msg += f"\nPianificati {scheduled_count} allenamenti nelle date specificate."
-        
-        if error_count == 0:
-            show_info("Completato", result_msg, parent=self)
-        else:
-            show_warning("Completato con errori", 
-                       f"{result_msg}\nSi sono verificati {error_count} errori. Controlla il log per i dettagli.", 
-                       parent=self)
+        self.upload_workouts(list(self.workouts), replace)
     
     def upload_selected_workout(self, replace=False):
         """Carica l'allenamento selezionato su Garmin Connect"""
@@ -1402,56 +1283,130 @@ class WorkoutEditorFrame(ttk.Frame):
         if not ask_yes_no("Conferma", msg, parent=self):
             return
         
-        # Ottieni la lista degli allenamenti esistenti su Garmin Connect
-        try:
-            existing_workouts = self.garmin_client.list_workouts()
-        except Exception as e:
-            show_error("Errore", f"Impossibile ottenere la lista degli allenamenti: {str(e)}", parent=self)
+        self.upload_workouts([self.workouts[index] for index in indices], replace)
+    
+    def upload_workouts(self, entries, replace=False):
+        """
+        Carica una lista di allenamenti (nome, passi) su Garmin Connect.
+        
+        Il caricamento e la pianificazione avvengono in parallelo tramite
+        GarminClient.add_workouts in un lavoro in background; la finestra di progresso
+        viene aggiornata dalle callback del client e permette di annullare il caricamento.
+        """
+        # Verifica subito che tutte le zone usate siano definite nella configurazione
+        if not self.check_zones(entries):
             return
         
-        # Crea un dizionario nome -> id per gli allenamenti esistenti
-        existing_map = {}
-        for workout in existing_workouts:
-            existing_map[workout["workoutName"]] = workout["workoutId"]
-        
-        # Crea una finestra di progresso
-        progress_window = tk.Toplevel(self)
-        progress_window.title("Caricamento in corso")
-        progress_window.geometry("400x170")
-        progress_window.transient(self)
-        progress_window.grab_set()
-        
-        # Label per lo stato
-        status_var = tk.StringVar(value="Caricamento in corso...")
-        status_label = ttk.Label(progress_window, textvariable=status_var)
-        status_label.pack(pady=(20, 10))
-        
-        # Barra di progresso
-        progress = ttk.Progressbar(progress_window, mode='determinate', length=350, maximum=len(indices))
-        progress.pack(pady=10)
-        
-        # Label per il messaggio di pianificazione
-        schedule_status_var = tk.StringVar(value="")
-        schedule_label = ttk.Label(progress_window, textvariable=schedule_status_var)
-        schedule_label.pack(pady=5)
-        
-        # Aggiorna la finestra
-        progress_window.update()
-        
-        # Conta successi/errori
-        success_count = 0
-        error_count = 0
-        scheduled_count = 0
+        workouts, dates, error_count = self.build_workouts(entries)
+        
+        client = self.garmin_client
+        
+        # Finestra di progresso con pulsante di annullamento
+        progress = JobProgressWindow(self, "Caricamento in corso", "Caricamento in corso...",
+                                     maximum=max(len(workouts), 1))
+        
+        def update_progress(completed, total, result):
+            message = f"Caricati {completed}/{total}: {result['name']}"
+            if result['skipped']:
+                message += " (invariato)"
+            if result['scheduled']:
+                message += f"\nPianificato per il {result['date']}"
+            elif result['schedule_error']:
+                message += "\nErrore nella pianificazione"
+            progress.set_progress(completed, message)
+        
+        def upload(job):
+            # Eseguita in background: nessun accesso ai widget
+            existing_workouts = client.list_workouts()
+            job.check()
+            
+            # Allenamenti da aggiornare invece di creare
+            replace_ids = {}
+            if replace:
+                existing_map = {workout["workoutName"]: workout["workoutId"] for workout in existing_workouts}
+                replace_ids = {workout.workout_name: existing_map[workout.workout_name]
+                               for workout in workouts if workout.workout_name in existing_map}
+            
+            # Gli allenamenti invariati dall'ultimo caricamento non vengono inviati di nuovo
+            return client.add_workouts(
+                workouts,
+                dates=dates,
+                replace_ids=replace_ids,
+                progress_callback=job.progress,
+                skip_unchanged=True
+            )
         
-        # Per ogni allenamento selezionato
-        for idx, index in enumerate(indices):
-            name, steps = self.workouts[index]
-            
-            # Aggiorna lo stato
-            status_var.set(f"Caricamento {idx+1}/{len(indices)}: {name}")
-            progress['value'] = idx
-            progress_window.update()
+        def upload_finished(results):
+            skipped_count = sum(1 for result in results if result['skipped'])
+            success_count = sum(1 for result in results if not result['error'] and not result['skipped'])
+            scheduled_count = sum(1 for result in results if result['scheduled'])
+            failed_count = error_count + sum(1 for result in results if result['error'])
             
+            # Mostra il risultato
+            result_msg = f"Caricati {success_count} allenamenti su Garmin Connect."
+            if skipped_count > 0:
+                result_msg += f"\n{skipped_count} allenamenti invariati non sono stati ricaricati."
+            if scheduled_count > 0:
+                result_msg += f"\nPianificati {scheduled_count} allenamenti nelle date specificate."
+            
+            if failed_count == 0:
+                show_info("Completato", result_msg, parent=self)
+            else:
+                show_warning("Completato con errori", 
+                           f"{result_msg}\nSi sono verificati {failed_count} errori. Controlla il log per i dettagli.", 
+                           parent=self)
+        
+        def upload_failed(error):
+            show_error("Errore", f"Impossibile caricare gli allenamenti: {str(error)}", parent=self)
+        
+        def upload_cancelled():
+            show_warning("Caricamento annullato",
+                         "Il caricamento è stato annullato: gli allenamenti già inviati restano su Garmin Connect.",
+                         parent=self)
+        
+        progress.attach(self.jobs.submit(
+            upload, name="upload_workouts",
+            on_done=upload_finished,
+            on_error=upload_failed,
+            on_progress=update_progress,
+            on_cancel=upload_cancelled,
+            on_finally=progress.close))
+    
+    def check_zones(self, entries):
+        """
+        Verifica che tutte le zone usate dagli allenamenti (nome, passi) siano definite
+        nella configurazione; in caso contrario mostra l'elenco dei problemi.
+        
+        Returns:
+            bool: True se tutte le zone sono risolvibili
+        """
+        zones = self.zone_table()
+        problems = []
+        for name, steps in entries:
+            sport_type = next((step['sport_type'] for step in steps
+                               if isinstance(step, dict) and 'sport_type' in step), "running")
+            problems.extend(f"{name}: {problem}" for problem in zones.unresolved_references(steps, sport_type))
+        if problems:
+            show_error("Zone non definite",
+                       "Correggi la configurazione delle zone prima del caricamento:\n\n" + "\n".join(problems),
+                       parent=self)
+            return False
+        return True
+    
+    def build_workouts(self, entries):
+        """
+        Converte gli allenamenti (nome, passi) dell'editor in oggetti Workout.
+        
+        Returns:
+            tuple: (lista di Workout, lista delle date, numero di allenamenti non convertibili)
+        """
+        from planner.workout import Workout, SPORT_TYPES
+        
+        workouts = []
+        dates = []
+        error_count = 0
+        
+        for name, steps in entries:
             try:
                 # Estrai il tipo di sport dagli step
                 sport_type = "running"  # Default
@@ -1470,71 +1425,178 @@ class WorkoutEditorFrame(ttk.Frame):
                             actual_steps.append(step)
                 
                 # Verifica se il tipo di sport è supportato
-                from planner.workout import SPORT_TYPES
                 if sport_type not in SPORT_TYPES:
                     logging.error(f"Tipo di sport '{sport_type}' non supportato")
                     error_count += 1
                     continue
                 
-                # Crea il workout
-                from planner.workout import Workout
+                # Crea il workout e converti i passi
                 workout = Workout(sport_type, name)
-                
-                # Converti i passi
                 self.convert_steps_to_workout(workout, actual_steps)
                 
-                # ID dell'allenamento su Garmin (sarà impostato dopo il caricamento)
-                workout_id = None
-                
-                # Carica o aggiorna l'allenamento
-                if name in existing_map and replace:
-                    # Aggiorna l'allenamento esistente
-                    workout_id = existing_map[name]
-                    self.garmin_client.update_workout(workout_id, workout)
-                else:
-                    # Crea un nuovo allenamento
-                    response = self.garmin_client.add_workout(workout)
-                    # Estrai l'ID dal nuovo allenamento creato
-                    if response and "workoutId" in response:
-                        workout_id = response["workoutId"]
-                
-                # Pianifica l'allenamento se è stata specificata una data
-                if workout_date and workout_id:
-                    try:
-                        schedule_status_var.set(f"Pianificazione di '{name}' per il {workout_date}...")
-                        progress_window.update()
-                        
-                        # Pianifica l'allenamento
-                        self.garmin_client.schedule_workout(workout_id, workout_date)
-                        scheduled_count += 1
-                        
-                        schedule_status_var.set(f"Pianificato '{name}' per il {workout_date}")
-                        progress_window.update()
-                    except Exception as sch_err:
-                        logging.error(f"Errore nella pianificazione dell'allenamento '{name}': {str(sch_err)}")
-                        schedule_status_var.set(f"Errore nella pianificazione di '{name}'")
-                        progress_window.update()
-                
-                success_count += 1
-                
+                workouts.append(workout)
+                dates.append(workout_date)
+            
             except Exception as e:
-                logging.error(f"Errore nel caricamento dell'allenamento '{name}': {str(e)}")
+                logging.error(f"Errore nella conversione dell'allenamento '{name}': {str(e)}")
                 error_count += 1
         
-        # Chiudi la finestra di progresso
-        progress_window.destroy()
+        return workouts, dates, error_count
+    
+    def sync_differences(self):
+        """
+        Allinea Garmin Connect al piano inviando solo le differenze.
+        
+        Le differenze vengono calcolate in background con planner.plan_diff e mostrate
+        per conferma; solo dopo vengono inviate le richieste necessarie (creazione,
+        aggiornamento, eliminazione e pianificazione degli allenamenti cambiati).
+        """
+        if not self.workouts:
+            show_info("Informazione", "Nessun allenamento da sincronizzare", parent=self)
+            return
+        
+        entries = list(self.workouts)
+        if not self.check_zones(entries):
+            return
         
-        # Mostra il risultato
-        result_msg = f"Caricati {success_count} allenamenti su Garmin Connect."
-        if scheduled_count > 0:
-            result_msg += f"\nPianificati {scheduled_count} allenamenti nelle date specificate."
+        workouts, dates, error_count = self.build_workouts(entries)
+        client = self.garmin_client
         
-        if error_count == 0:
-            show_info("Completato", result_msg, parent=self)
-        else:
-            show_warning("Completato con errori", 
-                       f"{result_msg}\nSi sono verificati {error_count} errori. Controlla il log per i dettagli.", 
-                       parent=self)
+        # Solo gli allenamenti caricati in precedenza dal planner possono risultare rimossi
+        managed_names = set(client.cache.get_uploads()) if client.cache else set()
+        
+        progress = JobProgressWindow(self, "Confronto in corso",
+                                     "Confronto del piano con Garmin Connect...")
+        
+        def update_progress(completed, total, result):
+            progress.set_message(f"Dettagli scaricati {completed}/{total}")
+        
+        def compare(job):
+            from planner.plan_diff import compute_diff
+            
+            return compute_diff(client, workouts, dates, managed_names=managed_names,
+                                progress_callback=job.progress)
+        
+        def compare_finished(diff):
+            if error_count:
+                show_warning("Attenzione",
+                             f"{error_count} allenamenti non sono convertibili e sono esclusi dal confronto. "
+                             "Controlla il log per i dettagli.", parent=self)
+            if diff.is_empty(delete_removed=True):
+                show_info("Sincronizzazione", 
+                          f"Garmin Connect è già allineato al piano ({diff.unchanged} allenamenti invariati).",
+                          parent=self)
+                return
+            
+            delete_removed = self.confirm_plan_diff(diff)
+            if delete_removed is not None:
+                self.apply_plan_diff(diff, delete_removed)
+        
+        def compare_failed(error):
+            show_error("Errore", f"Impossibile confrontare il piano con Garmin Connect: {str(error)}", parent=self)
+        
+        progress.attach(self.jobs.submit(
+            compare, name="plan_diff",
+            on_done=compare_finished,
+            on_error=compare_failed,
+            on_progress=update_progress,
+            on_finally=progress.close))
+    
+    def confirm_plan_diff(self, diff):
+        """
+        Mostra le differenze tra il piano e Garmin Connect e chiede conferma.
+        
+        Returns:
+            bool: Se eliminare gli allenamenti rimossi dal piano, oppure None se l'utente annulla
+        """
+        summary = diff.summary()
+        
+        dialog = tk.Toplevel(self)
+        dialog.title("Differenze con Garmin Connect")
+        dialog.geometry("700x500")
+        dialog.transient(self)
+        dialog.grab_set()
+        
+        ttk.Label(dialog, text=(f"Nuovi: {summary['added']}   Modificati: {summary['modified']}   "
+                                f"Ripianificati: {summary['rescheduled']}   Rimossi: {summary['removed']}   "
+                                f"Invariati: {summary['unchanged']}"),
+                  style="Heading.TLabel").pack(anchor=tk.W, padx=10, pady=10)
+        
+        text_frame = ttk.Frame(dialog)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        text = tk.Text(text_frame, wrap=tk.NONE, height=20)
+        scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        text.insert(tk.END, diff.describe())
+        text.configure(state=tk.DISABLED)
+        text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        delete_var = tk.BooleanVar(value=False)
+        if diff.removed:
+            ttk.Checkbutton(dialog, text="Elimina da Garmin Connect gli allenamenti rimossi dal piano",
+                            variable=delete_var).pack(anchor=tk.W, padx=10, pady=(10, 0))
+        
+        result = {"confirmed": False}
+        
+        def on_apply():
+            result["confirmed"] = True
+            dialog.destroy()
+        
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(button_frame, text="Applica", command=on_apply).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Annulla", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+        
+        self.wait_window(dialog)
+        
+        if not result["confirmed"]:
+            return None
+        return delete_var.get()
+    
+    def apply_plan_diff(self, diff, delete_removed=False):
+        """Invia a Garmin Connect le richieste necessarie per applicare le differenze"""
+        client = self.garmin_client
+        changes = len([change for change in diff.changes if change.operations(delete_removed)])
+        
+        progress = JobProgressWindow(self, "Sincronizzazione in corso", "Sincronizzazione in corso...",
+                                     maximum=max(changes, 1))
+        
+        def update_progress(completed, total, result):
+            progress.set_progress(completed, f"Sincronizzati {completed}/{total}: {result['name']}")
+        
+        def apply(job):
+            from planner.plan_diff import apply_diff
+            
+            return apply_diff(client, diff, delete_removed=delete_removed, progress_callback=job.progress)
+        
+        def apply_finished(results):
+            requests = sum(result['requests'] for result in results)
+            failed_count = sum(1 for result in results if result['error'])
+            result_msg = f"Sincronizzati {len(results) - failed_count} allenamenti con {requests} richieste."
+            
+            if failed_count == 0:
+                show_info("Completato", result_msg, parent=self)
+            else:
+                show_warning("Completato con errori", 
+                           f"{result_msg}\nSi sono verificati {failed_count} errori. Controlla il log per i dettagli.", 
+                           parent=self)
+        
+        def apply_failed(error):
+            show_error("Errore", f"Impossibile sincronizzare gli allenamenti: {str(error)}", parent=self)
+        
+        def apply_cancelled():
+            show_warning("Sincronizzazione annullata",
+                         "La sincronizzazione è stata annullata: le modifiche già inviate restano su Garmin Connect.",
+                         parent=self)
+        
+        progress.attach(self.jobs.submit(
+            apply, name="apply_plan_diff",
+            on_done=apply_finished,
+            on_error=apply_failed,
+            on_progress=update_progress,
+            on_cancel=apply_cancelled,
+            on_finally=progress.close))
 
     
     def convert_steps_to_workout(self, workout, steps):
@@ -1564,7 +1626,7 @@ class WorkoutEditorFrame(ttk.Frame):
                             substep_detail = substep[substep_type]
                             
                             # Estrai il target se presente
-                            target = self.extract_target(substep_detail)
+                            target = self.extract_target(substep_detail, workout.sport_type)
                             
                             # Estrai la condizione di fine
                             end_condition, end_value = self.extract_end_condition(substep_detail)
@@ -1594,7 +1656,7 @@ class WorkoutEditorFrame(ttk.Frame):
                     step_detail = step[step_type]
                     
                     # Estrai il target se presente
-                    target = self.extract_target(step_detail)
+                    target = self.extract_target(step_detail, workout.sport_type)
                     
                     # Estrai la condizione di fine
                     end_condition, end_value = self.extract_end_condition(step_detail)
@@ -1617,461 +1679,53 @@ class WorkoutEditorFrame(ttk.Frame):
         
         return workout
     
-    def extract_target(self, step_detail):
-        """Estrae il target dal dettaglio di uno step"""
-        from planner.workout import Target
+    def extract_target(self, step_detail, sport_type="running"):
+        """
+        Estrae il target dal dettaglio di uno step
+        
+        Raises:
+            ZoneResolutionError: Se il target fa riferimento a una zona non definita
+        """
+        from planner.step_grammar import parse_step_detail
         
         # Se non c'è un dettaglio o è vuoto, nessun target
         if not step_detail:
             return None
         
-        try:
-            # Pattern per '@' o '@spd' o '@hr' o '@pwr'
-            if ' @ ' in step_detail:
-                # Estrai la zona dopo '@'
-                parts = step_detail.split(' @ ', 1)
-                if len(parts) < 2:
-                    return None
-                    
-                zone_part = parts[1]
-                zone = zone_part.split(' -- ')[0].strip() if ' -- ' in zone_part else zone_part.strip()
-                
-                # Importa pace_to_ms in modo sicuro
-                try:
-                    from planner.utils import pace_to_ms
-                except ImportError:
-                    logging.error("Impossibile importare pace_to_ms da planner.utils")
-                    return Target('pace.zone', 2.5, 3.0)  # Valori di default
-                
-                # Verifica se è una zona definita o un valore diretto
-                paces_dict = self.workout_config.get('paces', {})
-                if zone in paces_dict:
-                    pace_value = paces_dict[zone]
-                    
-                    # Gestisci diversi formati di ritmo
-                    if '-' in pace_value:
-                        # Formato intervallo (es. "4:30-5:00")
-                        pace_parts = pace_value.split('-')
-                        if len(pace_parts) == 2:
-                            try:
-                                slow_pace = pace_to_ms(pace_parts[0])
-                                fast_pace = pace_to_ms(pace_parts[1])
-                                return Target('pace.zone', fast_pace, slow_pace)
-                            except Exception as e:
-                                logging.warning(f"Errore nella conversione del ritmo '{pace_value}': {str(e)}")
-                        
-                    # Formato singolo valore
-                    try:
-                        pace_ms = pace_to_ms(pace_value)
-                        # Aggiungi margini del 10%
-                        return Target('pace.zone', pace_ms * 0.9, pace_ms * 1.1)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione del ritmo '{pace_value}': {str(e)}")
-                        
-                # Prova come valore diretto
-                elif re.match(r'^\d{1,2}:\d{2}$', zone):
-                    try:
-                        pace_ms = pace_to_ms(zone)
-                        return Target('pace.zone', pace_ms * 0.9, pace_ms * 1.1)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione del ritmo diretto '{zone}': {str(e)}")
-                
-                # Zona numerica (es. Z1, Z2, etc)
-                elif re.match(r'^Z\d+$', zone):
-                    try:
-                        zone_num = int(zone[1:])
-                        # Valori tipici per le zone
-                        pace_ranges = {
-                            1: (3.0, 3.5),  # Zona 1: ritmo lento
-                            2: (3.2, 3.7),  # Zona 2: ritmo medio
-                            3: (3.5, 4.0),  # Zona 3: ritmo moderato
-                            4: (3.8, 4.3),  # Zona 4: ritmo veloce
-                            5: (4.2, 4.7)   # Zona 5: ritmo molto veloce
-                        }
-                        
-                        zone_range = pace_ranges.get(zone_num, (2.5, 3.0))
-                        return Target('pace.zone', zone_range[0], zone_range[1])
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della zona '{zone}': {str(e)}")
-                
-                # Valore di default se nessuna conversione è riuscita
-                return Target('pace.zone', 2.5, 3.0)
-            
-            # Velocità (ciclismo vecchio stile)
-            elif ' @spd ' in step_detail:
-                # Estrai la zona dopo '@spd'
-                parts = step_detail.split(' @spd ', 1)
-                if len(parts) < 2:
-                    return None
-                    
-                zone_part = parts[1]
-                zone = zone_part.split(' -- ')[0].strip() if ' -- ' in zone_part else zone_part.strip()
-                
-                # Verifica se è una zona definita
-                speeds_dict = self.workout_config.get('speeds', {})
-                if zone in speeds_dict:
-                    speed_value = speeds_dict[zone]
-                    
-                    # Gestisci diversi formati di velocità
-                    if '-' in str(speed_value):
-                        # Formato intervallo (es. "23.0-27.0")
-                        speed_parts = str(speed_value).split('-')
-                        if len(speed_parts) == 2:
-                            try:
-                                low_speed = float(speed_parts[0]) / 3.6  # km/h to m/s
-                                high_speed = float(speed_parts[1]) / 3.6  # km/h to m/s
-                                return Target('speed.zone', low_speed, high_speed)
-                            except Exception as e:
-                                logging.warning(f"Errore nella conversione della velocità '{speed_value}': {str(e)}")
-                    
-                    # Formato singolo valore
-                    try:
-                        speed_ms = float(speed_value) / 3.6  # km/h to m/s
-                        # Aggiungi margini del 10%
-                        return Target('speed.zone', speed_ms * 0.9, speed_ms * 1.1)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della velocità '{speed_value}': {str(e)}")
-                
-                # Prova come valore diretto
-                elif re.match(r'^\d+(\.\d+)?$', zone):
-                    try:
-                        speed_ms = float(zone) / 3.6  # km/h to m/s
-                        return Target('speed.zone', speed_ms * 0.9, speed_ms * 1.1)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della velocità diretta '{zone}': {str(e)}")
-                
-                # Zona numerica (es. Z1, Z2, etc)
-                elif re.match(r'^Z\d+$', zone):
-                    try:
-                        zone_num = int(zone[1:])
-                        # Valori tipici per le zone
-                        speed_ranges = {
-                            1: (3.0, 4.0),  # Zona 1: velocità bassa
-                            2: (4.0, 5.0),  # Zona 2: velocità media-bassa
-                            3: (5.0, 6.0),  # Zona 3: velocità media
-                            4: (6.0, 7.0),  # Zona 4: velocità alta
-                            5: (7.0, 8.0)   # Zona 5: velocità molto alta
-                        }
-                        
-                        zone_range = speed_ranges.get(zone_num, (5.0, 6.0))
-                        return Target('speed.zone', zone_range[0], zone_range[1])
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della zona '{zone}': {str(e)}")
-                
-                # Valore di default per velocità
-                return Target('speed.zone', 5.0, 6.0)
-            
-            # Potenza (ciclismo nuovo stile)
-            elif ' @pwr ' in step_detail:
-                # Estrai la zona dopo '@pwr'
-                parts = step_detail.split(' @pwr ', 1)
-                if len(parts) < 2:
-                    return None
-                    
-                zone_part = parts[1]
-                zone = zone_part.split(' -- ')[0].strip() if ' -- ' in zone_part else zone_part.strip()
-                
-                # Verifica se è una zona definita
-                power_values = self.workout_config.get('power_values', {})
-                if zone in power_values and zone != 'ftp':
-                    power_value = power_values[zone]
-                    
-                    # Gestisci diversi formati di potenza
-                    if '-' in str(power_value):
-                        # Formato intervallo (es. "230-270")
-                        power_parts = str(power_value).split('-')
-                        if len(power_parts) == 2:
-                            try:
-                                low_power = float(power_parts[0])
-                                high_power = float(power_parts[1])
-                                return Target('power.zone', low_power, high_power)
-                            except Exception as e:
-                                logging.warning(f"Errore nella conversione della potenza '{power_value}': {str(e)}")
-                    
-                    # Formato singolo valore
-                    try:
-                        power = float(power_value)
-                        # Aggiungi margini del 5%
-                        return Target('power.zone', power * 0.95, power * 1.05)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della potenza '{power_value}': {str(e)}")
-                
-                # Controlla se è una percentuale dell'FTP
-                if '%' in zone:
-                    # Formato percentuale singola (es. "75%")
-                    match = re.match(r'^(\d+)%$', zone)
-                    if match:
-                        try:
-                            percent = int(match.group(1))
-                            
-                            # Ottieni l'FTP dalla configurazione
-                            ftp = self.workout_config.get('power_values', {}).get('ftp', 250)
-                            
-                            # Calcola il valore di potenza
-                            power = int((percent / 100) * ftp)
-                            
-                            # Aggiungi margini del 5%
-                            low_power = int(power * 0.95)
-                            high_power = int(power * 1.05)
-                            
-                            logging.info(f"Convertito {zone} in {low_power}-{high_power} W (FTP: {ftp})")
-                            return Target('power.zone', low_power, high_power)
-                        except Exception as e:
-                            logging.warning(f"Errore nella conversione della percentuale FTP '{zone}': {str(e)}")
-                    
-                    # Formato intervallo percentuale (es. "75-85%")
-                    match = re.match(r'^(\d+)-(\d+)%$', zone)
-                    if match:
-                        try:
-                            low_percent = int(match.group(1))
-                            high_percent = int(match.group(2))
-                            
-                            # Ottieni l'FTP dalla configurazione
-                            ftp = self.workout_config.get('power_values', {}).get('ftp', 250)
-                            
-                            # Calcola i valori di potenza
-                            low_power = int((low_percent / 100) * ftp)
-                            high_power = int((high_percent / 100) * ftp)
-                            
-                            logging.info(f"Convertito {zone} in {low_power}-{high_power} W (FTP: {ftp})")
-                            return Target('power.zone', low_power, high_power)
-                        except Exception as e:
-                            logging.warning(f"Errore nella conversione dell'intervallo percentuale FTP '{zone}': {str(e)}")
-                
-                # Prova come valore diretto
-                if re.match(r'^\d+$', zone):
-                    try:
-                        power = float(zone)
-                        return Target('power.zone', power * 0.95, power * 1.05)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della potenza diretta '{zone}': {str(e)}")
-                
-                # Prova come intervallo diretto
-                if re.match(r'^\d+-\d+$', zone):
-                    try:
-                        power_parts = zone.split('-')
-                        low_power = float(power_parts[0])
-                        high_power = float(power_parts[1])
-                        return Target('power.zone', low_power, high_power)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione dell'intervallo di potenza '{zone}': {str(e)}")
-                
-                # Valore di default per potenza
-                return Target('power.zone', 200, 250)
-            
-            # Frequenza cardiaca
-            elif ' @hr ' in step_detail:
-                # Estrai la zona dopo '@hr'
-                parts = step_detail.split(' @hr ', 1)
-                if len(parts) < 2:
-                    return None
-                    
-                zone_part = parts[1]
-                zone = zone_part.split(' -- ')[0].strip() if ' -- ' in zone_part else zone_part.strip()
-                
-                # Verifica se è una zona definita
-                heart_rates = self.workout_config.get('heart_rates', {})
-                if zone in heart_rates:
-                    hr_value = heart_rates[zone]
-                    
-                    # Gestisci diversi formati di FC
-                    if isinstance(hr_value, str) and '-' in hr_value:
-                        # Formato intervallo (es. "140-160")
-                        hr_parts = hr_value.split('-')
-                        if len(hr_parts) == 2:
-                            try:
-                                # Verifica se contiene percentuali o max_hr
-                                if "%" in hr_parts[1]:
-                                    # Esempio: 62-76% max_hr
-                                    max_hr = heart_rates.get('max_hr', 180)
-                                    
-                                    # Estrai i valori percentuali
-                                    match1 = re.search(r'(\d+)', hr_parts[0])
-                                    match2 = re.search(r'(\d+)', hr_parts[1])
-                                    
-                                    if match1 and match2:
-                                        low_percent = int(match1.group(1))
-                                        high_percent = int(match2.group(1))
-                                        
-                                        # Calcola i valori BPM
-                                        low_hr = int((low_percent / 100) * max_hr)
-                                        high_hr = int((high_percent / 100) * max_hr)
-                                        
-                                        return Target('heart.rate.zone', low_hr, high_hr)
-                                else:
-                                    # Intervallo semplice (es. "140-160")
-                                    low_hr = int(hr_parts[0])
-                                    high_hr = int(hr_parts[1])
-                                    return Target('heart.rate.zone', low_hr, high_hr)
-                            except Exception as e:
-                                logging.warning(f"Errore nella conversione della FC '{hr_value}': {str(e)}")
-                        
-                    # Formato singolo valore
-                    try:
-                        hr = int(hr_value)
-                        # Aggiungi margini di ±5 bpm
-                        return Target('heart.rate.zone', hr - 5, hr + 5)
-                    except Exception as e:
-                        # Verifica se è un valore percentuale
-                        if isinstance(hr_value, str) and "%" in hr_value:
-                            try:
-                                max_hr = heart_rates.get('max_hr', 180)
-                                match = re.search(r'(\d+)', hr_value)
-                                if match:
-                                    percent = int(match.group(1))
-                                    hr = int((percent / 100) * max_hr)
-                                    return Target('heart.rate.zone', hr - 5, hr + 5)
-                            except Exception as e2:
-                                logging.warning(f"Errore nella conversione della FC percentuale '{hr_value}': {str(e2)}")
-                        else:
-                            logging.warning(f"Errore nella conversione della FC '{hr_value}': {str(e)}")
-                
-                # Prova come zona numerica
-                elif re.match(r'^Z\d+_HR$', zone):
-                    try:
-                        zone_num = int(zone[1:-3])
-                        return Target('heart.rate.zone', zone=zone_num)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della zona HR '{zone}': {str(e)}")
-                
-                # Verifica se è un intervallo di percentuali (es. "70-80%")
-                if '%' in zone:
-                    match = re.match(r'^(\d+)-(\d+)%$', zone)
-                    if match:
-                        try:
-                            low_percent = int(match.group(1))
-                            high_percent = int(match.group(2))
-                            
-                            # Ottieni il valore max_hr dalla configurazione
-                            max_hr = self.workout_config.get('heart_rates', {}).get('max_hr', 180)
-                            
-                            # Calcola i valori di BPM
-                            low_hr = int((low_percent / 100) * max_hr)
-                            high_hr = int((high_percent / 100) * max_hr)
-                            
-                            logging.info(f"Convertito {zone} in {low_hr}-{high_hr} BPM (max_hr: {max_hr})")
-                            return Target('heart.rate.zone', low_hr, high_hr)
-                        except Exception as e:
-                            logging.warning(f"Errore nella conversione dell'intervallo percentuale '{zone}': {str(e)}")
-                    
-                    # Singola percentuale (es. "70%")
-                    match = re.match(r'^(\d+)%$', zone)
-                    if match:
-                        try:
-                            percent = int(match.group(1))
-                            
-                            # Ottieni il valore max_hr dalla configurazione
-                            max_hr = self.workout_config.get('heart_rates', {}).get('max_hr', 180)
-                            
-                            # Calcola il valore di BPM con margine di ±3%
-                            hr = int((percent / 100) * max_hr)
-                            low_hr = int(((percent - 3) / 100) * max_hr)
-                            high_hr = int(((percent + 3) / 100) * max_hr)
-                            
-                            logging.info(f"Convertito {zone} in {low_hr}-{high_hr} BPM (max_hr: {max_hr})")
-                            return Target('heart.rate.zone', low_hr, high_hr)
-                        except Exception as e:
-                            logging.warning(f"Errore nella conversione della percentuale singola '{zone}': {str(e)}")
-                
-                # Prova come valore diretto o intervallo
-                if '-' in zone:
-                    try:
-                        hr_parts = zone.split('-')
-                        low_hr = int(hr_parts[0])
-                        high_hr = int(hr_parts[1])
-                        return Target('heart.rate.zone', low_hr, high_hr)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione dell'intervallo HR '{zone}': {str(e)}")
-                elif zone.isdigit():
-                    try:
-                        hr = int(zone)
-                        return Target('heart.rate.zone', hr - 5, hr + 5)
-                    except Exception as e:
-                        logging.warning(f"Errore nella conversione della FC diretta '{zone}': {str(e)}")
-                
-                # Valore di default per FC
-                return Target('heart.rate.zone', 130, 150)
-            
-            # Nessun target riconosciuto
-            return None
+        zones = self.zone_table()
+        node = parse_step_detail(step_detail, sport_type, zones)
         
-        except Exception as e:
-            logging.error(f"Errore imprevisto nell'estrazione del target: {str(e)}")
+        # Nessun target riconosciuto
+        if node.target is None:
             return None
+        
+        return zones.target(node.target, sport_type)
+    
+    def zone_table(self):
+        """Tabella delle zone compilata dalla configurazione corrente"""
+        from planner.zones import ZoneTable
+        
+        return ZoneTable.from_config(self.workout_config)
     
     def extract_end_condition(self, step_detail):
         """Estrae la condizione di fine dal dettaglio di uno step"""
+        from planner.step_grammar import parse_step_detail
+        
         if not step_detail:
             return "lap.button", None
             
         try:
-            # Rimuovi eventuali parti dopo " -- " (descrizione)
-            if ' -- ' in step_detail:
-                step_detail = step_detail.split(' -- ')[0]
-            
-            # Rimuovi le parti di target
-            if ' @ ' in step_detail:
-                step_detail = step_detail.split(' @ ')[0]
-            elif ' @spd ' in step_detail:
-                step_detail = step_detail.split(' @spd ')[0]
-            elif ' @hr ' in step_detail:
-                step_detail = step_detail.split(' @hr ')[0]
-            
-            # Ora abbiamo solo la parte di durata/distanza
-            step_detail = step_detail.strip()
-            
-            # Gestisci il caso speciale "lap-button"
-            if step_detail == "lap-button":
-                return "lap.button", None
-            
-            # Estrai la condizione di fine
-            if 'min' in step_detail:
-                # Durata in minuti
-                try:
-                    # Usa una regex per estrarre il numero (supporta anche decimali)
-                    match = re.search(r'(\d+(?:\.\d+)?)\s*min', step_detail)
-                    if match:
-                        minutes = float(match.group(1))
-                        return "time", str(int(minutes * 60))  # Converti in secondi
-                except Exception as e:
-                    logging.warning(f"Errore nell'estrazione della durata in minuti: {str(e)}")
-                    return "lap.button", None
-            elif 'km' in step_detail:
-                # Distanza in km
-                try:
-                    # Usa una regex per estrarre il numero (supporta anche decimali)
-                    match = re.search(r'(\d+(?:\.\d+)?)\s*km', step_detail)
-                    if match:
-                        km = float(match.group(1))
-                        return "distance", str(int(km * 1000))  # Converti in metri
-                except Exception as e:
-                    logging.warning(f"Errore nell'estrazione della distanza in km: {str(e)}")
-                    return "lap.button", None
-            elif 'm' in step_detail and 'min' not in step_detail:
-                # Distanza in metri
-                try:
-                    # Usa una regex per estrarre il numero (supporta anche decimali)
-                    match = re.search(r'(\d+(?:\.\d+)?)\s*m', step_detail)
-                    if match:
-                        meters = float(match.group(1))
-                        return "distance", str(int(meters))
-                except Exception as e:
-                    logging.warning(f"Errore nell'estrazione della distanza in metri: {str(e)}")
-                    return "lap.button", None
-            elif re.match(r'^\d+:\d{2}$', step_detail):
-                # Formato mm:ss
-                try:
-                    from planner.utils import hhmmss_to_seconds
-                    seconds = hhmmss_to_seconds(step_detail)
-                    return "time", str(seconds)
-                except Exception as e:
-                    logging.warning(f"Errore nella conversione del tempo '{step_detail}': {str(e)}")
-                    return "lap.button", None
-            elif step_detail.isdigit():
+            node = parse_step_detail(step_detail, zones=self.zone_table())
+            
+            if node.end_condition == 'time':
+                return "time", str(node.seconds)  # In secondi
+            elif node.end_condition == 'distance':
+                return "distance", str(int(node.meters))  # In metri
+            elif node.end_condition == 'iterations':
                 # Numero di ripetizioni per gli step di tipo "repeat"
-                return "iterations", int(step_detail)
+                return "iterations", node.value
                 
-            # Default
+            # Default (anche per "lap-button")
             return "lap.button", None
             
         except Exception as e:
@@ -2080,9 +1734,9 @@ class WorkoutEditorFrame(ttk.Frame):
     
     def extract_description(self, step_detail):
         """Estrae la descrizione dal dettaglio di uno step"""
-        if ' -- ' in step_detail:
-            return step_detail.split(' -- ')[1].strip()
-        return ""
+        from planner.step_grammar import parse_step_detail
+        
+        return parse_step_detail(step_detail, zones=self.zone_table()).description
     
     def download_workouts(self):
         """Scarica gli allenamenti da Garmin Connect"""
@@ -2504,6 +2158,7 @@ class WorkoutEditorFrame(ttk.Frame):
     
     def on_logout(self):
         """Gestisce l'evento di logout"""
+        self.jobs.cancel_all()
         self.garmin_client = None
         self.sync_button['state'] = 'disabled'
         
@@ -95,10 +95,23 @@ class GarminPlannerApp(tk.Tk):
         # Collegamento alla chiusura dell'applicazione
         self.protocol("WM_DELETE_WINDOW", self.on_close)
         
+        # Pannello delle metriche per il debug delle prestazioni
+        self.metrics_dialog = None
+        self.bind_all("<F12>", lambda event: self.show_metrics())
+        
         # Verifica se c'è un token OAuth salvato e prova a usarlo
         self.try_auto_login()
 
 
+    def show_metrics(self):
+        """Apre (o porta in primo piano) il pannello delle metriche"""
+        from garmin_planner_gui.gui.metrics_dialog import MetricsDialog
+        
+        if self.metrics_dialog is not None and self.metrics_dialog.winfo_exists():
+            self.metrics_dialog.lift()
+            return
+        self.metrics_dialog = MetricsDialog(self, self)
+
     def apply_ui_settings(self):
         """Applica le impostazioni dell'interfaccia utente"""
         ui_prefs = self.config.get('ui_preferences', {})
@@ -162,7 +175,7 @@ class GarminPlannerApp(tk.Tk):
             
             # Verifica se il client è valido tentando una richiesta
             try:
-                _ = self.garmin_client.list_workouts()
+                _ = self.garmin_client.verify_connection()
             except Exception as api_err:
                 logging.error(f"Errore nell'accesso alle API di Garmin: {str(api_err)}")
                 self.login_frame.show_login_error(f"Impossibile verificare la connessione: {str(api_err)}")
@@ -0,0 +1,236 @@
+#! /usr/bin/env python
+
+"""
+Conversione in blocco di piani Excel e YAML.
+
+Accetta directory, file o pattern glob e converte ogni file Excel in YAML e ogni
+file YAML in Excel usando un pool di processi (di default uno per core).
+Un manifest JSON conserva l'hash del contenuto di ogni file convertito: i file
+non modificati dall'ultima esecuzione, il cui output esiste ancora, vengono saltati.
+"""
+
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from planner.cache import CACHE_DIR
+
+# Manifest predefinito con gli hash dei file già convertiti
+DEFAULT_MANIFEST = os.path.join(CACHE_DIR, "batch_manifest.json")
+
+EXCEL_EXTENSIONS = ('.xlsx',)
+YAML_EXTENSIONS = ('.yaml', '.yml')
+
+
+def file_hash(path):
+    """Hash SHA-256 del contenuto di un file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    """Carica il manifest, restituendo un dizionario vuoto se manca o non è leggibile"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    """Salva il manifest in modo atomico"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def collect_sources(patterns, to='auto'):
+    """
+    Raccoglie i file da convertire.
+
+    Args:
+        patterns: Directory (visitate ricorsivamente), file o pattern glob
+        to: 'yaml' per i soli file Excel, 'excel' per i soli file YAML, 'auto' per entrambi
+
+    Returns:
+        list: Percorsi assoluti ordinati, senza duplicati
+    """
+    extensions = {
+        'yaml': EXCEL_EXTENSIONS,
+        'excel': YAML_EXTENSIONS,
+        'auto': EXCEL_EXTENSIONS + YAML_EXTENSIONS,
+    }[to]
+
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = []
+            for root, _, files in os.walk(pattern):
+                candidates.extend(os.path.join(root, name) for name in files)
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+
+        for path in candidates:
+            name = os.path.basename(path)
+            # Salta i file di lock di Excel (~$nome.xlsx)
+            if name.startswith('~$') or not os.path.isfile(path):
+                continue
+            if os.path.splitext(name)[1].lower() in extensions:
+                found.add(os.path.abspath(path))
+
+    return sorted(found)
+
+
+def target_path(source, output_dir=None, base_dir=None):
+    """
+    Percorso del file convertito: stessa posizione e nome con l'estensione dell'altro formato,
+    oppure dentro output_dir mantenendo il percorso relativo a base_dir.
+    """
+    stem, ext = os.path.splitext(source)
+    target = stem + ('.yaml' if ext.lower() in EXCEL_EXTENSIONS else '.xlsx')
+    if output_dir:
+        relative = os.path.relpath(target, base_dir) if base_dir else os.path.basename(target)
+        target = os.path.join(os.path.abspath(output_dir), relative)
+    return target
+
+
+def convert_file(source, target, verbose=False):
+    """
+    Converte un singolo file (eseguito nei processi del pool).
+
+    Returns:
+        tuple: (source, target, secondi impiegati, messaggio di errore o None)
+    """
+    start = time.perf_counter()
+    try:
+        directory = os.path.dirname(target)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Il convertitore stampa molti messaggi di debug: li scartiamo se non richiesti
+        if not verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(None if verbose else devnull):
+            from planner.excel_to_yaml_converter import excel_to_yaml, yaml_to_excel
+
+            if os.path.splitext(source)[1].lower() in EXCEL_EXTENSIONS:
+                excel_to_yaml(source, target)
+            else:
+                from planner.plan_io import load_plan
+                data = load_plan(source)
+                if not isinstance(data, dict):
+                    raise ValueError("il file YAML non contiene un piano")
+                if not yaml_to_excel(data, target, create_new=True):
+                    raise ValueError("conversione in Excel non riuscita")
+
+        return source, target, time.perf_counter() - start, None
+    except Exception as e:
+        return source, target, time.perf_counter() - start, str(e)
+
+
+def run_batch(patterns, to='auto', output_dir=None, jobs=None, manifest_path=DEFAULT_MANIFEST,
+              force=False, verbose=False):
+    """
+    Converte in parallelo tutti i file indicati, saltando quelli non modificati.
+
+    Args:
+        patterns: Directory, file o pattern glob
+        to: 'yaml', 'excel' o 'auto' (vedi collect_sources)
+        output_dir: Directory di destinazione (opzionale, altrimenti accanto ai sorgenti)
+        jobs: Numero di processi (default: uno per core)
+        manifest_path: Percorso del manifest con gli hash dei file già convertiti
+        force: Se True, converte anche i file non modificati
+        verbose: Se True, mostra l'output del convertitore
+
+    Returns:
+        list: Risultati come dizionari con source, target, status ('converted',
+            'skipped' o 'error'), seconds ed error
+    """
+    manifest = load_manifest(manifest_path)
+    sources = collect_sources(patterns, to)
+
+    # Non riconvertire i file prodotti da una conversione precedente
+    outputs = {entry.get('target') for entry in manifest.values()}
+    sources = [source for source in sources if source not in outputs]
+
+    # Se nello stesso lotto ci sono sia il file Excel che il file YAML, vince il più recente
+    source_set = set(sources)
+    sources = [
+        source for source in sources
+        if not (target_path(source) in source_set
+                and os.path.getmtime(target_path(source)) > os.path.getmtime(source))
+    ]
+
+    base_dir = os.path.commonpath([os.path.dirname(source) for source in sources]) if sources else None
+
+    results = []
+    pending = {}
+    for source in sources:
+        target = target_path(source, output_dir, base_dir)
+        digest = file_hash(source)
+        entry = manifest.get(source)
+        if (not force and entry and entry.get('sha256') == digest
+                and entry.get('target') == target and os.path.exists(target)):
+            results.append({'source': source, 'target': target, 'status': 'skipped',
+                            'seconds': 0.0, 'error': None})
+        else:
+            pending[source] = (target, digest)
+
+    if pending:
+        jobs = jobs or os.cpu_count() or 1
+        logging.info(f"Conversione di {len(pending)} file con {jobs} processi "
+                     f"({len(results)} invariati saltati)")
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            futures = [executor.submit(convert_file, source, target, verbose)
+                       for source, (target, _) in pending.items()]
+            for future in as_completed(futures):
+                source, target, seconds, error = future.result()
+                if error is None:
+                    manifest[source] = {'sha256': pending[source][1], 'target': target,
+                                        'seconds': round(seconds, 3), 'converted_at': time.time()}
+                else:
+                    manifest.pop(source, None)
+                    logging.error(f"Errore nella conversione di {source}: {error}")
+                results.append({'source': source, 'target': target,
+                                'status': 'converted' if error is None else 'error',
+                                'seconds': seconds, 'error': error})
+
+        save_manifest(manifest_path, manifest)
+
+    results.sort(key=lambda result: result['source'])
+    return results
+
+
+def print_summary(results, elapsed=None):
+    """Stampa il riepilogo dei tempi per file"""
+    if not results:
+        print("Nessun file da convertire")
+        return
+
+    width = max(len(os.path.relpath(result['source'])) for result in results)
+    for result in results:
+        status = result['status'] if result['status'] != 'error' else f"error: {result['error']}"
+        print(f"{os.path.relpath(result['source']):<{width}}  {result['seconds']:7.2f}s  {status}")
+
+    counts = {status: sum(1 for result in results if result['status'] == status)
+              for status in ('converted', 'skipped', 'error')}
+    total = sum(result['seconds'] for result in results)
+    line = (f"{counts['converted']} convertiti, {counts['skipped']} invariati, {counts['error']} errori "
+            f"- tempo di conversione {total:.2f}s")
+    if elapsed is not None:
+        line += f", tempo totale {elapsed:.2f}s"
+    print(line)
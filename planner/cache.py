@@ -0,0 +1,320 @@
+#! /usr/bin/env python
+
+"""
+Cache locale persistente per allenamenti e calendario di Garmin Connect.
+
+I dati sono salvati in un database SQLite in ~/.garmin_planner, condiviso da
+tutte le schede dell'interfaccia e tra una sessione e l'altra. Gli allenamenti
+sono indicizzati per account e workoutId e conservano il proprio updateDate:
+quando la lista viene riscaricata, i dettagli degli allenamenti che non sono
+cambiati restano validi e solo quelli modificati devono essere richiesti di nuovo.
+
+Per gli allenamenti caricati dal planner viene inoltre conservato l'hash del JSON
+inviato insieme al workoutId remoto, così che un nuovo caricamento possa saltare
+gli allenamenti che non sono cambiati.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Directory e file del database di cache
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".garmin_planner")
+CACHE_FILE = os.path.join(CACHE_DIR, "cache.sqlite")
+
+# Secondi per cui la lista degli allenamenti è considerata aggiornata
+DEFAULT_LIST_TTL = 15 * 60
+
+# Secondi per cui un mese del calendario è considerato aggiornato
+DEFAULT_CALENDAR_TTL = 15 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workouts (
+    account TEXT NOT NULL,
+    workout_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    update_date TEXT,
+    summary TEXT NOT NULL,
+    detail TEXT,
+    PRIMARY KEY (account, workout_id)
+);
+CREATE TABLE IF NOT EXISTS workout_lists (
+    account TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calendar_months (
+    account TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (account, year, month)
+);
+CREATE TABLE IF NOT EXISTS uploaded_workouts (
+    account TEXT NOT NULL,
+    name TEXT NOT NULL,
+    workout_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    scheduled_date TEXT,
+    uploaded_at REAL NOT NULL,
+    PRIMARY KEY (account, name)
+);
+"""
+
+
+def content_hash(payload):
+    """
+    Hash SHA-256 della forma canonica (chiavi ordinate, senza spazi) di un JSON.
+
+    Args:
+        payload: Dizionario da inviare a Garmin Connect (ad esempio garminconnect_json)
+
+    Returns:
+        str: Hash esadecimale
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class WorkoutCache:
+    """
+    Cache SQLite degli allenamenti e dei mesi di calendario di un account.
+
+    Tutti i metodi sono thread-safe: la stessa istanza può essere usata dai
+    thread delle operazioni massive di GarminClient.
+    """
+
+    def __init__(self, account, path=CACHE_FILE, list_ttl=DEFAULT_LIST_TTL,
+                 calendar_ttl=DEFAULT_CALENDAR_TTL):
+        """
+        Args:
+            account: Identificativo dell'account (ad esempio il percorso della cartella oauth)
+            path: Percorso del database SQLite
+            list_ttl: Secondi di validità della lista degli allenamenti
+            calendar_ttl: Secondi di validità di un mese del calendario
+        """
+        self.account = str(account)
+        self.path = path
+        self.list_ttl = list_ttl
+        self.calendar_ttl = calendar_ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Chiude la connessione al database"""
+        with self._lock:
+            self._conn.close()
+
+    # --- Lista allenamenti ---
+
+    def get_workout_list(self):
+        """
+        Restituisce la lista degli allenamenti in cache se ancora valida.
+
+        Returns:
+            list: Riepiloghi degli allenamenti nell'ordine di Garmin Connect,
+                oppure None se la lista manca o è scaduta
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM workout_lists WHERE account = ?",
+                (self.account,)).fetchone()
+            if row is None or time.time() - row[0] > self.list_ttl:
+                return None
+
+            rows = self._conn.execute(
+                "SELECT summary FROM workouts WHERE account = ? ORDER BY position",
+                (self.account,)).fetchall()
+
+        return [json.loads(summary) for (summary,) in rows]
+
+    def store_workout_list(self, workouts):
+        """
+        Salva la lista degli allenamenti scaricata da Garmin Connect.
+
+        Gli allenamenti con updateDate invariato mantengono il dettaglio in cache,
+        quelli modificati lo perdono e quelli non più presenti vengono rimossi.
+
+        Args:
+            workouts: Riepiloghi degli allenamenti restituiti da list_workouts
+
+        Returns:
+            int: Numero di allenamenti nuovi o modificati
+        """
+        changed = 0
+        with self._lock, self._conn:
+            known = dict(self._conn.execute(
+                "SELECT workout_id, update_date FROM workouts WHERE account = ?",
+                (self.account,)).fetchall())
+
+            seen = set()
+            for position, workout in enumerate(workouts or []):
+                workout_id = str(workout.get('workoutId'))
+                update_date = workout.get('updateDate')
+                seen.add(workout_id)
+
+                if workout_id in known and known[workout_id] == update_date:
+                    self._conn.execute(
+                        "UPDATE workouts SET position = ?, summary = ? "
+                        "WHERE account = ? AND workout_id = ?",
+                        (position, json.dumps(workout), self.account, workout_id))
+                else:
+                    changed += 1
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO workouts "
+                        "(account, workout_id, position, update_date, summary, detail) "
+                        "VALUES (?, ?, ?, ?, ?, NULL)",
+                        (self.account, workout_id, position, update_date, json.dumps(workout)))
+
+            removed = [workout_id for workout_id in known if workout_id not in seen]
+            self._conn.executemany(
+                "DELETE FROM workouts WHERE account = ? AND workout_id = ?",
+                [(self.account, workout_id) for workout_id in removed])
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workout_lists (account, fetched_at) VALUES (?, ?)",
+                (self.account, time.time()))
+
+        logging.debug(f"Cache allenamenti: {len(seen)} in lista, {changed} nuovi o modificati, {len(removed)} rimossi")
+        return changed
+
+    def invalidate_workout_list(self):
+        """Segna la lista degli allenamenti come scaduta"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM workout_lists WHERE account = ?", (self.account,))
+
+    # --- Dettaglio allenamenti ---
+
+    def get_workout_detail(self, workout_id):
+        """
+        Restituisce il dettaglio di un allenamento se presente in cache.
+
+        Il dettaglio è valido solo finché lo è la lista da cui proviene l'updateDate
+        con cui è stato salvato: scaduta la lista, un allenamento modificato su
+        Garmin Connect non può essere riconosciuto e il dettaglio va riscaricato.
+
+        Returns:
+            dict: Dettaglio dell'allenamento, oppure None se manca o non è più valido
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT w.detail, l.fetched_at FROM workouts w "
+                "JOIN workout_lists l ON l.account = w.account "
+                "WHERE w.account = ? AND w.workout_id = ?",
+                (self.account, str(workout_id))).fetchone()
+
+        if row is None or row[0] is None or time.time() - row[1] > self.list_ttl:
+            return None
+        return json.loads(row[0])
+
+    def store_workout_detail(self, workout_id, detail):
+        """
+        Salva il dettaglio di un allenamento.
+
+        Il dettaglio viene conservato solo se l'allenamento è presente nella lista
+        in cache con lo stesso updateDate, così da non salvare dati più vecchi
+        di quelli già noti.
+        """
+        if not detail:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE workouts SET detail = ? WHERE account = ? AND workout_id = ? "
+                "AND (update_date IS ? OR update_date IS NULL)",
+                (json.dumps(detail), self.account, str(workout_id), detail.get('updateDate')))
+
+    def forget_workout(self, workout_id):
+        """Rimuove un allenamento dalla cache e rende scaduta la lista"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM workouts WHERE account = ? AND workout_id = ?",
+                (self.account, str(workout_id)))
+            self._conn.execute(
+                "DELETE FROM workout_lists WHERE account = ?", (self.account,))
+
+    # --- Allenamenti caricati ---
+
+    def get_uploads(self):
+        """
+        Restituisce gli allenamenti caricati dal planner.
+
+        Returns:
+            dict: Nome allenamento -> dizionario con 'workout_id', 'content_hash' e 'scheduled_date'
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, workout_id, content_hash, scheduled_date FROM uploaded_workouts "
+                "WHERE account = ?", (self.account,)).fetchall()
+
+        return {name: {'workout_id': workout_id, 'content_hash': digest, 'scheduled_date': scheduled_date}
+                for name, workout_id, digest, scheduled_date in rows}
+
+    def store_upload(self, name, workout_id, digest, scheduled_date=None):
+        """Registra l'hash e il workoutId remoto di un allenamento appena caricato"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO uploaded_workouts "
+                "(account, name, workout_id, content_hash, scheduled_date, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.account, name, str(workout_id), digest,
+                 str(scheduled_date) if scheduled_date else None, time.time()))
+
+    def forget_upload(self, workout_id):
+        """Rimuove la registrazione del caricamento di un allenamento eliminato"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM uploaded_workouts WHERE account = ? AND workout_id = ?",
+                (self.account, str(workout_id)))
+
+    # --- Calendario ---
+
+    def get_calendar_month(self, year, month):
+        """
+        Restituisce la risposta del calendario per un mese se ancora valida.
+
+        Returns:
+            dict: Risposta di get_calendar, oppure None se manca o è scaduta
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, payload FROM calendar_months "
+                "WHERE account = ? AND year = ? AND month = ?",
+                (self.account, year, month)).fetchone()
+
+        if row is None or time.time() - row[0] > self.calendar_ttl:
+            return None
+        return json.loads(row[1])
+
+    def store_calendar_month(self, year, month, response):
+        """Salva la risposta del calendario per un mese"""
+        if response is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO calendar_months "
+                "(account, year, month, fetched_at, payload) VALUES (?, ?, ?, ?, ?)",
+                (self.account, year, month, time.time(), json.dumps(response)))
+
+    def invalidate_calendar(self):
+        """Rende scaduti tutti i mesi del calendario in cache"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM calendar_months WHERE account = ?", (self.account,))
+
+    def clear(self):
+        """Svuota la cache dell'account"""
+        with self._lock, self._conn:
+            for table in ('workouts', 'workout_lists', 'calendar_months', 'uploaded_workouts'):
+                self._conn.execute(f"DELETE FROM {table} WHERE account = ?", (self.account,))
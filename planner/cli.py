@@ -0,0 +1,329 @@
+#! /usr/bin/env python
+
+"""
+Interfaccia a riga di comando, senza GUI, per caricare i piani su Garmin Connect.
+
+Ogni sottocomando lavora su un file di piano per atleta, ciascuno con la propria
+cartella OAuth, ed elabora gli atleti in parallelo con un pool di thread. Un
+riepilogo JSON con una voce per atleta viene scritto su stdout (oppure in
+--summary), così il comando può essere eseguito da cron e il risultato letto da
+altri strumenti; i log vanno su stderr. Il codice di uscita è 1 se almeno un
+atleta non è riuscito.
+
+    garmin-planner upload --athlete plans/anna.yaml oauth/anna --athlete plans/bruno.yaml oauth/bruno
+    garmin-planner sync --roster squad.yaml --delete-removed
+    garmin-planner schedule --roster squad.yaml --race-day 2026-12-06
+    garmin-planner unschedule --roster squad.yaml --start-date 2026-11-01
+    garmin-planner convert plans/ --to yaml
+
+Un roster è un file YAML con l'elenco degli atleti (eventualmente sotto la chiave 'athletes'):
+
+    athletes:
+      - name: Anna
+        plan: plans/anna.yaml
+        oauth_folder: oauth/anna
+        race_day: 2026-12-06      # opzionale, prevale su --race-day e sulla config del piano
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import sys
+import time
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+
+from planner.plan_io import load_plan, normalize_steps
+
+# Atleti elaborati contemporaneamente per default
+DEFAULT_WORKERS = 4
+
+
+class Athlete:
+    """Un piano da caricare su un account Garmin Connect"""
+
+    def __init__(self, plan, oauth_folder, name=None, race_day=None, start_date=None):
+        self.plan = plan
+        self.oauth_folder = oauth_folder
+        self.name = name or os.path.splitext(os.path.basename(plan))[0]
+        self.race_day = race_day
+        self.start_date = start_date
+
+
+def load_roster(path):
+    """
+    Legge gli atleti di un file roster.
+
+    Returns:
+        list: Oggetti Athlete
+    """
+    data = load_plan(path) or []
+    if isinstance(data, dict):
+        data = data.get('athletes', [])
+    base = os.path.dirname(os.path.abspath(path))
+    athletes = []
+    for entry in data:
+        if not entry.get('plan') or not entry.get('oauth_folder'):
+            raise ValueError(f"{path}: ogni atleta richiede 'plan' e 'oauth_folder'")
+        athletes.append(Athlete(
+            os.path.join(base, str(entry['plan'])),
+            os.path.join(base, str(entry['oauth_folder'])),
+            name=entry.get('name'),
+            race_day=str(entry['race_day']) if entry.get('race_day') else None,
+            start_date=str(entry['start_date']) if entry.get('start_date') else None))
+    return athletes
+
+
+def plan_workouts(path):
+    """
+    Crea gli allenamenti di un file di piano.
+
+    Il name_prefix della config viene anteposto ai nomi degli allenamenti (se non
+    già presente) e le voci 'date' del piano sono restituite come date di pianificazione.
+
+    Returns:
+        tuple: (config del piano, lista di Workout, lista di date o None)
+    """
+    from planner.workout import Workout
+    from planner.zones import ZoneTable
+
+    plan = load_plan(path) or {}
+    config = plan.get('config', {}) or {}
+    prefix = config.get('name_prefix', '') or ''
+    zones = ZoneTable.from_config(config)
+
+    workouts = []
+    dates = []
+    for name, steps in plan.items():
+        if name == 'config' or not isinstance(steps, list):
+            continue
+        full_name = name if name.startswith(prefix) else prefix + name
+        date = next((str(step['date']) for step in steps if isinstance(step, dict) and 'date' in step), None)
+        workouts.append(Workout.from_yaml_steps(full_name, normalize_steps(steps),
+                                                sport_type=config.get('sport_type'),
+                                                paces=config.get('paces'),
+                                                heart_rates=config.get('heart_rates'),
+                                                zones=zones))
+        dates.append(date)
+    return config, workouts, dates
+
+
+def plan_pattern(config, args):
+    """Espressione regolare che seleziona gli allenamenti del piano su Garmin Connect"""
+    if args.training_plan:
+        return args.training_plan
+    prefix = (config.get('name_prefix') or '').strip()
+    if not prefix:
+        raise ValueError("il piano non ha un name_prefix: usare --training-plan")
+    return re.escape(prefix)
+
+
+def open_client(athlete):
+    from planner.garmin_client import GarminClient
+
+    return GarminClient(athlete.oauth_folder)
+
+
+def run_upload(athlete, args):
+    config, workouts, dates = plan_workouts(athlete.plan)
+    if args.no_schedule:
+        dates = None
+    if args.dry_run:
+        return {'workouts': len(workouts), 'uploaded': 0, 'dry_run': True}
+
+    client = open_client(athlete)
+    replace_ids = {}
+    if args.replace:
+        remote = {workout['workoutName']: workout['workoutId'] for workout in client.list_workouts()}
+        replace_ids = {workout.workout_name: remote[workout.workout_name]
+                       for workout in workouts if workout.workout_name in remote}
+
+    results = client.add_workouts(workouts, dates=dates, replace_ids=replace_ids,
+                                  skip_unchanged=not args.force)
+    errors = [f"{result['name']}: {result['error'] or result['schedule_error']}"
+              for result in results if result['error'] or result['schedule_error']]
+    return {
+        'workouts': len(workouts),
+        'uploaded': sum(1 for result in results if not result['error'] and not result['skipped']),
+        'updated': sum(1 for result in results if result['updated']),
+        'skipped': sum(1 for result in results if result['skipped']),
+        'scheduled': sum(1 for result in results if result['scheduled']),
+        'errors': errors,
+    }
+
+
+def run_sync(athlete, args):
+    from planner.plan_diff import apply_diff, compute_diff
+
+    config, workouts, dates = plan_workouts(athlete.plan)
+    client = open_client(athlete)
+    managed_names = set(client.cache.get_uploads()) if client.cache else set()
+    diff = compute_diff(client, workouts, dates, managed_names=managed_names)
+    summary = dict(diff.summary(), requests=len(diff.operations(args.delete_removed)),
+                   changes=diff.describe().splitlines())
+    if args.dry_run:
+        return dict(summary, dry_run=True)
+
+    results = apply_diff(client, diff, delete_removed=args.delete_removed)
+    summary['errors'] = [f"{result['name']}: {result['error']}" for result in results if result['error']]
+    return summary
+
+
+def run_schedule(athlete, args):
+    from planner.schedule import cmd_schedule_workouts
+
+    config = (load_plan(athlete.plan) or {}).get('config', {}) or {}
+    race_day = athlete.race_day or args.race_day or config.get('race_day')
+    if not race_day:
+        raise ValueError("data di gara mancante: usare --race-day, il roster o la config del piano")
+    scheduled = cmd_schedule_workouts(Namespace(
+        oauth_folder=athlete.oauth_folder, training_plan=plan_pattern(config, args),
+        race_day=str(race_day), reverse_order=args.reverse_order, dry_run=args.dry_run))
+    return {
+        'race_day': str(race_day),
+        'scheduled': sum(len(ids or []) for ids in (scheduled or {}).values()),
+        'dry_run': args.dry_run,
+    }
+
+
+def run_unschedule(athlete, args):
+    from planner.schedule import cmd_unschedule_workouts
+
+    config = (load_plan(athlete.plan) or {}).get('config', {}) or {}
+    unscheduled = cmd_unschedule_workouts(Namespace(
+        oauth_folder=athlete.oauth_folder, training_plan=plan_pattern(config, args),
+        start_date=athlete.start_date or args.start_date))
+    return {'unscheduled': unscheduled}
+
+
+COMMANDS = {
+    'upload': run_upload,
+    'sync': run_sync,
+    'schedule': run_schedule,
+    'unschedule': run_unschedule,
+}
+
+
+def process_athlete(command, athlete, args):
+    """Esegue un comando per un atleta e ne restituisce la voce del riepilogo"""
+    entry = {'athlete': athlete.name, 'plan': athlete.plan, 'oauth_folder': athlete.oauth_folder}
+    start = time.perf_counter()
+    try:
+        entry.update(COMMANDS[command](athlete, args))
+        entry['status'] = 'error' if entry.get('errors') else 'ok'
+    except Exception as e:
+        logging.error(f"{athlete.name}: {command} non riuscito: {str(e)}")
+        entry['status'] = 'error'
+        entry['error'] = str(e)
+    entry['duration'] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def run_athletes(command, athletes, args):
+    """Elabora tutti gli atleti con un pool di thread, mantenendo nei risultati l'ordine di ingresso"""
+    workers = max(1, min(args.workers, len(athletes)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="athlete") as executor:
+        return list(executor.map(lambda athlete: process_athlete(command, athlete, args), athletes))
+
+
+def run_convert(args):
+    from planner.batch_converter import DEFAULT_MANIFEST, run_batch
+
+    results = run_batch(args.paths, to=args.to, output_dir=args.output_dir, jobs=args.jobs,
+                        manifest_path=args.manifest or DEFAULT_MANIFEST, force=args.force)
+    return [dict(result, status='error' if result['status'] == 'error' else 'ok', conversion=result['status'])
+            for result in results]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='garmin-planner',
+                                     description='Carica i piani di allenamento su Garmin Connect per uno o più atleti')
+    parser.add_argument('--summary', help='Scrive il riepilogo JSON in questo file invece che su stdout')
+    parser.add_argument('--log-level', default='INFO', help='Livello di logging (default INFO)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def athlete_command(name, help):
+        sub = subparsers.add_parser(name, help=help)
+        sub.add_argument('--athlete', nargs=2, action='append', default=[], metavar=('PLAN', 'OAUTH_FOLDER'),
+                         help='File del piano e cartella OAuth di un atleta (ripetibile)')
+        sub.add_argument('--roster', help="File YAML con l'elenco degli atleti")
+        sub.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                         help=f'Atleti elaborati in parallelo (default {DEFAULT_WORKERS})')
+        sub.add_argument('--base-url', help='URL di base alternativo a Garmin Connect (ad esempio planner.garmin_standin)')
+        return sub
+
+    upload = athlete_command('upload', 'Carica gli allenamenti di ogni piano')
+    upload.add_argument('--replace', action='store_true', help='Aggiorna gli allenamenti con lo stesso nome invece di crearne di nuovi')
+    upload.add_argument('--force', action='store_true', help="Carica gli allenamenti anche se invariati dall'ultimo caricamento")
+    upload.add_argument('--no-schedule', action='store_true', help='Ignora le date presenti nei piani')
+    upload.add_argument('--dry-run', action='store_true', help='Crea solo gli allenamenti, senza caricarli')
+
+    sync = athlete_command('sync', 'Invia solo le differenze tra ogni piano e Garmin Connect')
+    sync.add_argument('--delete-removed', action='store_true',
+                      help='Elimina gli allenamenti caricati in precedenza dal planner e non più presenti nel piano')
+    sync.add_argument('--dry-run', action='store_true', help='Mostra solo le differenze')
+
+    schedule = athlete_command('schedule', 'Pianifica gli allenamenti caricati di ogni piano a ritroso dalla data di gara')
+    schedule.add_argument('--race-day', help='Data di gara YYYY-MM-DD (default: race_day del roster o della config del piano)')
+    schedule.add_argument('--training-plan', help='Espressione regolare dei nomi degli allenamenti (default: name_prefix del piano)')
+    schedule.add_argument('--reverse-order', action='store_true', help='Pianifica le settimane in ordine inverso')
+    schedule.add_argument('--dry-run', action='store_true', help='Mostra solo la pianificazione nei log')
+
+    unschedule = athlete_command('unschedule', 'Rimuove dal calendario gli allenamenti di ogni piano')
+    unschedule.add_argument('--start-date', help='Rimuove solo a partire da questa data YYYY-MM-DD (default oggi)')
+    unschedule.add_argument('--training-plan', help='Espressione regolare dei nomi degli allenamenti (default: name_prefix del piano)')
+
+    convert = subparsers.add_parser('convert', help='Converte i file dei piani tra Excel e YAML')
+    convert.add_argument('paths', nargs='+', help='File, directory o pattern glob')
+    convert.add_argument('--to', choices=['auto', 'yaml', 'excel'], default='auto', help='Direzione della conversione')
+    convert.add_argument('--output-dir', help='Directory di output (default: accanto a ogni file sorgente)')
+    convert.add_argument('--jobs', '-j', type=int, help='Processi di conversione (default: uno per core)')
+    convert.add_argument('--manifest', help='Manifest con gli hash dei file convertiti')
+    convert.add_argument('--force', action='store_true', help='Converte i file anche se invariati')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO),
+                        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s', stream=sys.stderr)
+
+    start = time.perf_counter()
+    if args.command == 'convert':
+        results = run_convert(args)
+    else:
+        if args.base_url:
+            # Letta da ogni GarminClient, compresi quelli creati da planner.schedule
+            from planner.garmin_client import BASE_URL_ENV
+            os.environ[BASE_URL_ENV] = args.base_url
+        athletes = [Athlete(plan, oauth_folder) for plan, oauth_folder in args.athlete]
+        if args.roster:
+            athletes.extend(load_roster(args.roster))
+        if not athletes:
+            parser.error('nessun atleta: usare --athlete PLAN OAUTH_FOLDER oppure --roster FILE')
+        results = run_athletes(args.command, athletes, args)
+
+    failed = sum(1 for result in results if result['status'] != 'ok')
+    summary = {
+        'command': args.command,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'duration': round(time.perf_counter() - start, 3),
+        'ok': len(results) - failed,
+        'failed': failed,
+        'results': results,
+    }
+    text = json.dumps(summary, indent=2, default=str)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
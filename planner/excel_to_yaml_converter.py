@@ -9,11 +9,11 @@ It includes support for a Date column with workout scheduling.
 """
 
 import pandas as pd
-import yaml
 import re
 import os
 import sys
 import copy
+import ast
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from datetime import datetime
@@ -21,6 +21,10 @@ import argparse
 import logging
 import random
 import string
+import time
+from planner.step_grammar import split_step_line, split_repeat
+from planner.zones import ZoneTable
+from planner.plan_io import dump_plan
 
 
 # Configure logging
@@ -29,39 +33,117 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Customize YAML dumper to avoid references/aliases
-class NoAliasDumper(yaml.SafeDumper):
-    """Custom YAML dumper that ignores aliases and supports OrderedDict"""
-    def ignore_aliases(self, data):
-        return True
-    
-    def represent_mapping(self, tag, mapping, flow_style=None):
-        """Override to handle OrderedDict"""
-        # Convert OrderedDict to regular dict for serialization
-        if hasattr(mapping, 'items'):
-            mapping = dict(mapping.items())
-        return super().represent_mapping(tag, mapping, flow_style)
-
 # Valid step types supported by garmin-planner
 VALID_STEP_TYPES = {"warmup", "cooldown", "interval", "recovery", "rest", "repeat", "other"}
 
 
+class ExcelWorkbook:
+    """
+    Workbook Excel letto una sola volta.
+
+    Il file viene aperto con openpyxl in modalità read_only (lettura in streaming)
+    e i valori di tutti i fogli vengono materializzati come tuple di righe.
+    Gli estrattori ricevono questo oggetto invece del percorso, così il file
+    non viene decompresso e analizzato di nuovo per ogni foglio.
+    """
+
+    def __init__(self, excel_file):
+        """
+        Args:
+            excel_file: Percorso del file Excel
+        """
+        self.path = excel_file
+        self._sheets = {}
+
+        wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+        try:
+            self.sheet_names = list(wb.sheetnames)
+            for name in self.sheet_names:
+                rows = [tuple(row) for row in wb[name].iter_rows(values_only=True)]
+
+                # Rimuovi le righe vuote finali, come fa pandas
+                while rows and all(value is None for value in rows[-1]):
+                    rows.pop()
+
+                # Uniforma la lunghezza delle righe
+                width = max((len(row) for row in rows), default=0)
+                self._sheets[name] = [row + (None,) * (width - len(row)) for row in rows]
+        finally:
+            wb.close()
+
+    @classmethod
+    def open(cls, source):
+        """Restituisce source se è già un ExcelWorkbook, altrimenti carica il file"""
+        if isinstance(source, cls):
+            return source
+        return cls(source)
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self._sheets
+
+    def rows(self, sheet_name):
+        """
+        Righe di un foglio come tuple di valori.
+
+        Returns:
+            list: Righe del foglio (lista vuota se il foglio non esiste)
+        """
+        return self._sheets.get(sheet_name, [])
+
+    def cell(self, sheet_name, row, column):
+        """Valore di una cella (indici a partire da 1), None se fuori dal foglio"""
+        rows = self.rows(sheet_name)
+        if row < 1 or row > len(rows) or column < 1 or column > len(rows[row - 1]):
+            return None
+        return rows[row - 1][column - 1]
+
+    def dataframe(self, sheet_name, header=0):
+        """
+        DataFrame di un foglio, equivalente a pd.read_excel(file, sheet_name, header=header).
+
+        Args:
+            sheet_name: Nome del foglio
+            header: Indice (da 0) della riga con le intestazioni, None per nessuna intestazione
+
+        Returns:
+            DataFrame con i dati del foglio
+        """
+        if sheet_name not in self._sheets:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+        rows = self.rows(sheet_name)
+        if header is None:
+            return pd.DataFrame(rows)
+
+        header_row = rows[header] if header < len(rows) else ()
+        columns = []
+        for index, name in enumerate(header_row):
+            name = f"Unnamed: {index}" if name is None else name
+            # Rinomina i duplicati come pd.read_excel (Nome, Nome.1, ...)
+            base, counter = name, 1
+            while name in columns:
+                name = f"{base}.{counter}"
+                counter += 1
+            columns.append(name)
+
+        return pd.DataFrame(rows[header + 1:], columns=columns)
+
+
 def extract_heart_rates_from_excel(excel_file):
     """
     Funzione dedicata all'estrazione delle frequenze cardiache da un file Excel.
-    Utilizza direttamente openpyxl per leggere le celle.
+    Legge i valori delle celle già caricati da openpyxl.
     
     Args:
-        excel_file: Percorso del file Excel
+        excel_file: Percorso del file Excel oppure ExcelWorkbook già caricato
         
     Returns:
         Dizionario contenente le frequenze cardiache estratte
     """
-    import openpyxl
     import os
     
     # Verifica che il file esista
-    if not os.path.exists(excel_file):
+    if not isinstance(excel_file, ExcelWorkbook) and not os.path.exists(excel_file):
         print(f"File non trovato: {excel_file}")
         return {}
     
@@ -69,32 +151,31 @@ def extract_heart_rates_from_excel(excel_file):
     heart_rates = {}
     
     try:
-        # Carica il workbook
-        wb = openpyxl.load_workbook(excel_file, data_only=True)
+        # Carica il workbook (se non è già stato caricato)
+        workbook = ExcelWorkbook.open(excel_file)
         
         # Verifica se esiste il foglio HeartRates
-        if 'HeartRates' not in wb.sheetnames:
+        if 'HeartRates' not in workbook:
             print("Foglio HeartRates non trovato nel file Excel")
             return {}
         
-        # Ottieni il foglio
-        hr_sheet = wb['HeartRates']
+        # Ottieni le righe del foglio
+        hr_rows = workbook.rows('HeartRates')
         
         # Stampa le dimensioni per debug
-        print(f"Dimensioni foglio HeartRates: {hr_sheet.dimensions}")
-        print(f"Numero righe: {hr_sheet.max_row}, Numero colonne: {hr_sheet.max_column}")
+        print(f"Numero righe: {len(hr_rows)}, Numero colonne: {len(hr_rows[0]) if hr_rows else 0}")
         
         # Stampa le prime 10 celle per debug
-        for row in range(1, min(10, hr_sheet.max_row + 1)):
-            name = hr_sheet.cell(row=row, column=1).value
-            value = hr_sheet.cell(row=row, column=2).value
+        for row in range(1, min(10, len(hr_rows) + 1)):
+            name = workbook.cell('HeartRates', row, 1)
+            value = workbook.cell('HeartRates', row, 2)
             print(f"Riga {row}: {name} = {value} (tipo: {type(value)})")
         
         # Processa il foglio riga per riga, iniziando dalla seconda riga (indice 2)
-        for row in range(2, hr_sheet.max_row + 1):
+        for row in range(2, len(hr_rows) + 1):
             # Ottieni il nome e il valore
-            name = hr_sheet.cell(row=row, column=1).value
-            value = hr_sheet.cell(row=row, column=2).value
+            name = workbook.cell('HeartRates', row, 1)
+            value = workbook.cell('HeartRates', row, 2)
             
             # Verifica che entrambi non siano None
             if name is not None and value is not None:
@@ -135,18 +216,17 @@ def extract_paces_and_speeds_from_excel(excel_file):
     e frequenze cardiache dal file Excel.
     
     Args:
-        excel_file: Percorso del file Excel
+        excel_file: Percorso del file Excel oppure ExcelWorkbook già caricato
         
     Returns:
         Tuple (paces, swim_paces, power_values, heart_rates) con i dizionari contenenti i valori estratti
     """
     try:
-        import openpyxl
         import re
         import datetime
         
-        # Carica il workbook
-        wb = openpyxl.load_workbook(excel_file, data_only=True)
+        # Carica il workbook (se non è già stato caricato)
+        workbook = ExcelWorkbook.open(excel_file)
         
         # Dizionari da popolare - inizializzati come vuoti invece che usare valori di default
         paces = {}
@@ -188,17 +268,15 @@ def extract_paces_and_speeds_from_excel(excel_file):
             return seconds_to_mmss(value)
         
         # Estrazione dal foglio Paces
-        if 'Paces' in wb.sheetnames:
-            sheet = wb['Paces']
-            
+        if 'Paces' in workbook:
             # Inizializza lo stato del parser
             current_section = None
             
             # Processa riga per riga
-            for row_idx in range(1, sheet.max_row + 1):
+            for row_idx in range(1, len(workbook.rows('Paces')) + 1):
                 # Leggi i valori dalle colonne
-                col0 = sheet.cell(row=row_idx, column=1).value
-                col1 = sheet.cell(row=row_idx, column=2).value
+                col0 = workbook.cell('Paces', row_idx, 1)
+                col1 = workbook.cell('Paces', row_idx, 2)
                 col0_str = str(col0) if col0 is not None else ""
                 
                 # Debug: stampa la riga
@@ -308,13 +386,11 @@ def extract_paces_and_speeds_from_excel(excel_file):
                         print(f"Convertito swim_paces {name}: {col1} ({type(col1)}) → {swim_paces[name]}")
         
         # Estrazione dal foglio HeartRates
-        if 'HeartRates' in wb.sheetnames:
-            hr_sheet = wb['HeartRates']
-            
+        if 'HeartRates' in workbook:
             # Processa riga per riga, saltando l'intestazione
-            for row_idx in range(2, hr_sheet.max_row + 1):
-                name = hr_sheet.cell(row=row_idx, column=1).value
-                value = hr_sheet.cell(row=row_idx, column=2).value
+            for row_idx in range(2, len(workbook.rows('HeartRates')) + 1):
+                name = workbook.cell('HeartRates', row_idx, 1)
+                value = workbook.cell('HeartRates', row_idx, 2)
                 
                 if name and value is not None:
                     name = str(name).strip()
@@ -1769,33 +1845,6 @@ def extract_heart_rates(xls, plan):
     
     return plan
 
-def add_comments_to_yaml(yaml_file, descriptions):
-    """
-    Add comments to the YAML file for workout descriptions.
-    
-    Args:
-        yaml_file: Path to the YAML file
-        descriptions: Dictionary with workout names and their descriptions
-    """
-    try:
-        with open(yaml_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Add comments for each workout
-        for workout_name, description in descriptions.items():
-            # Find the line with the workout name
-            pattern = f"^{re.escape(workout_name)}:"
-            content = re.sub(pattern, f"{workout_name}: # {description}", content, flags=re.MULTILINE)
-        
-        # Write the updated content
-        with open(yaml_file, 'w', encoding='utf-8') as f:
-            f.write(content)
-            
-        logging.info("Comments added to YAML file")
-    except Exception as e:
-        logging.warning(f"Error adding comments to YAML: {str(e)}")
-
-
 def parse_workout_steps(steps_str, workout_name="", sport_type="running"):
     """
     Analizza una stringa contenente i passi dell'allenamento.
@@ -1841,22 +1890,27 @@ def parse_workout_steps(steps_str, workout_name="", sport_type="running"):
         indent = len(line) - len(line.lstrip())
         
         # Gestisci le ripetizioni
-        if stripped_line.lower().startswith('repeat '):
-            # Estrai il numero di ripetizioni
-            match = re.match(r'repeat\s+(\d+)(?:\s*:|$)', stripped_line)
-            if match:
-                repeat_count = int(match.group(1))
-                
-                # Nuova ripetizione, salva quella precedente se esiste
-                if in_repeat and current_repeat and repeat_steps:
-                    steps.append({'repeat': current_repeat, 'steps': repeat_steps})
-                    repeat_steps = []
-                
+        repeat = split_repeat(stripped_line)
+        if repeat is not None:
+            repeat_count, inline_steps = repeat
+
+            # Nuova ripetizione, salva quella precedente se esiste
+            if in_repeat and current_repeat and repeat_steps:
+                steps.append({'repeat': current_repeat, 'steps': repeat_steps})
+            repeat_steps = []
+
+            if inline_steps:
+                # Step sulla stessa riga: 'repeat N: [...]'
+                steps.append({'repeat': repeat_count,
+                              'steps': parse_inline_repeat_steps(inline_steps, stripped_line, workout_name, sport_type)})
+                in_repeat = False
+                current_repeat = None
+            else:
                 # Inizia una nuova ripetizione
                 in_repeat = True
                 current_repeat = repeat_count
-                i += 1
-                continue
+            i += 1
+            continue
         
         # Se non siamo in una ripetizione e la riga non è indentata, è un passo normale
         if not in_repeat and indent == 0:
@@ -1893,6 +1947,36 @@ def parse_workout_steps(steps_str, workout_name="", sport_type="running"):
     return steps
 
 
+def parse_inline_repeat_steps(text, line, workout_name="", sport_type="running"):
+    """
+    Analizza gli step scritti sulla stessa riga di una ripetizione.
+
+    È la forma 'repeat 6: [{'interval': '100m @ strides'}, {'recovery': 'lap-button'}]'
+    prodotta da yaml_to_excel quando riceve un piano con le ripetizioni nella forma
+    YAML 'repeat 6:' non ancora normalizzata.
+
+    Raises:
+        ValueError: Se il testo dopo i due punti non è una lista di step
+    """
+    try:
+        substeps = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        substeps = None
+    if (not isinstance(substeps, list) or not substeps
+            or not all(isinstance(step, dict) and len(step) == 1 and isinstance(next(iter(step.values())), str)
+                       for step in substeps)):
+        raise ValueError(f"{workout_name}: ripetizione non valida '{line}': "
+                         f"dopo 'repeat N:' sono attesi una lista di step oppure gli step indentati nelle righe successive")
+
+    steps = []
+    for substep in substeps:
+        (step_type, step_detail), = substep.items()
+        step = parse_step_line(f"{step_type}: {step_detail}", workout_name, sport_type)
+        if step:
+            steps.append(step)
+    return steps
+
+
 def parse_step_line(line, workout_name="", sport_type="running"):
     """
     Analizza una singola riga di passo.
@@ -1916,10 +2000,9 @@ def parse_step_line(line, workout_name="", sport_type="running"):
         line = line.split('//')[0].strip()
     
     # Cerca di estrarre il tipo di passo e i dettagli
-    match = re.match(r'^([\w-]+)\s*:\s*(.+)$', line)
-    if match:
-        step_type = match.group(1).strip().lower()
-        step_detail = match.group(2).strip()
+    parts = split_step_line(line)
+    if parts:
+        step_type, step_detail = parts
         
         # Verifica se è repeat (questo è solo per compatibilità)
         if step_type == 'repeat' and step_detail.isdigit():
@@ -1982,104 +2065,6 @@ def parse_step_line(line, workout_name="", sport_type="running"):
             # Se non c'è abbastanza informazione, considera come intervallo generico
             return {'interval': line}
 
-def parse_target(target_text, paces=None, heart_rates=None, sport_type="running"):
-    """
-    Parse target zone from text like "@Z3" or "@hr Z2_HR"
-    
-    Args:
-        target_text: Text containing target information
-        paces: Dictionary of pace values
-        heart_rates: Dictionary of heart rate values
-        sport_type: Type of sport
-        
-    Returns:
-        Target object
-    """
-    if not target_text or not target_text.startswith('@'):
-        return Target()
-        
-    # Check if this is a heart rate target
-    is_hr = 'hr' in target_text.lower()
-    
-    # Extract zone name (e.g., "Z3" or "Z2_HR")
-    zone_match = re.search(r'@(?:hr\s+)?([A-Za-z0-9_]+)', target_text)
-    if not zone_match:
-        return Target()
-        
-    zone_name = zone_match.group(1)
-    
-    # Handle heart rate zones
-    if is_hr or '_HR' in zone_name:
-        # Get zone number if it's in format Z1_HR, Z2_HR, etc.
-        zone_number_match = re.match(r'Z(\d+)(?:_HR)?', zone_name)
-        if zone_number_match and heart_rates:
-            zone_number = int(zone_number_match.group(1))
-            # Look up heart rate values from configuration
-            zone_key = f"Z{zone_number}_HR"
-            hr_value = heart_rates.get(zone_key, "")
-            
-            # Parse heart rate ranges (e.g., "140-160")
-            hr_range_match = re.match(r'(\d+)-(\d+)', str(hr_value))
-            if hr_range_match:
-                from_value = float(hr_range_match.group(1))
-                to_value = float(hr_range_match.group(2))
-                return Target("heart.rate.zone", to_value, from_value, zone_number)
-            # Parse single heart rate values
-            elif str(hr_value).isdigit():
-                value = float(hr_value)
-                # Create a range around the single value
-                return Target("heart.rate.zone", value * 1.05, value * 0.95, zone_number)
-        
-        # Default heart rate zone if not found in configuration
-        return Target("heart.rate.zone", 150, 130, 1)
-    
-    # Handle pace zones
-    elif sport_type == "running" and paces and zone_name in paces:
-        pace_value = paces.get(zone_name, "")
-        
-        # Convert MM:SS format to meters per second
-        if ":" in str(pace_value):
-            parts = str(pace_value).split(":")
-            if len(parts) == 2:
-                minutes = int(parts[0])
-                seconds = int(parts[1])
-                total_seconds = minutes * 60 + seconds
-                meters_per_second = 1000 / total_seconds  # Convert min/km to m/s
-                
-                # Get zone number if applicable
-                zone_number = None
-                if re.match(r'Z\d+', zone_name):
-                    zone_number = int(zone_name[1:])
-                
-                # For pace zones, create a range with +/- 5% variation
-                from_value = meters_per_second * 0.95  # Slower pace (lower m/s)
-                to_value = meters_per_second * 1.05    # Faster pace (higher m/s)
-                
-                return Target("pace.zone", to_value, from_value, zone_number)
-    
-    # Handle power zones for cycling
-    elif sport_type == "cycling" and zone_name.startswith('Z'):
-        # Extract zone number
-        zone_number_match = re.match(r'Z(\d+)', zone_name)
-        if zone_number_match:
-            zone_number = int(zone_number_match.group(1))
-            # Define power ranges based on zone number (customize as needed)
-            power_ranges = {
-                1: (100, 150),
-                2: (150, 200),
-                3: (200, 250),
-                4: (250, 300),
-                5: (300, 350)
-            }
-            
-            if zone_number in power_ranges:
-                from_value, to_value = power_ranges[zone_number]
-                return Target("power.zone", to_value, from_value, zone_number)
-    
-    # Default to no target if we couldn't parse anything
-    return Target()
-
-
 def auto_adjust_column_widths(worksheet):
     """
     Automatically adjust column widths based on content, handling merged cells properly.
@@ -3116,28 +3101,122 @@ def safe_adjust_column_widths(worksheet):
             worksheet.column_dimensions[column].width = min(adjusted_width, 60)  # Limit to 60 to avoid too wide columns
 
 
-def excel_to_yaml(excel_file, output_file=None, sport_type=None):
+def normalize_workouts_frame(df):
+    """
+    Normalizza il foglio Workouts con operazioni per colonna.
+    
+    Scarta le righe incomplete o con description 'athlete_name', formatta settimana
+    e sessione con due cifre, riconosce lo sport e formatta le date come YYYY-MM-DD.
+    
+    Args:
+        df: DataFrame del foglio Workouts (colonne Week, Session, Description, Steps,
+            e opzionalmente Sport e Date)
+        
+    Returns:
+        DataFrame con le colonne name, description, steps, sport e date (None se assente)
+    """
+    # Verifica che ci siano i dati necessari
+    df = df.dropna(subset=['Week', 'Session', 'Description', 'Steps'])
+    description = df['Description'].astype(str).str.strip()
+    
+    # Salta le righe con description "athlete_name" (che potrebbero essere importate erroneamente)
+    ignored = description.str.lower().str.contains('athlete_name', regex=False)
+    for text in description[ignored]:
+        print(f"Ignorata riga con description '{text}' (non è un allenamento valido)")
+    df = df[~ignored]
+    description = description[~ignored]
+    
+    # Crea il nome completo dell'allenamento (senza includere la data)
+    week = pd.to_numeric(df['Week']).astype(int).astype(str).str.zfill(2)
+    session = pd.to_numeric(df['Session']).astype(int).astype(str).str.zfill(2)
+    name = 'W' + week + 'S' + session + ' ' + description
+    
+    # Determina il tipo di sport (default running), applicando le regole in ordine
+    # inverso di priorità così che "running" prevalga su "cycling" e "swimming"
+    sport = pd.Series('running', index=df.index, dtype=object)
+    if 'Sport' in df.columns:
+        sport_value = df['Sport'].where(df['Sport'].notna(), '').astype(str).str.lower()
+        for candidate in ('swimming', 'cycling', 'running'):
+            sport = sport.mask(sport_value.str.contains(candidate, regex=False), candidate)
+    
+    # Formatta le date come stringhe YYYY-MM-DD
+    date = pd.Series(None, index=df.index, dtype=object)
+    if 'Date' in df.columns:
+        date_value = df['Date']
+        if pd.api.types.is_datetime64_any_dtype(date_value):
+            date = date_value.dt.strftime("%Y-%m-%d").astype(object)
+        else:
+            # Colonna mista: le stringhe restano invariate, le date vengono formattate
+            is_text = date_value.map(lambda value: isinstance(value, str))
+            is_date = date_value.map(lambda value: hasattr(value, 'strftime'))
+            parsed = pd.to_datetime(date_value.where(is_date), errors='coerce')
+            date = date_value.astype(str).astype(object)
+            date = date.mask(is_date, parsed.dt.strftime("%Y-%m-%d"))
+            date = date.mask(is_text, date_value)
+        date = date.where(date_value.notna(), None)
+    
+    return pd.DataFrame({
+        'name': name,
+        'description': description,
+        'steps': df['Steps'].astype(str).str.strip(),
+        'sport': sport,
+        'date': date,
+    })
+
+
+def parse_steps_column(steps, names, sports, workers=None):
+    """
+    Analizza la colonna Steps del foglio Workouts.
+    
+    Args:
+        steps: Sequenza dei testi degli step
+        names: Sequenza dei nomi degli allenamenti
+        sports: Sequenza dei tipi di sport
+        workers: Numero di processi da usare (None o 1 per l'analisi nel processo corrente)
+        
+    Returns:
+        Lista delle liste di step, nello stesso ordine delle righe
+    """
+    steps, names, sports = list(steps), list(names), list(sports)
+    
+    if workers and workers > 1 and len(steps) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(steps) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(parse_workout_steps, steps, names, sports, chunksize=chunksize))
+    
+    return [parse_workout_steps(text, name, sport) for text, name, sport in zip(steps, names, sports)]
+
+
+def excel_to_yaml(excel_file, output_file=None, sport_type=None, workers=None):
     """
     Converte un file Excel strutturato in un file YAML compatibile con garmin-planner.
     Include supporto per estrarre le date degli allenamenti e la data della gara.
     Ora estrae sia paces che power_values e swim_paces indipendentemente dal tipo di sport.
     Utilizza estrazione diretta per le frequenze cardiache.
     
+    Il file viene letto una sola volta: tutti i fogli sono estratti dallo stesso ExcelWorkbook.
+    
     Args:
-        excel_file: Percorso del file Excel di input
+        excel_file: Percorso del file Excel di input oppure ExcelWorkbook già caricato
         output_file: Percorso del file YAML di output (opzionale)
         sport_type: Tipo di sport (non più usato, viene ora estratto da ogni allenamento)
+        workers: Numero di processi per l'analisi degli step (None per nessun parallelismo)
     """
+    excel_path = excel_file.path if isinstance(excel_file, ExcelWorkbook) else excel_file
+    
     # Se non viene specificato un file di output, creiamo uno con lo stesso nome ma estensione .yaml
     if output_file is None:
-        output_file = os.path.splitext(excel_file)[0] + '.yaml'
+        output_file = os.path.splitext(excel_path)[0] + '.yaml'
     
-    print(f"Convertendo {excel_file} in {output_file}...")
+    print(f"Convertendo {excel_path} in {output_file}...")
     
     # Carica il file Excel
     try:
+        workbook = ExcelWorkbook.open(excel_file)
+        
         # Leggi esplicitamente con le intestazioni nella seconda riga (header=1)
-        df = pd.read_excel(excel_file, sheet_name='Workouts', header=1)
+        df = workbook.dataframe('Workouts', header=1)
         
         # Verifica che ci siano le colonne richieste
         required_cols = ['Week', 'Session', 'Description', 'Steps']
@@ -3165,9 +3244,6 @@ def excel_to_yaml(excel_file, output_file=None, sport_type=None):
                 df = df.rename(columns=rename_map)
                 print("Colonne rinominate per uniformità.")
         
-        # Ora puoi continuare con la lettura del resto del file
-        xls = pd.ExcelFile(excel_file)
-        
     except Exception as e:
         raise ValueError(f"Errore nel caricamento del foglio 'Workouts': {str(e)}")
     
@@ -3188,8 +3264,7 @@ def excel_to_yaml(excel_file, output_file=None, sport_type=None):
     
     # Estrai il nome atleta dalla prima riga se presente
     try:
-        athlete_row = pd.read_excel(excel_file, sheet_name='Workouts', header=None, nrows=1)
-        athlete_text = str(athlete_row.iloc[0, 0])
+        athlete_text = str(workbook.cell('Workouts', 1, 1))
         
         if athlete_text and athlete_text.strip().startswith("Atleta:"):
             athlete_name = athlete_text.replace("Atleta:", "").strip()
@@ -3204,8 +3279,8 @@ def excel_to_yaml(excel_file, output_file=None, sport_type=None):
     # Estrai la data della gara SOLO dal foglio Config
     race_day = None
     try:
-        if 'Config' in xls.sheet_names:
-            config_df = pd.read_excel(excel_file, sheet_name='Config')
+        if 'Config' in workbook:
+            config_df = workbook.dataframe('Config')
             race_day_rows = config_df[config_df.iloc[:, 0] == 'race_day']
             
             if not race_day_rows.empty and pd.notna(race_day_rows.iloc[0, 1]):
@@ -3251,8 +3326,8 @@ def excel_to_yaml(excel_file, output_file=None, sport_type=None):
         print(f"Errore nell'estrazione della data della gara: {str(e)}")
     
     # Estrai le informazioni di configurazione dal foglio Config
-    if 'Config' in xls.sheet_names:
-        config_df = pd.read_excel(excel_file, sheet_name='Config')
+    if 'Config' in workbook:
+        config_df = workbook.dataframe('Config')
         
         # Estrai il prefisso del nome (se presente)
         name_prefix_rows = config_df[config_df.iloc[:, 0] == 'name_prefix']
@@ -3316,7 +3391,7 @@ def excel_to_yaml(excel_file, output_file=None, sport_type=None):
         plan['athlete_name'] = plan['config']['athlete_name']
     
     # MODIFICATO: Utilizziamo la nuova funzione di estrazione diretta per le frequenze cardiache
-    heart_rates = extract_heart_rates_from_excel(excel_file)
+    heart_rates = extract_heart_rates_from_excel(workbook)
     
     # Aggiungi le frequenze cardiache estratte, se presenti
     if heart_rates:
@@ -3328,7 +3403,7 @@ def excel_to_yaml(excel_file, output_file=None, sport_type=None):
         print("Nessuna frequenza cardiaca trovata o errore durante l'estrazione")
     
     # Estrai ritmi, velocità e passi vasca
-    paces, swim_paces, power_values, _ = extract_paces_and_speeds_from_excel(excel_file)
+    paces, swim_paces, power_values, _ = extract_paces_and_speeds_from_excel(workbook)
     
     # Aggiungi direttamente al piano (non dentro config) SOLO se contengono valori
     if paces:
@@ -3341,78 +3416,47 @@ def excel_to_yaml(excel_file, output_file=None, sport_type=None):
     # Dictionary to store workout descriptions for comments
     workout_descriptions = {}
     
-    # Processa gli allenamenti dal DataFrame
-    for _, row in df.iterrows():
-        # Verifica che ci siano i dati necessari
-        if pd.isna(row['Week']) or pd.isna(row['Session']) or pd.isna(row['Description']) or pd.isna(row['Steps']):
-            continue
-        
-        # Estrai i dati
-        week = str(int(row['Week'])).zfill(2)  # Formatta come 01, 02, ecc.
-        session = str(int(row['Session'])).zfill(2)
-        description = str(row['Description']).strip()
-        
-        # Salta le righe con description "athlete_name" (che potrebbero essere importate erroneamente)
-        if description.lower() == "athlete_name" or "athlete_name" in description.lower():
-            print(f"Ignorata riga con description '{description}' (non è un allenamento valido)")
-            continue
-        
-        # Crea il nome completo dell'allenamento (senza includere la data)
-        full_name = f"W{week}S{session} {description}"
-        
-        # Memorizza la descrizione per i commenti
-        workout_descriptions[full_name] = description
-        
-        # Estrai i passi dell'allenamento
-        steps_str = str(row['Steps']).strip()
-        
-        # Determina il tipo di sport
-        workout_sport = "running"  # Default
-        
-        # Usa la colonna Sport se presente
-        if 'Sport' in df.columns and pd.notna(row['Sport']):
-            sport_value = str(row['Sport']).strip().lower()
-            
-            # Estrai il tipo di sport dal valore (rimuovendo eventuali emoji)
-            if "running" in sport_value:
-                workout_sport = "running"
-            elif "cycling" in sport_value:
-                workout_sport = "cycling"
-            elif "swimming" in sport_value:
-                workout_sport = "swimming"
-        
-        # Prepara la lista dei passi
-        workout_steps = parse_workout_steps(steps_str, full_name, workout_sport)
-        
-        # Aggiungi metadati del tipo di sport come primo elemento 
-        sport_type_meta = {"sport_type": workout_sport}
-        workout_steps.insert(0, sport_type_meta)
+    # Normalizza il foglio Workouts con operazioni per colonna
+    workouts = normalize_workouts_frame(df)
+    workout_descriptions.update(zip(workouts['name'], workouts['description']))
+    
+    # Solo la colonna Steps passa dal parser degli step (eventualmente in parallelo)
+    parsed_steps = parse_steps_column(workouts['steps'], workouts['name'], workouts['sport'], workers)
+    
+    for full_name, workout_sport, date, workout_steps in zip(
+            workouts['name'], workouts['sport'], workouts['date'], parsed_steps):
+        # Aggiungi metadati del tipo di sport come primo elemento
+        workout_steps.insert(0, {"sport_type": workout_sport})
         
         # Aggiungi la data come secondo elemento se disponibile
-        if 'Date' in df.columns and pd.notna(row['Date']):
-            date_value = row['Date']
-            if isinstance(date_value, str):
-                formatted_date = date_value
-            else:
-                # Se è un oggetto datetime o date, formattalo come stringa
-                formatted_date = date_value.strftime("%Y-%m-%d") if hasattr(date_value, 'strftime') else str(date_value)
-            
-            # Aggiungi la data come secondo elemento dei passi
-            date_step = {"date": formatted_date}
-            workout_steps.insert(1, date_step)
+        if date is not None:
+            workout_steps.insert(1, {"date": date})
         
         # Aggiungi l'allenamento al piano (senza la data nel nome)
         plan[full_name] = workout_steps
     
-    # Salva il piano in formato YAML
-    with open(output_file, 'w', encoding='utf-8') as f:
-        # Usa NoAliasDumper per evitare riferimenti YAML
-        yaml.dump(plan, f, default_flow_style=False, sort_keys=False, Dumper=NoAliasDumper)
+    # Verifica in un solo passaggio che tutte le zone usate negli allenamenti siano definite
+    zones = ZoneTable.from_config({
+        'paces': plan.get('paces'),
+        'swim_paces': plan.get('swim_paces'),
+        'power_values': plan.get('power_values'),
+        'heart_rates': plan['config'].get('heart_rates'),
+        'margins': plan['config'].get('margins'),
+    })
+    problems = []
+    for name, steps in plan.items():
+        if name in ('config', 'athlete_name', 'paces', 'swim_paces', 'power_values'):
+            continue
+        workout_sport = next((step['sport_type'] for step in steps
+                              if isinstance(step, dict) and 'sport_type' in step), "running")
+        problems.extend(f"{name}: {problem}" for problem in zones.unresolved_references(steps, workout_sport))
+    if problems:
+        logging.warning("Zone non definite nel file Excel:\n" + "\n".join(problems))
     
-    print(f"Conversione completata! File YAML salvato in: {output_file}")
+    # Salva il piano in formato YAML, con le descrizioni come commenti scritti nello stesso passaggio
+    dump_plan(plan, output_file, comments=workout_descriptions)
     
-    # Ora aggiungi i commenti al file
-    add_comments_to_yaml(output_file, workout_descriptions)
+    print(f"Conversione completata! File YAML salvato in: {output_file}")
     
     return plan
 
@@ -3426,9 +3470,32 @@ def main():
     parser.add_argument('--create-sample', '-s', action='store_true', help='Create a sample Excel file')
     parser.add_argument('--sample-name', help='Name for the sample Excel file', default='sample_training_plan.xlsx')
     parser.add_argument('--sport-type', help='Type of sport (running or cycling)', choices=['running', 'cycling'], default='running')
+    parser.add_argument('--workers', type=int, help='Number of processes used to parse the workout steps (optional)')
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                        help='Convert every Excel/YAML file in the given directories, files or glob patterns')
+    parser.add_argument('--to', choices=['auto', 'yaml', 'excel'], default='auto',
+                        help='Batch direction: only Excel to YAML, only YAML to Excel, or both (default)')
+    parser.add_argument('--output-dir', help='Batch output directory (default: next to each source file)')
+    parser.add_argument('--jobs', '-j', type=int, help='Batch worker processes (default: one per core)')
+    parser.add_argument('--manifest', help='Batch manifest with the hashes of converted files')
+    parser.add_argument('--force', action='store_true', help='Batch: convert files even if unchanged')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Batch: show the converter output')
     
     args = parser.parse_args()
     
+    # Batch mode: convert whole directories with a process pool
+    if args.batch:
+        from planner.batch_converter import run_batch, print_summary, DEFAULT_MANIFEST
+        
+        start = time.perf_counter()
+        results = run_batch(args.batch, to=args.to, output_dir=args.output_dir, jobs=args.jobs,
+                            manifest_path=args.manifest or DEFAULT_MANIFEST, force=args.force,
+                            verbose=args.verbose)
+        print_summary(results, time.perf_counter() - start)
+        if any(result['status'] == 'error' for result in results):
+            sys.exit(1)
+        return
+    
     # Create a sample file if requested
     if args.create_sample:
         sample_file = create_sample_excel(args.sample_name, args.sport_type)
@@ -3451,7 +3518,7 @@ def main():
     
     # Convert the Excel file to YAML
     try:
-        excel_to_yaml(args.excel, args.output, args.sport_type)
+        excel_to_yaml(args.excel, args.output, args.sport_type, workers=args.workers)
         logging.info("Operation completed successfully!")
     except Exception as e:
         logging.error(f"ERROR: {str(e)}")
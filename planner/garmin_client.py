@@ -1,58 +1,472 @@
 #! /usr/bin/env python
 
+import http.client
 import json
 import logging
-import garth
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlencode, urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from getpass import getpass
 
+from planner import metrics
+from planner.sessions import SESSIONS
+
+# Variabile d'ambiente con l'URL di base alternativo a Garmin Connect (vedi planner.garmin_standin)
+BASE_URL_ENV = 'GARMIN_CONNECT_BASE_URL'
+
+# Segmenti numerici dei percorsi (ID di allenamenti, programmazioni, anni e mesi)
+ENDPOINT_ID = re.compile(r'/\d+(?=/|$)')
+
+# Numero massimo di richieste contemporanee verso Garmin Connect nelle operazioni massive
+DEFAULT_MAX_IN_FLIGHT = 6
+
+# Allenamenti richiesti per pagina nella lista degli allenamenti
+DEFAULT_WORKOUT_PAGE_SIZE = 100
+
+# Attività richieste per pagina nella ricerca delle attività
+DEFAULT_ACTIVITY_PAGE_SIZE = 100
+
+# Valori hardcoded (Z1_HR, in bpm) usati come target per riscaldamento e defaticamento
+WARMUP_HR_RANGE = (110.0, 125.0)
+
+class ConnectHTTPError(Exception):
+    """Risposta di errore di HTTPTransport; come per garth, il codice è in response.status_code"""
+
+    def __init__(self, method, url, status, headers, body):
+        super().__init__(f"{status} {method} {url}: {body[:200]}")
+        self.response = SimpleNamespace(status_code=status, headers=headers, text=body)
+
+
+class HTTPTransport:
+    """
+    Esegue le richieste verso un URL di base alternativo con la stessa interfaccia
+    di planner.sessions.Session, usando una connessione keep-alive per thread.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip('/')
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            factory = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            connection = factory(self.netloc, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def __call__(self, path, method='GET', params=None, **kwargs):
+        url = self.prefix + path
+        if params:
+            url += '?' + urlencode(params)
+        body = None
+        headers = {'Accept': 'application/json'}
+        if kwargs.get('json') is not None:
+            body = json.dumps(kwargs['json']).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        connection = self._connection()
+        try:
+            connection.request(method, url, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            # La connessione verrà riaperta alla prossima richiesta
+            connection.close()
+            self._local.connection = None
+            raise
+
+        text = data.decode('utf-8', errors='replace')
+        if response.status >= 400:
+            raise ConnectHTTPError(method, self.base_url + url, response.status, dict(response.getheaders()), text)
+        if response.status == 204 or not data:
+            return None
+        return json.loads(text)
+
+
 class GarminClient():
 
-  def __init__(self, oauth_folder='oauth-folder'):
-    garth.resume(oauth_folder)
+  def __init__(self, oauth_folder='oauth-folder', max_in_flight=DEFAULT_MAX_IN_FLIGHT, cache=True,
+               rate_limiter=True, retry_policy=True, base_url=None, sessions=None):
+    """
+    Args:
+        oauth_folder: Cartella con i token OAuth di garth
+        max_in_flight: Numero massimo di richieste contemporanee nelle operazioni massive
+        cache: True per la cache locale predefinita, False per disattivarla o un'istanza di WorkoutCache
+        rate_limiter: True per il RateLimiter predefinito, False per disattivarlo o un'istanza già pronta
+        retry_policy: True per la RetryPolicy predefinita, False per disattivarla o un'istanza già pronta
+        base_url: URL di base alternativo a Garmin Connect (ad esempio quello di
+            planner.garmin_standin); default la variabile d'ambiente GARMIN_CONNECT_BASE_URL
+        sessions: SessionPool da cui prendere la sessione garth dell'account
+            (default planner.sessions.SESSIONS)
+    """
+    self.base_url = base_url or os.environ.get(BASE_URL_ENV) or None
+    if self.base_url:
+      # Nessun token necessario: le richieste vanno al server indicato
+      self.session = None
+      self.transport = HTTPTransport(self.base_url)
+    else:
+      # Ogni account ha il proprio garth.Client: più account possono lavorare in parallelo
+      self.session = (sessions or SESSIONS).get(oauth_folder)
+      self.transport = self.session
     self.logged_in = True
+    self.max_in_flight = max_in_flight
+    if not self.base_url:
+      self._configure_http_pool(max_in_flight)
+    self.cache = self._open_cache(oauth_folder, cache)
+
+    from planner.rate_limit import RateLimiter, RetryPolicy
+    # True per i valori predefiniti, False/None per disattivarli oppure un'istanza già pronta
+    self.rate_limiter = RateLimiter() if rate_limiter is True else (rate_limiter or None)
+    self.retry_policy = RetryPolicy() if retry_policy is True else (retry_policy or None)
+
+  def _connectapi(self, path, method='GET', **kwargs):
+      """
+      Unico punto di accesso a Garmin Connect.
+
+      Ogni richiesta attende il proprio turno nel rate limiter; le risposte 429 e 5xx
+      (solo 429 per le POST) vengono ripetute secondo la retry policy, rispettando
+      l'header Retry-After. Un 429 riduce anche la frequenza del servizio chiamato.
+      """
+      from planner.rate_limit import http_status
+
+      # Gli ID nel percorso vengono sostituiti per raggruppare le metriche per endpoint
+      endpoint = f"{method} {ENDPOINT_ID.sub('/{id}', path)}"
+      attempt = 1
+      while True:
+          if self.rate_limiter:
+              with metrics.timer("http.rate_limit_wait"):
+                  self.rate_limiter.acquire(path)
+          start = time.perf_counter()
+          try:
+              response = self.transport(path, method=method, **kwargs)
+          except Exception as e:
+              status = http_status(e)
+              metrics.record_time(f"http.{endpoint}", time.perf_counter() - start)
+              metrics.increment(f"http.errors.{status or type(e).__name__}")
+              if self.rate_limiter and status == 429:
+                  self.rate_limiter.throttled(path)
+              if not self.retry_policy or not self.retry_policy.should_retry(e, method, attempt):
+                  raise
+              delay = self.retry_policy.delay(e, attempt)
+              metrics.increment("http.retries")
+              logging.warning(f"{method} {path} fallita ({status or type(e).__name__}), "
+                              f"nuovo tentativo tra {delay:.1f}s ({attempt}/{self.retry_policy.max_attempts - 1})")
+              time.sleep(delay)
+              attempt += 1
+              continue
+
+          metrics.record_time(f"http.{endpoint}", time.perf_counter() - start)
+          if self.rate_limiter:
+              self.rate_limiter.succeeded(path)
+          return response
+
+  def rate_limit_state(self):
+      """
+      Stato del rate limiter e della retry policy, per il monitoraggio.
+
+      Returns:
+          dict: Con le chiavi 'limiter' e 'retry' (None se disattivati)
+      """
+      return {
+          'limiter': self.rate_limiter.state() if self.rate_limiter else None,
+          'retry': self.retry_policy.state() if self.retry_policy else None,
+      }
+
+  def _open_cache(self, oauth_folder, cache):
+      """
+      Apre la cache locale degli allenamenti.
+
+      Args:
+          oauth_folder: Cartella oauth, usata per distinguere gli account
+          cache: True per la cache predefinita, False/None per disattivarla
+              oppure un'istanza di WorkoutCache già pronta
 
-  def list_workouts(self):
-    response = garth.connectapi(
+      Con un base_url alternativo l'account della cache include l'URL: i dati di
+      uno stand-in non devono finire tra quelli dell'account reale, altrimenti
+      un'esecuzione successiva su Garmin Connect li userebbe come validi.
+
+      Returns:
+          WorkoutCache o None se la cache è disattivata o non disponibile
+      """
+      if not cache:
+          return None
+      if cache is not True:
+          return cache
+
+      from planner.cache import WorkoutCache
+      account = os.path.abspath(os.path.expanduser(oauth_folder))
+      if self.base_url:
+          account = f"{account}@{self.base_url}"
+      try:
+          return WorkoutCache(account)
+      except Exception as e:
+          logging.warning(f"Cache locale non disponibile: {str(e)}")
+          return None
+
+  def _configure_http_pool(self, size):
+      """
+      Dimensiona il pool di connessioni keep-alive della sessione garth dell'account
+      in modo che i thread delle operazioni massive non debbano riaprire connessioni.
+      """
+      self.session.configure_pool(size)
+
+  def run_pooled(self, func, items, max_in_flight=None, progress_callback=None):
+      """
+      Esegue func su ogni elemento di items con un pool di thread limitato.
+
+      Args:
+          func: Funzione da chiamare per ogni elemento
+          items: Elementi da elaborare
+          max_in_flight: Numero massimo di chiamate contemporanee (opzionale)
+          progress_callback: Funzione chiamata come progress_callback(completati, totale, risultato)
+              al termine di ogni elemento, dal thread chiamante. Se solleva un'eccezione
+              (ad esempio per l'annullamento dall'interfaccia) gli elementi non ancora
+              avviati vengono scartati e l'eccezione viene propagata.
+
+      Returns:
+          list: Risultati di func, nello stesso ordine di items
+      """
+      items = list(items)
+      results = [None] * len(items)
+      if not items:
+          return results
+
+      workers = max(1, min(max_in_flight or self.max_in_flight, len(items)))
+      completed = 0
+      with ThreadPoolExecutor(max_workers=workers) as executor:
+          futures = {executor.submit(func, item): index for index, item in enumerate(items)}
+          try:
+              for future in as_completed(futures):
+                  index = futures[future]
+                  results[index] = future.result()
+                  completed += 1
+                  if progress_callback:
+                      progress_callback(completed, len(items), results[index])
+          except BaseException:
+              # Attendi solo gli elementi già in corso
+              executor.shutdown(wait=False, cancel_futures=True)
+              raise
+      return results
+
+  def iter_workouts(self, page_size=DEFAULT_WORKOUT_PAGE_SIZE, refresh=False, fields=None):
+    """
+    Scorre gli allenamenti dell'account pagina per pagina.
+
+    È un generatore: chi lo usa può filtrare gli allenamenti mentre arrivano o
+    fermarsi prima della fine, e le pagine successive non vengono richieste.
+    Se la lista in cache è ancora valida gli allenamenti vengono letti da lì;
+    altrimenti, se la lista viene scorsa fino in fondo, la cache viene aggiornata.
+
+    Args:
+        page_size: Allenamenti richiesti per pagina
+        refresh: Se True scarica sempre la lista da Garmin Connect
+        fields: Chiavi da mantenere nei riepiloghi (opzionale, default tutte)
+
+    Yields:
+        dict: Riepilogo di un allenamento, come restituito dal servizio workout
+    """
+    def project(workout):
+      if fields is None:
+        return workout
+      return {key: workout[key] for key in fields if key in workout}
+
+    if self.cache and not refresh:
+      cached = self.cache.get_workout_list()
+      if cached is not None:
+        logging.debug(f'lista allenamenti dalla cache ({len(cached)} allenamenti)')
+        for workout in cached:
+          yield project(workout)
+        return
+
+    # La lista completa serve solo per aggiornare la cache
+    collected = [] if self.cache else None
+    start = 1
+    while True:
+      page = self._connectapi(
+          '/workout-service/workouts',
+          params={'start': start, 'limit': page_size, 'myWorkoutsOnly': True})
+      if not isinstance(page, list):
+        break
+      if collected is not None:
+        collected.extend(page)
+      for workout in page:
+        yield project(workout)
+      if len(page) < page_size:
+        break
+      start += page_size
+
+    if collected is not None:
+      self.cache.store_workout_list(collected)
+
+  def list_workouts(self, refresh=False):
+    """
+    Restituisce la lista completa degli allenamenti, dalla cache locale se ancora valida.
+
+    Args:
+        refresh: Se True scarica sempre la lista da Garmin Connect
+    """
+    return list(self.iter_workouts(refresh=refresh))
+
+  def verify_connection(self):
+    """
+    Verifica che la sessione sia valida con una richiesta minima a Garmin Connect,
+    senza scaricare né usare la lista completa degli allenamenti.
+    """
+    return self._connectapi(
         '/workout-service/workouts',
-        params={'start': 1, 'limit': 999, 'myWorkoutsOnly': True})
-    return response
+        params={'start': 1, 'limit': 1, 'myWorkoutsOnly': True})
 
 
   def add_workout(self, workout):
       """
       Versione semplificata che utilizza valori hardcoded per le zone HR
       """
-      import logging
-      import json
-      
-      # Converti in JSON
-      workout_json = workout.garminconnect_json()
-      
-      # Forza manualmente specifici step a usare heart.rate.zone con valori appropriati
-      for segment in workout_json.get("workoutSegments", []):
-          for step in segment.get("workoutSteps", []):
-              step_type = step.get("stepType", {}).get("stepTypeKey", "")
-              
-              # Forza HR per step warmup e cooldown
-              if step_type in ["warmup", "cooldown"]:
-                  step["targetType"]["workoutTargetTypeKey"] = "heart.rate.zone"
-                  step["targetType"]["workoutTargetTypeId"] = 4  # ID per heart.rate.zone
-                  
-                  # Valori hardcoded per Z1_HR
-                  hr_min = 110.0
-                  hr_max = 125.0
-                  step["targetValueOne"] = hr_min
-                  step["targetValueTwo"] = hr_max
-                  
-                  logging.info(f"Forzato target a heart.rate.zone per step {step_type} con valori {hr_min}-{hr_max} bpm")
-      
       # Invia a Garmin Connect
-      response = garth.connectapi(
+      response = self._connectapi(
         '/workout-service/workout', method="POST",
-        json=workout_json)
+        json=self.workout_upload_json(workout))
+      if self.cache:
+          self.cache.invalidate_workout_list()
       
       return response
 
+  def add_workouts(self, workouts, max_in_flight=None, dates=None, replace_ids=None, progress_callback=None,
+                   skip_unchanged=False):
+      """
+      Carica più allenamenti su Garmin Connect in parallelo.
+
+      Ogni allenamento viene creato oppure, se il suo nome è presente in replace_ids,
+      aggiornato; se per l'allenamento è indicata una data viene anche pianificato.
+      Le richieste condividono la sessione HTTP keep-alive dell'account e al massimo
+      max_in_flight allenamenti sono in elaborazione contemporaneamente.
+
+      Con skip_unchanged l'hash del JSON di ogni allenamento viene confrontato con
+      quello registrato nella cache al caricamento precedente, se il workoutId
+      registrato è ancora presente su Garmin Connect: se coincide l'allenamento non
+      viene inviato di nuovo, altrimenti viene aggiornato sul workoutId registrato
+      invece di crearne una copia. In entrambi i casi viene ripianificato solo se la
+      data è cambiata, rimuovendo prima la programmazione nella data precedente.
+
+      Args:
+          workouts: Lista di oggetti Workout
+          max_in_flight: Numero massimo di allenamenti elaborati in parallelo (opzionale)
+          dates: Lista di date ('YYYY-MM-DD', date o None), una per allenamento (opzionale)
+          replace_ids: Dizionario nome allenamento -> workoutId da aggiornare invece di creare (opzionale)
+          progress_callback: Funzione chiamata come progress_callback(completati, totale, risultato)
+              al termine di ogni allenamento
+          skip_unchanged: Se True non invia gli allenamenti invariati dall'ultimo caricamento
+              (richiede la cache locale)
+
+      Returns:
+          list: Un dizionario per allenamento, nello stesso ordine di workouts, con le chiavi
+              'name', 'workout_id', 'response', 'updated', 'skipped', 'scheduled', 'error'
+              e 'schedule_error'
+      """
+      workouts = list(workouts)
+      dates = list(dates) if dates is not None else [None] * len(workouts)
+      replace_ids = replace_ids or {}
+
+      uploads = {}
+      if skip_unchanged and self.cache:
+          uploads = self.cache.get_uploads()
+          if uploads:
+              # Gli allenamenti eliminati su Garmin Connect vanno ricaricati
+              remote_ids = {str(workout.get('workoutId')) for workout in self.list_workouts()}
+              uploads = {name: upload for name, upload in uploads.items() if upload['workout_id'] in remote_ids}
+      elif skip_unchanged:
+          logging.debug("skip_unchanged ignorato: cache locale non disponibile")
+
+      def upload(job):
+          workout, date = job
+          result = {
+              'name': workout.workout_name,
+              'date': date,
+              'workout_id': None,
+              'response': None,
+              'updated': False,
+              'skipped': False,
+              'scheduled': False,
+              'error': None,
+              'schedule_error': None,
+          }
+          digest = self.upload_hash(workout)
+          previous = uploads.get(workout.workout_name)
+          try:
+              if previous and previous['content_hash'] == digest:
+                  logging.debug(f"Allenamento '{workout.workout_name}' invariato, non ricaricato")
+                  result['workout_id'] = previous['workout_id']
+                  result['skipped'] = True
+              elif workout.workout_name in replace_ids or previous:
+                  # Un allenamento già caricato e poi modificato viene aggiornato, non duplicato
+                  result['workout_id'] = replace_ids.get(workout.workout_name) or previous['workout_id']
+                  result['response'] = self.update_workout(result['workout_id'], workout)
+                  result['updated'] = True
+              else:
+                  result['response'] = self.add_workout(workout)
+                  if result['response'] and 'workoutId' in result['response']:
+                      result['workout_id'] = result['response']['workoutId']
+          except Exception as e:
+              logging.error(f"Errore nel caricamento dell'allenamento '{workout.workout_name}': {str(e)}")
+              result['error'] = str(e)
+              return result
+
+          # Data in cui l'allenamento registrato è già pianificato
+          scheduled_date = None
+          if previous and str(result['workout_id']) == previous['workout_id']:
+              scheduled_date = previous['scheduled_date']
+          if date and result['workout_id'] and str(date) != scheduled_date:
+              try:
+                  if scheduled_date:
+                      self.unschedule_workout_on(result['workout_id'], scheduled_date)
+                  self.schedule_workout(result['workout_id'], date)
+                  result['scheduled'] = True
+                  scheduled_date = date
+              except Exception as e:
+                  logging.error(f"Errore nella pianificazione dell'allenamento '{workout.workout_name}': {str(e)}")
+                  result['schedule_error'] = str(e)
+
+          if result['workout_id']:
+              self.remember_upload(workout, result['workout_id'], scheduled_date, digest=digest)
+          return result
+
+      return self.run_pooled(upload, zip(workouts, dates),
+                              max_in_flight=max_in_flight,
+                              progress_callback=progress_callback)
+
+  def workout_upload_json(self, workout):
+      """
+      Converte un allenamento nel JSON da inviare a Garmin Connect.
+
+      Gli step di riscaldamento e defaticamento usano il target heart.rate.zone
+      con i valori di WARMUP_HR_RANGE, decisi dallo step stesso durante la serializzazione.
+      """
+      return workout.garminconnect_json(warmup_hr_range=WARMUP_HR_RANGE)
+
+  def upload_hash(self, workout):
+      """Hash del JSON canonico con cui un allenamento viene inviato a Garmin Connect"""
+      from planner.cache import content_hash
+
+      return content_hash(self.workout_upload_json(workout))
+
+  def remember_upload(self, workout, workout_id, scheduled_date=None, digest=None):
+      """
+      Registra nella cache l'hash e il workoutId di un allenamento appena caricato,
+      usati da add_workouts(skip_unchanged=True) per saltare gli allenamenti invariati.
+      """
+      if self.cache:
+          self.cache.store_upload(workout.workout_name, workout_id,
+                                  digest or self.upload_hash(workout), scheduled_date)
+
   def _load_config(self):
       """Carica la configurazione da un file."""
       import os
@@ -74,38 +488,97 @@ class GarminClient():
 
   def delete_workout(self, workout_id):
     logging.info(f'deleting workout {workout_id}')
-    response = garth.connectapi(
-      '/workout-service/workout/' + workout_id, method="DELETE")
+    response = self._connectapi(
+      '/workout-service/workout/' + str(workout_id), method="DELETE")
+    if self.cache:
+      self.cache.forget_workout(workout_id)
+      self.cache.forget_upload(workout_id)
+      self.cache.invalidate_calendar()
     return response 
 
-  def get_workout(self, workout_id):
+  def get_workout(self, workout_id, refresh=False):
+    """
+    Restituisce il dettaglio di un allenamento. Il dettaglio in cache resta valido
+    finché la lista in cache non scade e l'updateDate dell'allenamento non cambia.
+
+    Args:
+        workout_id: ID dell'allenamento
+        refresh: Se True scarica sempre il dettaglio da Garmin Connect
+    """
+    if self.cache and not refresh:
+      cached = self.cache.get_workout_detail(workout_id)
+      if cached is not None:
+        logging.debug(f'workout {workout_id} dalla cache')
+        return cached
+
     logging.info(f'getting workout {workout_id}')
-    response = garth.connectapi(
+    response = self._connectapi(
       '/workout-service/workout/' + str(workout_id), method="GET")
+    if self.cache and isinstance(response, dict):
+      self.cache.store_workout_detail(workout_id, response)
     return response 
 
+  def get_workouts(self, workout_ids, max_in_flight=None, refresh=False, progress_callback=None):
+    """
+    Scarica i dettagli di più allenamenti in parallelo.
+
+    I dettagli ancora validi vengono letti dalla cache locale; gli altri sono
+    richiesti con al massimo max_in_flight richieste contemporanee.
+
+    Args:
+        workout_ids: ID degli allenamenti
+        max_in_flight: Numero massimo di richieste contemporanee (opzionale)
+        refresh: Se True scarica sempre i dettagli da Garmin Connect
+        progress_callback: Funzione chiamata come progress_callback(completati, totale, risultato)
+            appena arriva ciascun dettaglio, per elaborarlo senza attendere gli altri
+
+    Returns:
+        list: Un dizionario per allenamento, nello stesso ordine di workout_ids, con le chiavi
+            'workout_id', 'detail' ed 'error'
+    """
+    def fetch(workout_id):
+      result = {'workout_id': workout_id, 'detail': None, 'error': None}
+      try:
+        result['detail'] = self.get_workout(workout_id, refresh=refresh)
+      except Exception as e:
+        logging.error(f"Errore nel recupero dell'allenamento {workout_id}: {str(e)}")
+        result['error'] = str(e)
+      return result
+
+    return self.run_pooled(fetch, workout_ids,
+                            max_in_flight=max_in_flight,
+                            progress_callback=progress_callback)
+
   def update_workout(self, workout_id, workout):
     logging.info(f'updating workout {workout_id}')
-    wo_json = workout.garminconnect_json()
+    wo_json = self.workout_upload_json(workout)
     wo_json['workoutId'] = workout_id
-    response = garth.connectapi(
+    response = self._connectapi(
       '/workout-service/workout/' + str(workout_id), method="PUT", json=wo_json)
-    print(response)
+    logging.debug(f'update workout {workout_id}: {response}')
+    if self.cache:
+      self.cache.forget_workout(workout_id)
     return response 
 
 
-  def get_calendar(self, year, month):
+  def get_calendar(self, year, month, refresh=False):
       if not isinstance(month, int) or month < 1 or month > 12:
           logging.error(f"Invalid month value: {month}. Must be between 1 and 12.")
           raise ValueError(f"Month must be between 1 and 12, got {month}")
       
+      if self.cache and not refresh:
+          cached = self.cache.get_calendar_month(year, month)
+          if cached is not None:
+              logging.debug(f'calendar {year}-{month} from cache')
+              return cached
+      
       # Garmin API uses 0-based month indexing, so January = 0
       garmin_month = month - 1
       
       logging.info(f'getting calendar. Year: {year}, month: {month} (Garmin month index: {garmin_month})')
       
       try:
-          response = garth.connectapi(
+          response = self._connectapi(
               f'/calendar-service/year/{year}/month/{garmin_month}')
           
           # Add some debugging information
@@ -115,12 +588,58 @@ class GarminClient():
               logging.info(f"Calendar response for {year}-{month} contains {len(calendar_items)} items total, {len(workout_items)} workouts")
           else:
               logging.warning(f"Calendar response for {year}-{month} does not contain 'calendarItems' key")
+          
+          if self.cache and isinstance(response, dict):
+              self.cache.store_calendar_month(year, month, response)
               
           return response
       except Exception as e:
           logging.error(f"Error getting calendar for {year}-{month}: {str(e)}")
           raise
 
+  def get_calendar_range(self, start_date, end_date, max_in_flight=None, refresh=False):
+      """
+      Ottiene gli elementi del calendario di tutti i mesi compresi tra due date.
+
+      I mesi vengono richiesti in parallelo, quindi il tempo complessivo è
+      circa quello di una singola richiesta.
+
+      Args:
+          start_date (date): Data di inizio (conta solo anno e mese)
+          end_date (date): Data di fine (conta solo anno e mese)
+          max_in_flight (int, optional): Numero massimo di mesi richiesti contemporaneamente
+          refresh (bool, optional): Se True ignora i mesi presenti nella cache locale
+
+      Returns:
+          list: Elementi del calendario senza duplicati (per 'id'), ordinati per data
+      """
+      months = []
+      year, month = start_date.year, start_date.month
+      while (year, month) <= (end_date.year, end_date.month):
+          months.append((year, month))
+          month += 1
+          if month > 12:
+              year += 1
+              month = 1
+
+      responses = self.run_pooled(lambda year_month: self.get_calendar(*year_month, refresh=refresh), months,
+                                   max_in_flight=max_in_flight)
+
+      calendar_items = []
+      seen_ids = set()
+      for response in responses:
+          for item in (response or {}).get('calendarItems', []):
+              item_id = item.get('id')
+              if item_id is not None:
+                  if item_id in seen_ids:
+                      continue
+                  seen_ids.add(item_id)
+              calendar_items.append(item)
+
+      calendar_items.sort(key=lambda item: item.get('date') or '')
+      logging.info(f"Calendario {start_date} - {end_date}: {len(months)} mesi, {len(calendar_items)} elementi")
+      return calendar_items
+
   def get_activities(self, start_date=None, end_date=None, limit=20):
       """
       Ottiene le attività dell'utente da Garmin Connect.
@@ -158,7 +677,7 @@ class GarminClient():
           }
           
           logging.info(f"Chiamata API attività con parametri: {params}")
-          response = garth.connectapi(url, params=params)
+          response = self._connectapi(url, params=params)
           
           if response:
               logging.info(f"Trovate {len(response)} attività nel periodo {start_date} - {end_date}")
@@ -172,25 +691,86 @@ class GarminClient():
           # In caso di errore, ritorniamo una lista vuota invece di propagare l'errore
           return []
 
+  def get_activities_range(self, start_date, end_date, page_size=DEFAULT_ACTIVITY_PAGE_SIZE, page_callback=None):
+      """
+      Ottiene tutte le attività di un periodo, scorrendo le pagine della ricerca di Garmin Connect.
+
+      A differenza di get_activities non c'è un limite al numero di attività: le pagine
+      vengono richieste finché Garmin Connect ne restituisce una incompleta.
+
+      Args:
+          start_date (str): Data di inizio nel formato 'YYYY-MM-DD'
+          end_date (str): Data di fine nel formato 'YYYY-MM-DD'
+          page_size (int, optional): Attività richieste per pagina
+          page_callback (callable, optional): Chiamata come page_callback(attività_finora) dopo
+              ogni pagina; se solleva un'eccezione la ricerca si interrompe
+
+      Returns:
+          list: Attività del periodo, nell'ordine restituito da Garmin Connect
+      """
+      activities = []
+      start = 0
+      while True:
+          params = {
+              'startDate': start_date,
+              'endDate': end_date,
+              'start': start,
+              'limit': page_size
+          }
+          page = self._connectapi('/activitylist-service/activities/search/activities', params=params) or []
+          activities.extend(page)
+          if page_callback:
+              page_callback(len(activities))
+          if len(page) < page_size:
+              break
+          start += page_size
+
+      logging.info(f"Trovate {len(activities)} attività nel periodo {start_date} - {end_date} "
+                   f"({start // page_size + 1} pagine)")
+      return activities
+
   def schedule_workout(self, workout_id, date):
     date_formatted = date
     if type(date_formatted) is not str:
       date_formatted = date.strftime('%Y-%m-%d')
-    response = garth.connectapi(
+    response = self._connectapi(
       f'/workout-service/schedule/{workout_id}', method="POST",
       json={'date' :date_formatted})
+    if self.cache:
+      self.cache.invalidate_calendar()
     return response 
 
   def unschedule_workout(self, schedule_id):
-    response = garth.connectapi(
+    response = self._connectapi(
       f'/workout-service/schedule/{schedule_id}', method="DELETE")
+    if self.cache:
+      self.cache.invalidate_calendar()
     return response 
 
+  def unschedule_workout_on(self, workout_id, date):
+    """
+    Rimuove le programmazioni di un allenamento in una data.
+
+    Args:
+        workout_id: ID dell'allenamento
+        date: Data della programmazione ('YYYY-MM-DD' o date)
+
+    Returns:
+        int: Numero di programmazioni rimosse
+    """
+    date = str(date)
+    response = self.get_calendar(int(date[:4]), int(date[5:7]), refresh=True) or {}
+    schedule_ids = [item.get('id') for item in response.get('calendarItems', [])
+                    if item.get('itemType') == 'workout' and item.get('date') == date
+                    and str(item.get('workoutId')) == str(workout_id) and item.get('id') is not None]
+    for schedule_id in schedule_ids:
+      self.unschedule_workout(schedule_id)
+    return len(schedule_ids)
+
   def cmd_login(args):
       email = input('Enter email address: ')
       password = getpass('Enter password: ')
-      garth.login(email, password)
-      garth.save(args.oauth_folder)
+      SESSIONS.login(args.oauth_folder, email, password).save()
       
 def add_workout_from_yaml(self, workout_name, steps, sport_type=None, config=None):
     """
@@ -206,11 +786,13 @@ def add_workout_from_yaml(self, workout_name, steps, sport_type=None, config=Non
         Risposta dall'API di Garmin Connect
     """
     from planner.workout import Workout
+    from planner.zones import ZoneTable
     
     # Prepara i dati di configurazione
     paces = {}
     heart_rates = {}
     swim_paces = {}
+    workout_config = {}
     
     if config and 'workout_config' in config:
         workout_config = config['workout_config']
@@ -235,7 +817,8 @@ def add_workout_from_yaml(self, workout_name, steps, sport_type=None, config=Non
         steps,
         sport_type=sport_type,
         paces=paces,
-        heart_rates=heart_rates
+        heart_rates=heart_rates,
+        zones=ZoneTable.from_config(workout_config)
     )
     
     # Converti distanza a tempo se necessario (per tapis roulant)
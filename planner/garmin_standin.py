@@ -0,0 +1,365 @@
+#! /usr/bin/env python
+
+"""
+Server HTTP locale che sostituisce Garmin Connect per test e benchmark.
+
+Implementa, con uno stato in memoria, gli endpoint usati da GarminClient:
+lista, creazione, lettura, modifica e cancellazione degli allenamenti, loro
+pianificazione, calendario mensile e ricerca delle attività. Può aggiungere una
+latenza a ogni richiesta e restituire errori 429/503 con una certa probabilità,
+con un generatore casuale inizializzabile per ottenere esecuzioni riproducibili.
+
+GarminClient lo usa al posto di Garmin Connect quando riceve base_url (oppure
+quando è impostata la variabile d'ambiente GARMIN_CONNECT_BASE_URL):
+
+    with GarminStandIn(latency=0.05) as server:
+        client = GarminClient(base_url=server.url, cache=False)
+        client.list_workouts()
+
+Oppure da riga di comando:
+
+    python -m planner.garmin_standin --port 8765 --latency 0.05 --activities 200
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Tipi di attività usati per le attività sintetiche
+ACTIVITY_TYPES = ('running', 'cycling', 'lap_swimming', 'trail_running')
+
+
+class StandInState:
+    """Stato in memoria del server: allenamenti, pianificazioni e attività"""
+
+    def __init__(self, activities=0, seed=None):
+        """
+        Args:
+            activities: Numero di attività sintetiche da generare negli ultimi 365 giorni
+            seed: Seme del generatore casuale (None per un seme casuale)
+        """
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.workouts = {}
+        self.schedules = {}
+        self.activities = []
+        self._next_id = 1000
+        self.generate_activities(activities)
+
+    def next_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def generate_activities(self, count):
+        """Aggiunge count attività sintetiche distribuite negli ultimi 365 giorni"""
+        today = datetime.datetime.now().replace(hour=7, minute=0, second=0, microsecond=0)
+        for _ in range(count):
+            start = today - datetime.timedelta(days=self.random.randrange(365),
+                                               minutes=self.random.randrange(12 * 60))
+            type_key = self.random.choice(ACTIVITY_TYPES)
+            self.activities.append({
+                'activityId': self.next_id(),
+                'activityName': f"{type_key.replace('_', ' ').title()}",
+                'activityType': {'typeKey': type_key},
+                'startTimeLocal': start.strftime('%Y-%m-%d %H:%M:%S'),
+                'distance': round(self.random.uniform(3000, 25000), 1),
+                'duration': round(self.random.uniform(1200, 7200), 1),
+                'averageHR': self.random.randrange(120, 165),
+                'maxHR': self.random.randrange(165, 190),
+                'calories': self.random.randrange(200, 1500),
+            })
+        # Garmin Connect restituisce le attività dalla più recente
+        self.activities.sort(key=lambda activity: activity['startTimeLocal'], reverse=True)
+
+    def summary(self, workout):
+        """Riepilogo di un allenamento come nella lista del servizio workout"""
+        return {key: workout.get(key) for key in
+                ('workoutId', 'workoutName', 'description', 'sportType', 'createdDate', 'updateDate')}
+
+
+def _error(status, message, headers=None):
+    return status, {'message': message}, headers or {}
+
+
+class GarminStandIn:
+    """
+    Server HTTP che imita gli endpoint di Garmin Connect usati da GarminClient.
+
+    Le richieste sono servite da un thread per connessione, come le richieste
+    parallele delle operazioni massive; le statistiche per endpoint sono
+    disponibili con stats() o con GET /__standin/stats.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 throttle_rate=0.0, retry_after=1, activities=0, seed=None):
+        """
+        Args:
+            host: Indirizzo di ascolto
+            port: Porta di ascolto (0 per una porta libera qualsiasi)
+            latency: Secondi di latenza aggiunti a ogni richiesta
+            jitter: Variazione casuale massima della latenza, in secondi
+            error_rate: Probabilità che una richiesta fallisca con 503
+            throttle_rate: Probabilità che una richiesta venga rifiutata con 429
+            retry_after: Valore dell'header Retry-After delle risposte 429 (None per ometterlo)
+            activities: Numero di attività sintetiche
+            seed: Seme del generatore casuale per latenze, errori e attività
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.state = StandInState(activities=activities, seed=seed)
+        self._stats = {}
+        self._thread = None
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logging.debug("stand-in: " + format % args)
+
+            def _handle(self):
+                standin._serve(self)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        """URL di base da passare a GarminClient"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Avvia il server in un thread in background"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="garmin-standin", daemon=True)
+        self._thread.start()
+        logging.info(f"Stand-in di Garmin Connect in ascolto su {self.url}")
+        return self
+
+    def stop(self):
+        """Ferma il server"""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        """Richieste servite per endpoint, come {"GET /workout-service/workouts": {"count": .., "errors": ..}}"""
+        with self.state.lock:
+            return {key: dict(value) for key, value in sorted(self._stats.items())}
+
+    def reset(self):
+        """Svuota allenamenti, pianificazioni e statistiche (le attività restano)"""
+        with self.state.lock:
+            self.state.workouts.clear()
+            self.state.schedules.clear()
+            self._stats.clear()
+
+    # --- Gestione delle richieste ---
+
+    def _serve(self, handler):
+        parts = urlsplit(handler.path)
+        path = parts.path.rstrip('/') or '/'
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = None
+        if length:
+            try:
+                body = json.loads(handler.rfile.read(length))
+            except ValueError:
+                body = None
+
+        status, payload, headers = self._dispatch(handler.command, path, query, body)
+
+        data = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, str(value))
+        if data:
+            handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        if data:
+            handler.wfile.write(data)
+
+    def _dispatch(self, method, path, query, body):
+        if path == '/__standin/stats':
+            return 200, self.stats(), {}
+        if path == '/__standin/reset' and method == 'POST':
+            self.reset()
+            return 204, None, {}
+
+        route, handler = self._route(method, path)
+        key = f"{method} {route}"
+
+        delay = self.latency + (self.state.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        with self.state.lock:
+            stats = self._stats.setdefault(key, {'count': 0, 'errors': 0})
+            stats['count'] += 1
+            roll = self.state.random.random()
+            if roll < self.throttle_rate:
+                stats['errors'] += 1
+                headers = {} if self.retry_after is None else {'Retry-After': self.retry_after}
+                return _error(429, "Too Many Requests", headers)
+            if roll < self.throttle_rate + self.error_rate:
+                stats['errors'] += 1
+                return _error(503, "Service Unavailable")
+            if handler is None:
+                stats['errors'] += 1
+                return _error(404, f"Endpoint non gestito: {method} {path}")
+            try:
+                return handler(query, body)
+            except KeyError as e:
+                stats['errors'] += 1
+                return _error(404, f"Elemento non trovato: {e}")
+
+    def _route(self, method, path):
+        """Restituisce la forma normalizzata del percorso (per le statistiche) e la funzione che lo gestisce"""
+        routes = (
+            ('GET', r'/workout-service/workouts', self._list_workouts),
+            ('POST', r'/workout-service/workout', self._create_workout),
+            ('GET', r'/workout-service/workout/(\d+)', self._get_workout),
+            ('PUT', r'/workout-service/workout/(\d+)', self._update_workout),
+            ('DELETE', r'/workout-service/workout/(\d+)', self._delete_workout),
+            ('POST', r'/workout-service/schedule/(\d+)', self._schedule_workout),
+            ('DELETE', r'/workout-service/schedule/(\d+)', self._unschedule_workout),
+            ('GET', r'/calendar-service/year/(\d+)/month/(\d+)', self._calendar_month),
+            ('GET', r'/activitylist-service/activities/search/activities', self._search_activities),
+        )
+        for route_method, pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                args = [int(group) for group in match.groups()]
+                return re.sub(r'\(\\d\+\)', '{id}', pattern), lambda query, body: handler(*args, query, body)
+        return path, None
+
+    def _list_workouts(self, query, body):
+        # Come in GarminClient.iter_workouts, start indica il primo elemento a partire da 1
+        start = max(int(query.get('start', 1)) - 1, 0)
+        limit = int(query.get('limit', 100))
+        workouts = sorted(self.state.workouts.values(), key=lambda workout: workout['workoutId'])
+        return 200, [self.state.summary(workout) for workout in workouts[start:start + limit]], {}
+
+    def _create_workout(self, query, body):
+        now = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S.0')
+        workout = dict(body or {}, workoutId=self.state.next_id(), createdDate=now, updateDate=now)
+        self.state.workouts[workout['workoutId']] = workout
+        return 200, workout, {}
+
+    def _get_workout(self, workout_id, query, body):
+        return 200, self.state.workouts[workout_id], {}
+
+    def _update_workout(self, workout_id, query, body):
+        workout = self.state.workouts[workout_id]
+        updated = dict(body or {}, workoutId=workout_id, createdDate=workout['createdDate'],
+                       updateDate=datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%f'))
+        self.state.workouts[workout_id] = updated
+        return 204, None, {}
+
+    def _delete_workout(self, workout_id, query, body):
+        del self.state.workouts[workout_id]
+        for schedule_id in [schedule_id for schedule_id, schedule in self.state.schedules.items()
+                            if schedule['workoutId'] == workout_id]:
+            del self.state.schedules[schedule_id]
+        return 204, None, {}
+
+    def _schedule_workout(self, workout_id, query, body):
+        workout = self.state.workouts[workout_id]
+        date = (body or {}).get('date')
+        if not date:
+            return _error(400, "Data mancante")
+        schedule_id = self.state.next_id()
+        self.state.schedules[schedule_id] = {'workoutId': workout_id, 'date': date}
+        return 200, {'workoutScheduleId': schedule_id, 'workout': self.state.summary(workout),
+                     'calendarDate': date}, {}
+
+    def _unschedule_workout(self, schedule_id, query, body):
+        del self.state.schedules[schedule_id]
+        return 204, None, {}
+
+    def _calendar_month(self, year, garmin_month, query, body):
+        # Garmin Connect numera i mesi da 0
+        prefix = f"{year}-{garmin_month + 1:02d}-"
+        items = []
+        for schedule_id, schedule in sorted(self.state.schedules.items()):
+            if not schedule['date'].startswith(prefix):
+                continue
+            workout = self.state.workouts.get(schedule['workoutId'], {})
+            items.append({
+                'id': schedule_id,
+                'itemType': 'workout',
+                'workoutId': schedule['workoutId'],
+                'title': workout.get('workoutName'),
+                'date': schedule['date'],
+                'sportTypeKey': (workout.get('sportType') or {}).get('sportTypeKey'),
+            })
+        for activity in self.state.activities:
+            if activity['startTimeLocal'].startswith(prefix):
+                items.append({
+                    'id': activity['activityId'],
+                    'itemType': 'activity',
+                    'title': activity['activityName'],
+                    'date': activity['startTimeLocal'][:10],
+                })
+        return 200, {'startDayOfMonth': 0, 'numOfDaysInMonth': 31, 'calendarItems': items}, {}
+
+    def _search_activities(self, query, body):
+        start_date = query.get('startDate', '0000-00-00')
+        end_date = query.get('endDate', '9999-99-99')
+        start = int(query.get('start', 0))
+        limit = int(query.get('limit', 20))
+        matching = [activity for activity in self.state.activities
+                    if start_date <= activity['startTimeLocal'][:10] <= end_date]
+        return 200, matching[start:start + limit], {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server locale che sostituisce Garmin Connect per test e benchmark")
+    parser.add_argument("--host", default="127.0.0.1", help="Indirizzo di ascolto")
+    parser.add_argument("--port", type=int, default=8765, help="Porta di ascolto")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latenza aggiunta a ogni richiesta (secondi)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variazione casuale massima della latenza (secondi)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilità di una risposta 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probabilità di una risposta 429")
+    parser.add_argument("--activities", type=int, default=0, help="Numero di attività sintetiche")
+    parser.add_argument("--seed", type=int, help="Seme del generatore casuale")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = GarminStandIn(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                           activities=args.activities, seed=args.seed)
+    print(f"Stand-in di Garmin Connect su {server.url} (GARMIN_CONNECT_BASE_URL={server.url})")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
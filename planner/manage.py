@@ -11,7 +11,7 @@ def cmd_list_scheduled(args):
     print(workouts)
 
 def get_scheduled(args):
-    start_date = datetime.datetime.today()
+    start_date = datetime.datetime.today().date()
     end_date = None
     if args.start_date:
         start_date = datetime.datetime.strptime(args.start_date, '%Y-%m-%d').date()
@@ -39,40 +39,24 @@ def get_scheduled(args):
 
     client = GarminClient(args.oauth_folder)
     matching_workouts = []
-    search_year = start_date.year
-    search_month = start_date.month
-    while True:
-        response = client.get_calendar(search_year, search_month)
-        found_workouts = 0
-        calendar_items = response.get('calendarItems', [])
-        for item in calendar_items:
-            if item.get('itemType', '') == 'workout':
-                workout_name = item.get('title', '')
-                workout_id = item.get('workoutId', None)
-                schedule_id = item.get('id', None)
-                schedule_date = item.get('date', None)
-                if args.name_filter:
-                    if not re.search(args.name_filter, workout_name):
-                        logging.debug(f'workout name does not match [{schedule_date}, {schedule_id}]: {workout_name} ({workout_id})')
-                        continue
-                date_cmp = datetime.datetime.strptime(schedule_date, '%Y-%m-%d').date()
-                if date_cmp < start_date or (end_date and date_cmp > end_date):
-                    logging.debug(f'date out bounds for workout[{schedule_date}, {schedule_id}]: {workout_name} ({workout_id})')
-                else:
-                    logging.debug(f'found scheduled workout[{schedule_date}, {schedule_id}]: {workout_name} ({workout_id})')
-                    matching_workouts.append(item)
-
-        # if no workouts were fount in the latest iteration
-        if not end_date and found_workouts == 0:
-            break
-        # continue looking for workouts the followin month
-        search_month += 1
-        if search_month > 12:
-            search_year += 1
-            search_month = 1
-        # until the next month is out of bounds
-        if end_date and datetime.date(year=search_year, month=search_month, day=1) > end_date:
-            break
+    # without an end date only the month of the start date is searched
+    calendar_items = client.get_calendar_range(start_date, end_date or start_date)
+    for item in calendar_items:
+        if item.get('itemType', '') == 'workout':
+            workout_name = item.get('title', '')
+            workout_id = item.get('workoutId', None)
+            schedule_id = item.get('id', None)
+            schedule_date = item.get('date', None)
+            if args.name_filter:
+                if not re.search(args.name_filter, workout_name):
+                    logging.debug(f'workout name does not match [{schedule_date}, {schedule_id}]: {workout_name} ({workout_id})')
+                    continue
+            date_cmp = datetime.datetime.strptime(schedule_date, '%Y-%m-%d').date()
+            if date_cmp < start_date or (end_date and date_cmp > end_date):
+                logging.debug(f'date out bounds for workout[{schedule_date}, {schedule_id}]: {workout_name} ({workout_id})')
+            else:
+                logging.debug(f'found scheduled workout[{schedule_date}, {schedule_id}]: {workout_name} ({workout_id})')
+                matching_workouts.append(item)
     return matching_workouts
 
 # def cmd_list_scheduled(args): # 
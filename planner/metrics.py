@@ -0,0 +1,177 @@
+#! /usr/bin/env python
+
+"""
+Metriche leggere per i percorsi critici: contatori, timer e istogrammi.
+
+Le misure vengono raccolte in memoria in un registro thread-safe e sono
+consultabili in qualsiasi momento con snapshot(), senza dover analizzare il log.
+Ogni serie conserva conteggio, totale, minimo e massimo più gli ultimi
+SAMPLE_SIZE valori, da cui vengono calcolati i percentili.
+
+    from planner import metrics
+
+    with metrics.timer("http.GET /workout-service/workouts"):
+        ...
+    metrics.increment("http.retries")
+    metrics.snapshot()
+
+Le metriche si disattivano impostando la variabile d'ambiente
+GARMIN_PLANNER_METRICS=0 oppure con set_enabled(False).
+"""
+
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+# Valori recenti conservati per serie per il calcolo dei percentili
+SAMPLE_SIZE = 1024
+
+
+class Series:
+    """Serie di valori: conteggio, totale, minimo, massimo e campioni recenti"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.samples.append(value)
+
+    def summary(self):
+        """Riepilogo della serie con media e percentili 50, 95 e 99"""
+        ordered = sorted(self.samples)
+
+        def percentile(fraction):
+            if not ordered:
+                return None
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+        }
+
+
+class Registry:
+    """Registro thread-safe di contatori, timer (in secondi) e istogrammi"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timers = {}
+        self._histograms = {}
+        self._started = time.time()
+
+    def increment(self, name, value=1):
+        """Incrementa un contatore"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Aggiunge un valore a un istogramma (ad esempio una dimensione o un numero di elementi)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._histograms.get(name)
+            if series is None:
+                series = self._histograms[name] = Series()
+            series.add(value)
+
+    def record_time(self, name, seconds):
+        """Registra una durata in secondi"""
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._timers.get(name)
+            if series is None:
+                series = self._timers[name] = Series()
+            series.add(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Misura la durata del blocco, anche se termina con un'eccezione"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decoratore che misura ogni chiamata della funzione"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record_time(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """
+        Fotografia delle metriche raccolte.
+
+        Returns:
+            dict: Con le chiavi 'since' (timestamp di inizio raccolta), 'counters',
+                'timers' e 'histograms'; timer e istogrammi sono riepiloghi di Series
+        """
+        with self._lock:
+            return {
+                'since': self._started,
+                'counters': dict(sorted(self._counters.items())),
+                'timers': {name: series.summary() for name, series in sorted(self._timers.items())},
+                'histograms': {name: series.summary() for name, series in sorted(self._histograms.items())},
+            }
+
+    def reset(self):
+        """Azzera tutte le metriche"""
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+            self._histograms.clear()
+            self._started = time.time()
+
+
+# Registro predefinito usato dai moduli del progetto
+REGISTRY = Registry(enabled=os.environ.get('GARMIN_PLANNER_METRICS', '1') != '0')
+
+increment = REGISTRY.increment
+observe = REGISTRY.observe
+record_time = REGISTRY.record_time
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+snapshot = REGISTRY.snapshot
+reset = REGISTRY.reset
+
+
+def set_enabled(enabled):
+    """Attiva o disattiva la raccolta nel registro predefinito"""
+    REGISTRY.enabled = bool(enabled)
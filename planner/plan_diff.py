@@ -0,0 +1,473 @@
+#! /usr/bin/env python
+
+"""
+Confronto strutturale tra gli allenamenti di un piano e quelli di Garmin Connect.
+
+Entrambi i lati vengono ridotti allo stesso albero normalizzato di step (tuple
+confrontabili e hashabili) a partire dal JSON di Garmin Connect: quello che il
+planner invierebbe per gli allenamenti locali e il dettaglio scaricato per quelli
+remoti. Il confronto, per nome, produce un PlanDiff con gli allenamenti aggiunti,
+rimossi, modificati (con le differenze step per step) e ripianificati; apply_diff
+esegue solo le richieste necessarie:
+
+    nuovo allenamento        POST workout (+ POST schedule se ha una data)
+    allenamento modificato   PUT workout
+    allenamento rimosso      DELETE workout (solo se richiesto)
+    data cambiata            DELETE schedule della vecchia data + POST schedule
+
+    diff = compute_diff(client, workouts, dates, managed_names=...)
+    print(diff.describe())
+    apply_diff(client, diff, delete_removed=True)
+
+Vengono considerate solo le date da oggi in avanti: le programmazioni passate non
+vengono mai toccate. Gli allenamenti locali senza data non vengono deprogrammati,
+perché la data nel piano è facoltativa e la pianificazione può essere stata fatta
+dal calendario.
+"""
+
+import datetime
+import difflib
+import logging
+
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+RESCHEDULED = 'rescheduled'
+
+# Cifre decimali conservate nei valori numerici (ritmi in m/s, battiti, secondi, metri)
+VALUE_DIGITS = 3
+
+
+def _number(value):
+    if value is None or isinstance(value, bool):
+        return value
+    try:
+        return round(float(value), VALUE_DIGITS)
+    except (TypeError, ValueError):
+        return value
+
+
+def normalize_step(step):
+    """
+    Riduce uno step del JSON di Garmin Connect a una tupla confrontabile.
+
+    Le ripetute diventano ('repeat', iterazioni, substep), gli altri step
+    ('step', tipo, condizione di fine, valore, tipo di target, limite inferiore,
+    limite superiore, zona, descrizione). Campi come stepId e stepOrder, che
+    dipendono da Garmin Connect o dalla posizione, vengono ignorati.
+    """
+    step_type = (step.get('stepType') or {}).get('stepTypeKey')
+    if step.get('type') == 'RepeatGroupDTO' or step_type == 'repeat':
+        iterations = step.get('numberOfIterations', step.get('endConditionValue'))
+        return ('repeat', int(_number(iterations) or 1),
+                tuple(normalize_step(substep) for substep in step.get('workoutSteps') or []))
+
+    target_type = (step.get('targetType') or {}).get('workoutTargetTypeKey') or 'no.target'
+    has_target = target_type != 'no.target'
+    return (
+        'step',
+        step_type,
+        (step.get('endCondition') or {}).get('conditionTypeKey'),
+        _number(step.get('endConditionValue')),
+        target_type,
+        _number(step.get('targetValueOne')) if has_target else None,
+        _number(step.get('targetValueTwo')) if has_target else None,
+        step.get('zoneNumber') if has_target else None,
+        step.get('description') or '',
+    )
+
+
+def normalize_workout(workout_json):
+    """
+    Albero normalizzato di un allenamento nel formato JSON di Garmin Connect.
+
+    Returns:
+        tuple: (tipo di sport, tupla degli step normalizzati di tutti i segmenti)
+    """
+    sport_type = (workout_json.get('sportType') or {}).get('sportTypeKey')
+    steps = tuple(normalize_step(step)
+                  for segment in workout_json.get('workoutSegments') or []
+                  for step in segment.get('workoutSteps') or [])
+    return sport_type, steps
+
+
+def format_step(step):
+    """Descrizione leggibile di uno step normalizzato"""
+    if step[0] == 'repeat':
+        return f"repeat {step[1]} ({len(step[2])} step)"
+    _, step_type, condition, value, target_type, low, high, zone, description = step
+    text = f"{step_type} {condition}"
+    if value is not None:
+        text += f" {value:g}" if isinstance(value, float) else f" {value}"
+    if target_type != 'no.target':
+        text += f" {target_type} {low}-{high}"
+    if description:
+        text += f" -- {description}"
+    return text
+
+
+class StepChange:
+    """Differenza tra gli step di due allenamenti in una posizione dell'albero"""
+
+    def __init__(self, kind, path, before=None, after=None):
+        """
+        Args:
+            kind: ADDED, REMOVED o MODIFIED
+            path: Posizione dello step (tupla di indici a partire da 1, es. (3, 2)
+                per il secondo substep del terzo step)
+            before: Step normalizzato remoto (None se aggiunto)
+            after: Step normalizzato locale (None se rimosso)
+        """
+        self.kind = kind
+        self.path = path
+        self.before = before
+        self.after = after
+
+    def describe(self):
+        if not self.path:
+            # Cambio del tipo di sport dell'allenamento
+            return f"sport modificato: {self.before[1]} -> {self.after[1]}"
+        position = '.'.join(str(index) for index in self.path)
+        if self.kind == ADDED:
+            return f"step {position} aggiunto: {format_step(self.after)}"
+        if self.kind == REMOVED:
+            return f"step {position} rimosso: {format_step(self.before)}"
+        return f"step {position} modificato: {format_step(self.before)} -> {format_step(self.after)}"
+
+    def __repr__(self):
+        return f"StepChange({self.kind!r}, {self.path!r})"
+
+
+def diff_steps(before, after, path=()):
+    """
+    Differenze step per step tra due sequenze di step normalizzati.
+
+    Le sequenze vengono allineate con difflib, così l'inserimento di uno step
+    non fa risultare modificati tutti quelli successivi. Due ripetute nella stessa
+    posizione vengono confrontate ricorsivamente se hanno lo stesso numero di
+    iterazioni.
+
+    Returns:
+        list: Oggetti StepChange
+    """
+    changes = []
+    matcher = difflib.SequenceMatcher(None, before, after, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+        for offset in range(paired):
+            old, new = before[i1 + offset], after[j1 + offset]
+            step_path = path + (j1 + offset + 1,)
+            if old[0] == new[0] == 'repeat' and old[1] == new[1]:
+                changes.extend(diff_steps(old[2], new[2], step_path))
+            else:
+                changes.append(StepChange(MODIFIED, step_path, old, new))
+        for index in range(i1 + paired, i2):
+            changes.append(StepChange(REMOVED, path + (index + 1,), before=before[index]))
+        for index in range(j1 + paired, j2):
+            changes.append(StepChange(ADDED, path + (index + 1,), after=after[index]))
+    return changes
+
+
+class WorkoutChange:
+    """Differenza di un allenamento tra il piano e Garmin Connect"""
+
+    def __init__(self, kind, name, workout=None, workout_id=None, steps=None,
+                 date=None, scheduled=None, plan_date=None):
+        """
+        Args:
+            kind: ADDED, REMOVED, MODIFIED o RESCHEDULED
+            name: Nome dell'allenamento
+            workout: Oggetto Workout locale (None se rimosso)
+            workout_id: workoutId remoto (None se aggiunto)
+            steps: Differenze step per step (solo per MODIFIED)
+            date: Data locale 'YYYY-MM-DD' da pianificare (None se non va pianificato)
+            scheduled: Dizionario schedule_id -> data delle programmazioni remote da rimuovere
+            plan_date: Data dell'allenamento nel piano, anche se già pianificata
+        """
+        self.kind = kind
+        self.name = name
+        self.workout = workout
+        self.workout_id = workout_id
+        self.steps = steps or []
+        self.date = date
+        self.scheduled = scheduled or {}
+        self.plan_date = plan_date
+
+    def operations(self, delete_removed=False):
+        """
+        Richieste necessarie per allineare Garmin Connect al piano.
+
+        Returns:
+            list: Tuple (operazione, argomento) con operazione tra 'create', 'update',
+                'delete', 'unschedule' (argomento: schedule_id) e 'schedule' (argomento: data)
+        """
+        if self.kind == REMOVED:
+            return [('delete', self.workout_id)] if delete_removed else []
+        operations = []
+        if self.kind == ADDED:
+            operations.append(('create', None))
+        elif self.kind == MODIFIED:
+            operations.append(('update', self.workout_id))
+        operations.extend(('unschedule', schedule_id) for schedule_id in self.scheduled)
+        if self.date:
+            operations.append(('schedule', self.date))
+        return operations
+
+    def describe(self):
+        """Righe di testo che descrivono la differenza"""
+        lines = []
+        if self.kind == ADDED:
+            lines.append(f"+ {self.name}" + (f" (pianificato il {self.date})" if self.date else ""))
+        elif self.kind == REMOVED:
+            lines.append(f"- {self.name}")
+        else:
+            old_dates = ", ".join(sorted(self.scheduled.values()))
+            moved = f" ({old_dates or 'non pianificato'} -> {self.date or 'non pianificato'})" \
+                if self.scheduled or self.date else ""
+            lines.append(f"~ {self.name}{moved}")
+            lines.extend(f"    {change.describe()}" for change in self.steps)
+        return lines
+
+    def __repr__(self):
+        return f"WorkoutChange({self.kind!r}, {self.name!r})"
+
+
+class PlanDiff:
+    """Insieme delle differenze tra il piano e Garmin Connect"""
+
+    def __init__(self, changes, unchanged=0):
+        self.changes = changes
+        self.unchanged = unchanged
+
+    def _of_kind(self, kind):
+        return [change for change in self.changes if change.kind == kind]
+
+    @property
+    def added(self):
+        return self._of_kind(ADDED)
+
+    @property
+    def removed(self):
+        return self._of_kind(REMOVED)
+
+    @property
+    def modified(self):
+        return self._of_kind(MODIFIED)
+
+    @property
+    def rescheduled(self):
+        return self._of_kind(RESCHEDULED)
+
+    def is_empty(self, delete_removed=False):
+        """True se non serve nessuna richiesta per allineare Garmin Connect"""
+        return not self.operations(delete_removed)
+
+    def operations(self, delete_removed=False):
+        """Tutte le richieste necessarie come tuple (nome allenamento, operazione, argomento)"""
+        return [(change.name, operation, argument)
+                for change in self.changes
+                for operation, argument in change.operations(delete_removed)]
+
+    def summary(self):
+        """Conteggi per tipo di differenza"""
+        return {
+            ADDED: len(self.added),
+            REMOVED: len(self.removed),
+            MODIFIED: len(self.modified),
+            RESCHEDULED: len(self.rescheduled),
+            'unchanged': self.unchanged,
+        }
+
+    def describe(self):
+        """Descrizione testuale di tutte le differenze"""
+        lines = []
+        for change in self.changes:
+            lines.extend(change.describe())
+        return "\n".join(lines)
+
+
+def _date_string(value):
+    if value is None:
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def diff_plan(local, remote, schedules=None, managed_names=None, today=None):
+    """
+    Confronta gli allenamenti del piano con quelli di Garmin Connect.
+
+    Args:
+        local: Lista di tuple (Workout, json, data) per gli allenamenti del piano, dove json
+            è il JSON che verrebbe inviato a Garmin Connect e data è 'YYYY-MM-DD' o None
+        remote: Dizionario nome -> dettaglio dell'allenamento scaricato da Garmin Connect
+            (deve contenere workoutId)
+        schedules: Elementi 'workout' del calendario di Garmin Connect (opzionale)
+        managed_names: Nomi degli allenamenti remoti gestiti dal planner: solo questi
+            possono risultare rimossi (default nessuno)
+        today: Data da cui considerare le programmazioni (default oggi)
+
+    Returns:
+        PlanDiff
+    """
+    today = _date_string(today or datetime.date.today())
+
+    # Programmazioni future per workoutId
+    scheduled_by_id = {}
+    for item in schedules or []:
+        date = item.get('date')
+        if item.get('itemType', 'workout') == 'workout' and date and date >= today:
+            scheduled_by_id.setdefault(str(item.get('workoutId')), {})[item.get('id')] = date
+
+    changes = []
+    unchanged = 0
+    local_names = set()
+    for workout, workout_json, date in local:
+        name = workout.workout_name
+        local_names.add(name)
+        date = _date_string(date)
+        if date and date < today:
+            date = None
+
+        plan_date = date
+        detail = remote.get(name)
+        if detail is None:
+            changes.append(WorkoutChange(ADDED, name, workout=workout, date=date, plan_date=plan_date))
+            continue
+
+        workout_id = detail.get('workoutId')
+        sport_before, steps_before = normalize_workout(detail)
+        sport_after, steps_after = normalize_workout(workout_json)
+
+        # Solo le date presenti nel piano vengono allineate
+        scheduled = scheduled_by_id.get(str(workout_id), {})
+        obsolete = {}
+        if date:
+            obsolete = {schedule_id: old for schedule_id, old in scheduled.items() if old != date}
+            if date in scheduled.values():
+                date = None
+
+        if sport_before != sport_after or steps_before != steps_after:
+            steps = diff_steps(steps_before, steps_after)
+            if sport_before != sport_after:
+                steps.insert(0, StepChange(MODIFIED, (), ('sport', sport_before), ('sport', sport_after)))
+            changes.append(WorkoutChange(MODIFIED, name, workout=workout, workout_id=workout_id,
+                                         steps=steps, date=date, scheduled=obsolete, plan_date=plan_date))
+        elif date or obsolete:
+            changes.append(WorkoutChange(RESCHEDULED, name, workout=workout, workout_id=workout_id,
+                                         date=date, scheduled=obsolete, plan_date=plan_date))
+        else:
+            unchanged += 1
+
+    for name in sorted(set(managed_names or ()) - local_names):
+        detail = remote.get(name)
+        if detail is not None:
+            changes.append(WorkoutChange(REMOVED, name, workout_id=detail.get('workoutId')))
+
+    return PlanDiff(changes, unchanged)
+
+
+def compute_diff(client, workouts, dates=None, managed_names=None, progress_callback=None):
+    """
+    Scarica da Garmin Connect lo stato necessario e lo confronta con il piano.
+
+    Vengono richiesti la lista degli allenamenti, i dettagli dei soli allenamenti
+    con lo stesso nome di uno del piano o gestiti dal planner (letti dalla cache
+    locale se non sono cambiati) e i mesi di calendario tra oggi e l'ultima data
+    del piano.
+
+    Args:
+        client: GarminClient connesso
+        workouts: Oggetti Workout del piano
+        dates: Date degli allenamenti, una per allenamento (opzionale)
+        managed_names: Nomi degli allenamenti remoti che possono risultare rimossi (opzionale)
+        progress_callback: Passata a GarminClient.get_workouts
+
+    Returns:
+        PlanDiff
+    """
+    workouts = list(workouts)
+    dates = [_date_string(date) for date in dates] if dates is not None else [None] * len(workouts)
+    wanted = {workout.workout_name for workout in workouts} | set(managed_names or ())
+
+    # Con nomi duplicati su Garmin Connect vale il primo della lista
+    remote_ids = {}
+    for summary in client.iter_workouts(refresh=True, fields=('workoutId', 'workoutName')):
+        if summary['workoutName'] in wanted:
+            remote_ids.setdefault(summary['workoutName'], summary['workoutId'])
+
+    remote = {}
+    for result in client.get_workouts(list(remote_ids.values()), progress_callback=progress_callback):
+        if result['error']:
+            raise RuntimeError(f"Impossibile scaricare l'allenamento {result['workout_id']}: {result['error']}")
+        if isinstance(result['detail'], dict):
+            detail = dict(result['detail'], workoutId=result['workout_id'])
+            remote[detail.get('workoutName')] = detail
+
+    today = datetime.date.today()
+    schedules = []
+    future_dates = [date for date in dates if date and date >= today.strftime('%Y-%m-%d')]
+    if remote and future_dates:
+        last = datetime.datetime.strptime(max(future_dates), '%Y-%m-%d').date()
+        schedules = [item for item in client.get_calendar_range(today, last, refresh=True)
+                     if item.get('itemType') == 'workout']
+
+    local = [(workout, client.workout_upload_json(workout), date) for workout, date in zip(workouts, dates)]
+    diff = diff_plan(local, remote, schedules, managed_names, today)
+    logging.info(f"Differenze con Garmin Connect: {diff.summary()}")
+    return diff
+
+
+def apply_diff(client, diff, delete_removed=False, max_in_flight=None, progress_callback=None):
+    """
+    Esegue su Garmin Connect le richieste necessarie per applicare un PlanDiff.
+
+    Le operazioni di ciascun allenamento vengono eseguite in ordine (prima la
+    creazione, poi la pianificazione); allenamenti diversi sono elaborati in
+    parallelo con il pool del client.
+
+    Args:
+        client: GarminClient connesso
+        diff: PlanDiff calcolato da compute_diff
+        delete_removed: Se True elimina da Garmin Connect gli allenamenti rimossi dal piano
+        max_in_flight: Numero massimo di allenamenti elaborati in parallelo (opzionale)
+        progress_callback: Funzione chiamata come progress_callback(completati, totale, risultato)
+
+    Returns:
+        list: Un dizionario per differenza con le chiavi 'name', 'kind', 'workout_id',
+            'requests' (numero di richieste inviate) ed 'error'
+    """
+    def apply(change):
+        result = {'name': change.name, 'kind': change.kind, 'workout_id': change.workout_id,
+                  'requests': 0, 'error': None}
+        try:
+            for operation, argument in change.operations(delete_removed):
+                if operation == 'create':
+                    response = client.add_workout(change.workout)
+                    result['workout_id'] = (response or {}).get('workoutId')
+                    if result['workout_id'] is None:
+                        raise RuntimeError("Garmin Connect non ha restituito il workoutId")
+                elif operation == 'update':
+                    client.update_workout(argument, change.workout)
+                elif operation == 'delete':
+                    client.delete_workout(argument)
+                elif operation == 'unschedule':
+                    client.unschedule_workout(argument)
+                elif operation == 'schedule':
+                    client.schedule_workout(result['workout_id'], argument)
+                result['requests'] += 1
+        except Exception as e:
+            logging.error(f"Errore nella sincronizzazione dell'allenamento '{change.name}': {str(e)}")
+            result['error'] = str(e)
+
+        # Aggiorna l'indice usato da add_workouts(skip_unchanged=True)
+        if change.workout is not None and result['workout_id'] and not result['error']:
+            client.remember_upload(change.workout, result['workout_id'], change.plan_date)
+        return result
+
+    changes = [change for change in diff.changes if change.operations(delete_removed)]
+    return client.run_pooled(apply, changes, max_in_flight=max_in_flight,
+                              progress_callback=progress_callback)
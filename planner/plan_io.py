@@ -0,0 +1,125 @@
+#! /usr/bin/env python
+
+"""
+Lettura e scrittura dei piani di allenamento in formato YAML.
+
+Usa il loader e il dumper in C di libyaml (CSafeLoader/CSafeDumper) quando
+PyYAML è stato compilato con il supporto a libyaml, altrimenti le versioni
+in puro Python. Il dumper non genera alias/ancore e rappresenta gli OrderedDict
+come normali mappature. I commenti sugli allenamenti vengono scritti durante
+la serializzazione, senza rileggere e riscrivere il file.
+
+normalize_steps e normalize_plan convertono le ripetute nella forma abbreviata
+dei piani ("repeat N:") in quella accettata da Workout.from_yaml_steps.
+"""
+
+import re
+from collections import OrderedDict
+
+import yaml
+
+# Implementazioni in C di libyaml, se disponibili
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# True se si stanno usando le implementazioni in C
+LIBYAML = SafeLoader is not yaml.SafeLoader
+
+# Chiave delle ripetute nella forma abbreviata ("repeat 5:")
+REPEAT_KEY = re.compile(r'repeat\s+(\d+)$')
+
+
+class NoAliasDumper(_SafeDumper):
+    """Dumper YAML che non genera alias e supporta gli OrderedDict"""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+def _represent_ordered_dict(dumper, data):
+    return dumper.represent_dict(data.items())
+
+
+NoAliasDumper.add_representer(OrderedDict, _represent_ordered_dict)
+
+
+def load_plan(path):
+    """
+    Carica un file YAML.
+
+    Args:
+        path: Percorso del file
+
+    Returns:
+        Contenuto del file (None se il file è vuoto)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+def dump_plan(data, stream=None, comments=None, sort_keys=False):
+    """
+    Serializza un piano in YAML, con un eventuale commento accanto alle chiavi di primo livello.
+
+    Le chiavi di primo livello sono serializzate una alla volta: il commento
+    viene aggiunto alla prima riga di ciascuna prima di scriverla.
+
+    Args:
+        data: Dizionario del piano
+        stream: Percorso del file o oggetto file in cui scrivere (None per restituire una stringa)
+        comments: Dizionario {chiave: commento} (es. nome dell'allenamento: descrizione)
+        sort_keys: Se True, ordina le chiavi come yaml.dump
+
+    Returns:
+        str: Il documento YAML se stream è None, altrimenti None
+    """
+    if isinstance(stream, str):
+        with open(stream, 'w', encoding='utf-8') as f:
+            return dump_plan(data, f, comments, sort_keys)
+
+    if not comments or not isinstance(data, dict):
+        return yaml.dump(data, stream, Dumper=NoAliasDumper, default_flow_style=False,
+                         sort_keys=sort_keys)
+
+    chunks = []
+    items = sorted(data.items()) if sort_keys else data.items()
+    for key, value in items:
+        chunk = yaml.dump({key: value}, Dumper=NoAliasDumper, default_flow_style=False,
+                          sort_keys=sort_keys)
+        comment = comments.get(key)
+        first_line, _, rest = chunk.partition('\n')
+        # Il commento va sulla riga della chiave, solo se il valore inizia sulla riga successiva
+        if comment and first_line.endswith(':'):
+            comment = ' '.join(str(comment).split())
+            chunk = f"{first_line} # {comment}\n{rest}"
+        chunks.append(chunk)
+
+    text = ''.join(chunks)
+    if stream is None:
+        return text
+    stream.write(text)
+
+
+def normalize_steps(steps):
+    """
+    Converte la forma abbreviata dei piani ("repeat N:" seguito dalla lista degli step)
+    nella forma {'repeat': N, 'steps': [...]} accettata da Workout.from_yaml_steps.
+    """
+    normalized = []
+    for step in steps or []:
+        if isinstance(step, dict) and len(step) == 1:
+            key, value = next(iter(step.items()))
+            match = REPEAT_KEY.match(str(key).strip())
+            if match and isinstance(value, list):
+                normalized.append({'repeat': int(match.group(1)), 'steps': normalize_steps(value)})
+                continue
+        if isinstance(step, dict) and 'repeat' in step and 'steps' in step:
+            step = dict(step, steps=normalize_steps(step['steps']))
+        normalized.append(step)
+    return normalized
+
+
+def normalize_plan(plan):
+    """Piano con gli step di tutti gli allenamenti normalizzati (vedi normalize_steps)"""
+    return {name: normalize_steps(steps) if name != 'config' and isinstance(steps, list) else steps
+            for name, steps in plan.items()}
@@ -0,0 +1,270 @@
+#! /usr/bin/env python
+
+"""
+Limitazione della frequenza delle richieste e ripetizione dei tentativi verso Garmin Connect.
+
+Ogni richiesta consuma un gettone da un token bucket globale e da uno dedicato al
+servizio chiamato (workout-service, calendar-service, ...). Quando Garmin Connect
+risponde 429 la frequenza del servizio viene dimezzata e poi recuperata
+gradualmente con le risposte riuscite; le risposte 429 e 5xx vengono ripetute con
+un'attesa esponenziale con jitter, rispettando l'header Retry-After se presente.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+
+# Frequenza (richieste al secondo) e raffica massima del limite globale
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+
+# Frequenza e raffica massima per servizio
+ENDPOINT_BUDGETS = {
+    'workout-service': (8.0, 16),
+    'calendar-service': (6.0, 16),
+    'activitylist-service': (3.0, 6),
+}
+
+# Frequenza minima a cui un servizio può essere ridotto dopo le risposte 429
+MIN_RATE = 0.2
+
+# Richieste riuscite necessarie per recuperare un gettone al secondo di frequenza
+RECOVERY_STEPS = 20
+
+# Codici HTTP per cui la richiesta viene ripetuta
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def endpoint_of(path):
+    """Servizio di un percorso di Garmin Connect (es. '/workout-service/workout/1' -> 'workout-service')"""
+    return path.lstrip('/').split('/', 1)[0].split('?', 1)[0]
+
+
+def _response_of(error):
+    # garth incapsula l'HTTPError di requests in GarthHTTPError.error
+    for candidate in (error, getattr(error, 'error', None)):
+        response = getattr(candidate, 'response', None)
+        if response is not None:
+            return response
+    return None
+
+
+def http_status(error):
+    """Codice HTTP di un errore di garth/requests, oppure None se non disponibile"""
+    response = _response_of(error)
+    return getattr(response, 'status_code', None)
+
+
+def retry_after(error):
+    """
+    Secondi indicati dall'header Retry-After della risposta di errore.
+
+    Returns:
+        float: Secondi di attesa, oppure None se l'header manca o non è valido
+    """
+    response = _response_of(error)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Token bucket thread-safe con frequenza riducibile e recuperabile"""
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate: Gettoni aggiunti al secondo
+            capacity: Gettoni massimi accumulabili (raffica massima)
+        """
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.acquired = 0
+        self.waited = 0.0
+        self.throttled = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """
+        Prenota un gettone.
+
+        Returns:
+            float: Secondi da attendere prima di usare il gettone (0 se disponibile subito)
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            self.acquired += 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+            return wait
+
+    def throttle(self):
+        """Dimezza la frequenza dopo una risposta 429 e svuota i gettoni accumulati"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.throttled += 1
+            self._successes = 0
+
+    def recover(self):
+        """Riavvicina gradualmente la frequenza al valore iniziale dopo una richiesta riuscita"""
+        with self._lock:
+            if self.rate >= self.base_rate:
+                return
+            self._successes += 1
+            if self._successes >= RECOVERY_STEPS:
+                self._refill(time.monotonic())
+                self.rate = min(self.base_rate, self.rate + 1.0)
+                self._successes = 0
+
+    def state(self):
+        """Stato del bucket per il monitoraggio"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': self.rate,
+                'base_rate': self.base_rate,
+                'capacity': self.capacity,
+                'tokens': round(self.tokens, 3),
+                'acquired': self.acquired,
+                'waited': round(self.waited, 3),
+                'throttled': self.throttled,
+            }
+
+
+class RateLimiter:
+    """Limite globale più un limite per servizio di Garmin Connect"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, budgets=None):
+        """
+        Args:
+            rate: Richieste al secondo del limite globale
+            burst: Raffica massima del limite globale
+            budgets: Dizionario servizio -> (frequenza, raffica); default ENDPOINT_BUDGETS
+        """
+        self.total = TokenBucket(rate, burst)
+        self.budgets = dict(ENDPOINT_BUDGETS if budgets is None else budgets)
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint):
+        """Bucket di un servizio (None se il servizio non ha un limite dedicato)"""
+        if endpoint not in self.budgets:
+            return None
+        with self._lock:
+            if endpoint not in self.buckets:
+                self.buckets[endpoint] = TokenBucket(*self.budgets[endpoint])
+            return self.buckets[endpoint]
+
+    def acquire(self, path):
+        """
+        Attende il permesso di inviare una richiesta.
+
+        Returns:
+            float: Secondi di attesa
+        """
+        bucket = self.bucket(endpoint_of(path))
+        wait = self.total.reserve()
+        if bucket is not None:
+            wait = max(wait, bucket.reserve())
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self, path):
+        """Registra una risposta 429 per il servizio del percorso"""
+        self.total.throttle()
+        bucket = self.bucket(endpoint_of(path))
+        if bucket is not None:
+            bucket.throttle()
+
+    def succeeded(self, path):
+        """Registra una richiesta riuscita per il servizio del percorso"""
+        self.total.recover()
+        bucket = self.bucket(endpoint_of(path))
+        if bucket is not None:
+            bucket.recover()
+
+    def state(self):
+        """Stato del limite globale e di ciascun servizio"""
+        with self._lock:
+            buckets = dict(self.buckets)
+        return {
+            'total': self.total.state(),
+            'endpoints': {endpoint: bucket.state() for endpoint, bucket in sorted(buckets.items())},
+        }
+
+
+class RetryPolicy:
+    """Ripetizione delle richieste fallite con attesa esponenziale e jitter"""
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        """
+        Args:
+            max_attempts: Tentativi massimi per richiesta (compreso il primo)
+            base_delay: Attesa in secondi prima del secondo tentativo
+            max_delay: Attesa massima in secondi
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def should_retry(self, error, method, attempt):
+        """
+        Indica se una richiesta fallita va ripetuta.
+
+        Le POST creano nuovi allenamenti o programmazioni: vengono ripetute solo
+        dopo un 429, che garantisce che la richiesta non sia stata eseguita.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        status = http_status(error)
+        if status is None:
+            # Errori di connessione (requests.ConnectionError è un OSError)
+            return isinstance(error, OSError) and method.upper() != 'POST'
+        if status == 429:
+            return True
+        return status in RETRY_STATUSES and method.upper() != 'POST'
+
+    def delay(self, error, attempt):
+        """Secondi da attendere prima del tentativo successivo"""
+        with self._lock:
+            self.retries += 1
+        suggested = retry_after(error)
+        if suggested is not None:
+            return min(self.max_delay, suggested)
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(backoff / 2, backoff)
+
+    def state(self):
+        """Stato della politica per il monitoraggio"""
+        return {
+            'max_attempts': self.max_attempts,
+            'base_delay': self.base_delay,
+            'max_delay': self.max_delay,
+            'retries': self.retries,
+        }
@@ -4,16 +4,17 @@ import datetime
 
 from planner.garmin_client import GarminClient
 
+# number of months fetched at once while looking for workouts to unschedule
+UNSCHEDULE_WINDOW_MONTHS = 6
+
 def cmd_schedule_workouts(args):
     training_sessions = {}
     client = GarminClient(args.oauth_folder)
     logging.info(f'getting list of workouts.')
-    workouts_list = client.list_workouts()
-    wid_to_name = {}
-    for workout in workouts_list:
+    # workouts are streamed page by page and only the matching ones are kept
+    for workout in client.iter_workouts(fields=('workoutId', 'workoutName')):
         workout_name = workout['workoutName']
         workout_id = workout["workoutId"]
-        wid_to_name[workout_id] = workout_name
         if re.search(args.training_plan, workout['workoutName']):
             logging.info(f'found workout named "{workout_name}" with ID {workout_id}.')
             training_sessions[workout_id] = workout_name
@@ -93,10 +94,11 @@ def cmd_schedule_workouts(args):
     scheduled_plan = dict(sorted(scheduled_plan.items()))
     for k, v in scheduled_plan.items():
         for workout in v:
-            logging.info(f'scheduling workout {wid_to_name[workout]} ({workout}) on {k}')
+            logging.info(f'scheduling workout {training_sessions[workout]} ({workout}) on {k}')
             if not args.dry_run:
                 client.schedule_workout(workout, k)
-    return None
+    # date -> workout IDs, used by the batch CLI summary
+    return scheduled_plan
 
 
 def cmd_unschedule_workouts(args):
@@ -107,10 +109,14 @@ def cmd_unschedule_workouts(args):
     client = GarminClient(args.oauth_folder)
     search_year = start_date.year
     search_month = start_date.month
+    unscheduled = 0
     while True:
-        response = client.get_calendar(search_year, search_month)
+        # months are fetched in parallel, a window at a time
+        last_month = search_year * 12 + search_month - 1 + UNSCHEDULE_WINDOW_MONTHS - 1
+        window_start = datetime.date(search_year, search_month, 1)
+        window_end = datetime.date(last_month // 12, last_month % 12 + 1, 1)
         found_workouts = 0
-        calendar_items = response.get('calendarItems', [])
+        calendar_items = client.get_calendar_range(window_start, window_end)
         for item in calendar_items:
             if item.get('itemType', '') == 'workout':
                 workout_name = item.get('title', '')
@@ -124,11 +130,11 @@ def cmd_unschedule_workouts(args):
                     found_workouts += 1
                     logging.info(f'Unscheduling workout [{schedule_date}, {schedule_id}]: {workout_name} ({workout_id})')
                     client.unschedule_workout(schedule_id)
-        # if no workouts were fount in the latest iteration
+        unscheduled += found_workouts
+        # if no workouts were fount in the latest window
         if found_workouts == 0:
             break
-        # continue looking for workouts the followin month
-        search_month += 1
-        if search_month > 12:
-            search_year += 1
-            search_month = 1
+        # continue looking for workouts in the following window
+        search_year = (last_month + 1) // 12
+        search_month = (last_month + 1) % 12 + 1
+    return unscheduled
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sessioni garth isolate per account.
+
+Le funzioni di modulo di garth (resume, login, connectapi) agiscono su un unico
+client globale, per cui due account non possono essere usati insieme. Qui ogni
+cartella OAuth ha un proprio garth.Client, con i propri token e il proprio pool
+di connessioni; i GarminClient dello stesso account condividono la sessione
+attraverso SessionPool.
+"""
+
+import logging
+import os
+import threading
+
+
+def account_key(oauth_folder):
+    """Chiave di un account: il percorso assoluto della sua cartella OAuth"""
+    return os.path.abspath(os.path.expanduser(oauth_folder))
+
+
+class Session:
+    """
+    Client garth di un singolo account, con la stessa interfaccia di garth.connectapi.
+
+    Il token OAuth2 viene rinnovato prima della richiesta, una sola volta anche se
+    più thread lo trovano scaduto insieme, e salvato nella cartella dell'account.
+    """
+
+    def __init__(self, oauth_folder, client=None, persist=True):
+        """
+        Args:
+            oauth_folder: Cartella con i token OAuth dell'account
+            client: garth.Client già autenticato (default: caricato da oauth_folder)
+            persist: Se True i token rinnovati vengono salvati in oauth_folder
+        """
+        self.oauth_folder = account_key(oauth_folder)
+        if client is None:
+            import garth
+            client = garth.Client()
+            client.load(self.oauth_folder)
+        self.client = client
+        self.persist = persist
+        self.pool_size = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, path, method='GET', **kwargs):
+        self.ensure_token()
+        return self.client.connectapi(path, method=method, **kwargs)
+
+    def _token_valid(self):
+        token = self.client.oauth2_token
+        return token is not None and not getattr(token, 'expired', True)
+
+    def ensure_token(self):
+        """Rinnova il token OAuth2 se manca o è scaduto"""
+        if self._token_valid():
+            return
+        with self._lock:
+            if self._token_valid():
+                return
+            logging.info(f"Rinnovo del token OAuth2 per {self.oauth_folder}")
+            self.client.refresh_oauth2()
+            if self.persist:
+                try:
+                    self.client.dump(self.oauth_folder)
+                except OSError as e:
+                    logging.warning(f"Impossibile salvare il token OAuth in {self.oauth_folder}: {str(e)}")
+
+    def save(self):
+        """Salva i token nella cartella dell'account e mantiene salvati i rinnovi successivi"""
+        os.makedirs(self.oauth_folder, exist_ok=True)
+        self.client.dump(self.oauth_folder)
+        self.persist = True
+
+    def configure_pool(self, size):
+        """
+        Dimensiona il pool di connessioni keep-alive della sessione, in modo che
+        i thread delle operazioni massive non debbano riaprire connessioni.
+        Il pool non viene mai ridotto, perché la sessione è condivisa.
+        """
+        with self._lock:
+            if size <= self.pool_size:
+                return
+            try:
+                self.client.configure(pool_connections=size, pool_maxsize=size)
+            except TypeError:
+                # Versioni di garth che non permettono di configurare il pool
+                logging.debug("garth non supporta la configurazione del pool di connessioni")
+            self.pool_size = size
+
+
+class SessionPool:
+    """Sessioni garth indicizzate per account, condivise tra i thread"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, oauth_folder):
+        """
+        Sessione dell'account, caricata dalla cartella OAuth al primo utilizzo.
+
+        Returns:
+            Session
+        """
+        key = account_key(oauth_folder)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = Session(key)
+                self._sessions[key] = session
+            return session
+
+    def add(self, oauth_folder, client, persist=True):
+        """
+        Registra un garth.Client già autenticato, sostituendo la sessione precedente dell'account.
+
+        Returns:
+            Session
+        """
+        session = Session(oauth_folder, client=client, persist=persist)
+        with self._lock:
+            self._sessions[session.oauth_folder] = session
+        return session
+
+    def login(self, oauth_folder, email, password):
+        """
+        Effettua il login con un nuovo garth.Client e lo registra per l'account.
+
+        I token non vengono scritti su disco finché non si chiama save() sulla sessione.
+
+        Returns:
+            Session
+        """
+        import garth
+        client = garth.Client()
+        client.login(email, password)
+        return self.add(oauth_folder, client, persist=False)
+
+    def forget(self, oauth_folder):
+        """Elimina la sessione dell'account, ad esempio al logout"""
+        with self._lock:
+            self._sessions.pop(account_key(oauth_folder), None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def accounts(self):
+        """Cartelle OAuth degli account con una sessione aperta"""
+        with self._lock:
+            return sorted(self._sessions)
+
+
+# Pool predefinito, usato da GarminClient se non ne viene indicato un altro
+SESSIONS = SessionPool()
@@ -0,0 +1,252 @@
+#! /usr/bin/env python
+
+"""
+Grammatica condivisa per il testo degli step degli allenamenti.
+
+Tutti i punti che leggono righe come "15min @ pace2", "6km @hr lt_hr",
+"800m in 3:30", "lap-button @Z1_HR -- Premi lap" o "repeat 4:" usano
+questo modulo, così ottengono lo stesso risultato per lo stesso testo.
+
+Le espressioni regolari sono compilate una sola volta e il risultato
+dell'analisi di un dettaglio è memorizzato in una cache LRU con chiave
+(dettaglio, sport, impronta delle zone): le righe identiche di un piano
+vengono analizzate una volta sola.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Dimensione della cache dei dettagli analizzati
+PARSE_CACHE_SIZE = 4096
+
+# Separatore tra il dettaglio e la descrizione dello step
+DESCRIPTION_SEPARATOR = ' -- '
+
+# "tipo: dettaglio"
+STEP_LINE_RE = re.compile(r'^([\w-]+)\s*:\s*(.+)$')
+
+# "repeat 4:", "repeat 4" o "repeat 4: <step sulla stessa riga>"
+REPEAT_RE = re.compile(r'^repeat\s+(\d+)\s*(?::\s*(.*?))?\s*$', re.IGNORECASE)
+
+# "@ zona", "@zona", "@hr zona", "@pwr zona", "@spd zona"
+TARGET_RE = re.compile(r'@(?:(hr|pwr|spd)(?:\s+|$))?\s*(.*)$', re.IGNORECASE)
+
+# "5km", "400 m", "10min", "1.5h", "30s"
+QUANTITY_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(km|m|min|h|s)$', re.IGNORECASE)
+
+# "800m in 3:30": distanza con tempo obiettivo
+DISTANCE_IN_TIME_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(km|m)\s+in\s+(\d+:\d{2}(?::\d{2})?)$', re.IGNORECASE)
+
+# "mm:ss" o "h:mm:ss"
+CLOCK_RE = re.compile(r'^(\d+):(\d{2})(?::(\d{2}))?$')
+
+# "4": numero di ripetizioni
+ITERATIONS_RE = re.compile(r'^\d+$')
+
+# Fattori di conversione verso secondi e metri
+_SECONDS = {'h': 3600, 'min': 60, 's': 1, 'clock': 1}
+_METERS = {'km': 1000, 'm': 1}
+
+# Tipi di target espliciti
+_TARGET_KEYWORDS = {'hr': 'heart_rate', 'pwr': 'power', 'spd': 'speed'}
+
+
+class TargetNode(namedtuple('TargetNode', ['kind', 'zone', 'keyword'])):
+    """
+    Target di uno step.
+
+    kind: 'pace', 'speed', 'power' o 'heart_rate'
+    zone: testo della zona così come scritto (es. 'Z2', 'lt_hr', '75%', '4:30')
+    keyword: parola chiave usata ('hr', 'pwr', 'spd', 'in') o None per '@' semplice
+    """
+    __slots__ = ()
+
+
+class StepNode(namedtuple('StepNode', ['end_condition', 'value', 'unit', 'target', 'description'])):
+    """
+    Dettaglio di uno step analizzato.
+
+    end_condition: 'time', 'distance', 'iterations' o 'lap.button'
+    value: quantità nell'unità scritta (secondi per 'clock', None per lap.button)
+    unit: 'km', 'm', 'h', 'min', 's', 'clock', 'iterations' o None
+    target: TargetNode o None
+    description: testo dopo ' -- ' ('' se assente)
+    """
+    __slots__ = ()
+
+    @property
+    def seconds(self):
+        """Durata in secondi per gli step a tempo, altrimenti None"""
+        if self.end_condition != 'time':
+            return None
+        return int(round(self.value * _SECONDS[self.unit]))
+
+    @property
+    def meters(self):
+        """Distanza in metri per gli step a distanza, altrimenti None"""
+        if self.end_condition != 'distance':
+            return None
+        return self.value * _METERS[self.unit]
+
+
+def zone_fingerprint(zones):
+    """
+    Calcola l'impronta delle zone che influenzano l'analisi di un target.
+
+    Args:
+        zones: Configurazione con 'heart_rates', 'power_values' e 'speeds' (o None)
+
+    Returns:
+        tuple: Nomi ordinati delle zone di frequenza cardiaca, potenza e velocità
+    """
+    if not zones:
+        return ((), (), ())
+    return tuple(
+        tuple(sorted(str(name) for name in (zones.get(category) or {})))
+        for category in ('heart_rates', 'power_values', 'speeds')
+    )
+
+
+def clock_to_seconds(text):
+    """Converte 'mm:ss' o 'h:mm:ss' in secondi, None se il formato non è valido"""
+    match = CLOCK_RE.match(text.strip())
+    if not match:
+        return None
+    first, second, third = match.groups()
+    if third is None:
+        return int(first) * 60 + int(second)
+    return int(first) * 3600 + int(second) * 60 + int(third)
+
+
+def seconds_to_clock(seconds):
+    """Converte i secondi in 'm:ss'"""
+    seconds = int(round(seconds))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def split_step_line(line):
+    """
+    Divide una riga 'tipo: dettaglio'.
+
+    Returns:
+        tuple: (tipo in minuscolo, dettaglio) oppure None se la riga non ha questo formato
+    """
+    match = STEP_LINE_RE.match(line.strip())
+    if not match:
+        return None
+    return match.group(1).strip().lower(), match.group(2).strip()
+
+
+def split_repeat(line):
+    """
+    Divide una riga 'repeat N:' nel numero di ripetizioni e nell'eventuale testo dopo i due punti.
+
+    Returns:
+        tuple: (ripetizioni, testo dopo i due punti o ''), oppure None se la riga non è una ripetizione
+    """
+    match = REPEAT_RE.match(line.strip())
+    if not match:
+        return None
+    return int(match.group(1)), match.group(2) or ''
+
+
+def parse_repeat(line):
+    """
+    Riconosce una riga 'repeat N:'.
+
+    Returns:
+        int: Numero di ripetizioni, oppure None se la riga non è una ripetizione
+    """
+    repeat = split_repeat(line)
+    return repeat[0] if repeat else None
+
+
+def parse_step_detail(detail, sport_type="running", zones=None):
+    """
+    Analizza il dettaglio di uno step (es. '5km @Z3 -- Ritmo costante').
+
+    Args:
+        detail: Testo del dettaglio
+        sport_type: Tipo di sport, usato per interpretare i target '@' semplici
+        zones: Configurazione delle zone (paces, heart_rates, power_values, speeds)
+            oppure una ZoneTable, di cui si usa l'impronta già calcolata
+
+    Returns:
+        StepNode: Step analizzato (condiviso dalla cache, da non modificare)
+    """
+    fingerprint = getattr(zones, 'fingerprint', None) or zone_fingerprint(zones)
+    return _parse_step_detail(str(detail or '').strip(), sport_type or "running", fingerprint)
+
+
+def parse_cache_info():
+    """Statistiche della cache LRU dell'analisi dei dettagli"""
+    return _parse_step_detail.cache_info()
+
+
+def clear_parse_cache():
+    """Svuota la cache LRU dell'analisi dei dettagli"""
+    _parse_step_detail.cache_clear()
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_step_detail(detail, sport_type, fingerprint):
+    description = ''
+    if DESCRIPTION_SEPARATOR in detail:
+        detail, description = detail.split(DESCRIPTION_SEPARATOR, 1)
+        detail = detail.strip()
+        description = description.strip()
+
+    target = None
+    if '@' in detail:
+        detail, target_text = detail.split('@', 1)
+        detail = detail.strip()
+        target = _parse_target('@' + target_text, sport_type, fingerprint)
+
+    match = DISTANCE_IN_TIME_RE.match(detail)
+    if match:
+        # Distanza con tempo obiettivo: il target diventa il ritmo al km corrispondente
+        value, unit = float(match.group(1)), match.group(2).lower()
+        seconds_per_km = clock_to_seconds(match.group(3)) * 1000 / (value * _METERS[unit])
+        if target is None:
+            target = TargetNode('pace', seconds_to_clock(seconds_per_km), 'in')
+        return StepNode('distance', value, unit, target, description)
+
+    match = QUANTITY_RE.match(detail)
+    if match:
+        value, unit = float(match.group(1)), match.group(2).lower()
+        end_condition = 'distance' if unit in _METERS else 'time'
+        return StepNode(end_condition, value, unit, target, description)
+
+    seconds = clock_to_seconds(detail)
+    if seconds is not None:
+        return StepNode('time', seconds, 'clock', target, description)
+
+    if ITERATIONS_RE.match(detail):
+        return StepNode('iterations', int(detail), 'iterations', target, description)
+
+    # "lap-button" o testo non riconosciuto: lo step termina con il tasto lap
+    return StepNode('lap.button', None, None, target, description)
+
+
+def _parse_target(text, sport_type, fingerprint):
+    match = TARGET_RE.match(text)
+    if not match:
+        return None
+
+    keyword = match.group(1).lower() if match.group(1) else None
+    zone = match.group(2).strip()
+    if not zone:
+        return None
+
+    if keyword:
+        return TargetNode(_TARGET_KEYWORDS[keyword], zone, keyword)
+
+    heart_rate_names, power_names, speed_names = fingerprint
+    if zone in heart_rate_names or '_HR' in zone:
+        kind = 'heart_rate'
+    elif sport_type == 'cycling':
+        kind = 'speed' if zone in speed_names and zone not in power_names else 'power'
+    else:
+        kind = 'pace'
+    return TargetNode(kind, zone, None)
@@ -0,0 +1,409 @@
+#! /usr/bin/env python
+
+"""
+Tabella delle zone di allenamento di un piano.
+
+La ZoneTable viene compilata una sola volta dalla sezione config di un piano
+(paces, swim_paces, heart_rates, power_values, speeds e margins) e risolve ogni
+zona in limiti numerici già comprensivi dei margini: m/s per ritmi e velocità,
+bpm per la frequenza cardiaca e watt per la potenza.
+
+Formati supportati per le zone:
+- ritmo: '5:20', '5:30-5:10', '42.2km in 03:00:00', '80% marathon', '80-85% marathon'
+- frequenza cardiaca: '150', '140-160', '75-84% max_hr', '70%'
+- potenza: '250', '220-250', '<125', '90%', '75-85%' (percentuali dell'ftp)
+- velocità (km/h): '25', '23.0-27.0'
+
+I valori possono anche essere scritti direttamente nello step (es. '@ 4:30',
+'@hr 140-160', '@pwr 90%'). I riferimenti che non si possono risolvere vengono
+segnalati tutti insieme da check_steps prima di creare o caricare gli allenamenti.
+"""
+
+import json
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+from planner.step_grammar import parse_step_detail, zone_fingerprint, clock_to_seconds
+
+# Categorie di zone della configurazione
+CATEGORIES = ('paces', 'swim_paces', 'heart_rates', 'power_values', 'speeds')
+
+# Margini usati se la configurazione non li specifica
+DEFAULT_MARGINS = {
+    'faster': '0:03',
+    'slower': '0:03',
+    'faster_spd': 2.0,
+    'slower_spd': 2.0,
+    'hr_up': 5,
+    'hr_down': 5,
+}
+
+# Margine relativo per i valori singoli di potenza
+POWER_MARGIN = 0.05
+
+# Tipo di target Garmin per ogni tipo di target della grammatica
+TARGET_TYPE_KEYS = {
+    'pace': 'pace.zone',
+    'speed': 'speed.zone',
+    'power': 'power.zone',
+    'heart_rate': 'heart.rate.zone',
+}
+
+NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)?)$')
+NUMBER_RANGE_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)$')
+BELOW_RE = re.compile(r'^<\s*(\d+(?:\.\d+)?)$')
+CLOCK_RANGE_RE = re.compile(r'^(\d+:\d{2}(?::\d{2})?)\s*-\s*(\d+:\d{2}(?::\d{2})?)$')
+DIST_TIME_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(km|m)\s+in\s+(\d+:\d{2}(?::\d{2})?)$', re.IGNORECASE)
+PERCENT_RE = re.compile(r'^(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*%\s*(\w+)?$')
+GARMIN_HR_ZONE_RE = re.compile(r'^Z(\d+)_HR$')
+
+
+class ZoneResolutionError(ValueError):
+    """Una o più zone non possono essere risolte"""
+
+    def __init__(self, problems):
+        if isinstance(problems, str):
+            problems = [problems]
+        self.problems = list(problems)
+        super().__init__("Zone non risolte:\n" + "\n".join(f"- {problem}" for problem in self.problems))
+
+
+class ZoneTable:
+    """
+    Zone di un piano risolte in limiti numerici (low, high).
+
+    Usare ZoneTable.from_config per riutilizzare la tabella già compilata
+    per una configurazione identica. Poiché la stessa istanza è condivisa da
+    tutti i chiamanti, dopo la compilazione margins, definitions, zones ed
+    errors sono in sola lettura.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.margins = dict(DEFAULT_MARGINS, **(config.get('margins') or {}))
+        self.definitions = {category: dict(config.get(category) or {}) for category in CATEGORIES}
+        self.fingerprint = zone_fingerprint(config)
+
+        # (categoria, nome) -> (low, high, centro) per le zone valide,
+        # (categoria, nome) -> messaggio per quelle non valide
+        self.zones = {}
+        self.errors = {}
+        self._resolving = set()
+
+        for category, definitions in self.definitions.items():
+            for name in definitions:
+                try:
+                    self._named(category, name)
+                except ZoneResolutionError as e:
+                    self.errors[(category, name)] = e.problems[0]
+
+        self.margins = MappingProxyType(self.margins)
+        self.definitions = MappingProxyType({category: MappingProxyType(definitions)
+                                             for category, definitions in self.definitions.items()})
+        self.zones = MappingProxyType(self.zones)
+        self.errors = MappingProxyType(self.errors)
+
+    @classmethod
+    def from_config(cls, config):
+        """Restituisce la tabella per config, compilandola solo la prima volta"""
+        return _compile(json.dumps(config or {}, sort_keys=True, default=str))
+
+    def get(self, category, default=None):
+        """Definizioni di una categoria, come nel dizionario di configurazione"""
+        return self.definitions.get(category, default)
+
+    # --- Risoluzione ---
+
+    def resolve(self, kind, zone, sport_type="running"):
+        """
+        Risolve la zona di un target.
+
+        Args:
+            kind: 'pace', 'speed', 'power' o 'heart_rate'
+            zone: Nome della zona o valore scritto direttamente
+            sport_type: Tipo di sport (per il nuoto i ritmi sono al 100m)
+
+        Returns:
+            tuple: (low, high, zone_number); zone_number è impostato solo per le zone
+                di frequenza cardiaca dell'orologio (es. 'Z2_HR' non configurata)
+
+        Raises:
+            ZoneResolutionError: Se la zona non è definita o non è valida
+        """
+        category = _category(kind, sport_type)
+        zone = str(zone).strip()
+
+        names = [zone, f"{zone}_PW"] if category == 'power_values' else [zone]
+        for name in names:
+            if name in self.definitions[category]:
+                low, high, _ = self._named(category, name)
+                return low, high, None
+
+        match = GARMIN_HR_ZONE_RE.match(zone)
+        if category == 'heart_rates' and match:
+            return None, None, int(match.group(1))
+
+        try:
+            low, high, _ = _direct_zone(self, category, zone)
+        except ZoneResolutionError:
+            raise ZoneResolutionError(f"{_LABELS[category]} '{zone}' non definita")
+        return low, high, None
+
+    def target(self, node, sport_type="running"):
+        """
+        Crea il Target di uno step dal TargetNode della grammatica.
+
+        Come in Garmin Connect, targetValueOne è il limite alto (per i ritmi la
+        velocità più alta, cioè il ritmo più veloce) e targetValueTwo quello basso.
+
+        Raises:
+            ZoneResolutionError: Se la zona non è definita o non è valida
+        """
+        from planner.workout import Target
+
+        low, high, zone_number = self.resolve(node.kind, node.zone, sport_type)
+        return Target(TARGET_TYPE_KEYS[node.kind], high, low, zone_number)
+
+    def unresolved_references(self, steps, sport_type="running"):
+        """
+        Elenca i target degli step che non si possono risolvere.
+
+        Args:
+            steps: Step in formato YAML (anche con ripetizioni annidate)
+            sport_type: Tipo di sport dell'allenamento
+
+        Returns:
+            list: Un messaggio per ogni riferimento non risolto
+        """
+        problems = []
+        for detail in _iter_details(steps):
+            node = parse_step_detail(detail, sport_type, self)
+            if node.target is None:
+                continue
+            try:
+                self.resolve(node.target.kind, node.target.zone, sport_type)
+            except ZoneResolutionError as e:
+                problems.append(f"'{detail}': {e.problems[0]}")
+        return problems
+
+    def check_steps(self, steps, sport_type="running"):
+        """
+        Verifica che tutti i target degli step siano risolvibili.
+
+        Raises:
+            ZoneResolutionError: Con l'elenco completo dei riferimenti non risolti
+        """
+        problems = self.unresolved_references(steps, sport_type)
+        if problems:
+            raise ZoneResolutionError(problems)
+
+    # --- Interpretazione delle definizioni ---
+
+    def _named(self, category, name):
+        key = (category, name)
+        if key in self.zones:
+            return self.zones[key]
+        if key in self.errors:
+            raise ZoneResolutionError(self.errors[key])
+        if key in self._resolving:
+            raise ZoneResolutionError(f"{_LABELS[category]} '{name}': riferimento circolare")
+
+        self._resolving.add(key)
+        try:
+            value = self._parse(category, self.definitions[category][name])
+        except ZoneResolutionError as e:
+            raise ZoneResolutionError(f"{_LABELS[category]} '{name}': {e.problems[0]}")
+        finally:
+            self._resolving.discard(key)
+
+        self.zones[key] = value
+        return value
+
+    def _center(self, category, name):
+        if name not in self.definitions[category]:
+            raise ZoneResolutionError(f"riferimento '{name}' non definito")
+        return self._named(category, name)[2]
+
+    def _parse(self, category, value):
+        if category == 'paces':
+            return self._parse_pace(value, 1000, 'paces')
+        if category == 'swim_paces':
+            return self._parse_pace(value, 100, 'swim_paces')
+        if category == 'heart_rates':
+            return self._parse_heart_rate(value)
+        if category == 'power_values':
+            return self._parse_power(value)
+        return self._parse_speed(value)
+
+    def _parse_pace(self, value, distance, category):
+        # I ritmi letti da YAML come '5:20' possono arrivare già in secondi
+        if isinstance(value, (int, float)):
+            return self._pace_with_margins(float(value), distance)
+
+        text = str(value).strip()
+        seconds = clock_to_seconds(text)
+        if seconds:
+            return self._pace_with_margins(seconds, distance)
+
+        match = CLOCK_RANGE_RE.match(text)
+        if match:
+            first = distance / _positive(clock_to_seconds(match.group(1)), text)
+            second = distance / _positive(clock_to_seconds(match.group(2)), text)
+            return min(first, second), max(first, second), (first + second) / 2
+
+        match = DIST_TIME_RE.match(text)
+        if match and category == 'paces':
+            meters = float(match.group(1)) * (1000 if match.group(2).lower() == 'km' else 1)
+            seconds = _positive(clock_to_seconds(match.group(3)), text)
+            return self._pace_with_margins(seconds * distance / meters, distance)
+
+        match = PERCENT_RE.match(text)
+        if match and match.group(3):
+            center = self._center(category, match.group(3))
+            return self._percent(match, center, lambda speed: self._pace_with_margins(distance / speed, distance))
+
+        raise ZoneResolutionError(f"ritmo '{text}' non valido")
+
+    def _pace_with_margins(self, seconds, distance):
+        seconds = _positive(seconds, seconds)
+        slower = seconds + _margin_seconds(self.margins.get('slower'))
+        faster = max(seconds - _margin_seconds(self.margins.get('faster')), 1)
+        return distance / slower, distance / faster, distance / seconds
+
+    def _parse_heart_rate(self, value):
+        text = str(value).strip()
+
+        match = NUMBER_RE.match(text)
+        if match:
+            return self._heart_rate_with_margins(float(match.group(1)))
+
+        match = NUMBER_RANGE_RE.match(text)
+        if match:
+            return _ordered(float(match.group(1)), float(match.group(2)))
+
+        match = PERCENT_RE.match(text)
+        if match:
+            center = self._center('heart_rates', match.group(3) or 'max_hr')
+            return self._percent(match, center, self._heart_rate_with_margins)
+
+        raise ZoneResolutionError(f"frequenza cardiaca '{text}' non valida")
+
+    def _heart_rate_with_margins(self, bpm):
+        return (bpm - float(self.margins.get('hr_down') or 0),
+                bpm + float(self.margins.get('hr_up') or 0),
+                bpm)
+
+    def _parse_power(self, value):
+        text = str(value).strip()
+
+        match = NUMBER_RE.match(text)
+        if match:
+            watts = float(match.group(1))
+            return watts * (1 - POWER_MARGIN), watts * (1 + POWER_MARGIN), watts
+
+        match = NUMBER_RANGE_RE.match(text)
+        if match:
+            return _ordered(float(match.group(1)), float(match.group(2)))
+
+        match = BELOW_RE.match(text)
+        if match:
+            watts = float(match.group(1))
+            return 0.0, watts, watts / 2
+
+        match = PERCENT_RE.match(text)
+        if match:
+            center = self._center('power_values', match.group(3) or 'ftp')
+            return self._percent(match, center, lambda watts: self._parse_power(f"{watts:.1f}"))
+
+        raise ZoneResolutionError(f"potenza '{text}' non valida")
+
+    def _parse_speed(self, value):
+        text = str(value).strip()
+
+        match = NUMBER_RE.match(text)
+        if match:
+            kmh = float(match.group(1))
+            low = kmh - float(self.margins.get('slower_spd') or 0)
+            high = kmh + float(self.margins.get('faster_spd') or 0)
+            return max(low, 0) / 3.6, high / 3.6, kmh / 3.6
+
+        match = NUMBER_RANGE_RE.match(text)
+        if match:
+            return _ordered(float(match.group(1)) / 3.6, float(match.group(2)) / 3.6)
+
+        raise ZoneResolutionError(f"velocità '{text}' non valida")
+
+    def _percent(self, match, center, single):
+        low = float(match.group(1)) / 100 * center
+        if match.group(2) is None:
+            return single(low)
+        return _ordered(low, float(match.group(2)) / 100 * center)
+
+
+_LABELS = {
+    'paces': "zona di ritmo",
+    'swim_paces': "zona di ritmo nuoto",
+    'heart_rates': "zona di frequenza cardiaca",
+    'power_values': "zona di potenza",
+    'speeds': "zona di velocità",
+}
+
+
+@lru_cache(maxsize=32)
+def _compile(config_json):
+    return ZoneTable(json.loads(config_json))
+
+
+@lru_cache(maxsize=1024)
+def _direct_zone(table, category, zone):
+    """Zone scritte direttamente negli step, memorizzate fuori dalla tabella condivisa"""
+    return table._parse(category, zone)
+
+
+def _category(kind, sport_type):
+    if kind == 'heart_rate':
+        return 'heart_rates'
+    if kind == 'power':
+        return 'power_values'
+    if kind == 'speed':
+        return 'speeds'
+    return 'swim_paces' if sport_type == 'swimming' else 'paces'
+
+
+def _iter_details(steps):
+    """Restituisce i dettagli testuali di tutti gli step, comprese le ripetizioni"""
+    for step in steps or []:
+        if not isinstance(step, dict):
+            continue
+        if 'repeat' in step and 'steps' in step:
+            yield from _iter_details(step['steps'])
+            continue
+        for key, value in step.items():
+            if key in ('sport_type', 'date'):
+                continue
+            if isinstance(value, list):
+                # Forma 'repeat N:' dei piani YAML
+                yield from _iter_details(value)
+            elif isinstance(value, str):
+                yield value
+
+
+def _margin_seconds(value):
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return float(value)
+    seconds = clock_to_seconds(str(value))
+    return float(seconds) if seconds is not None else float(value)
+
+
+def _positive(value, text):
+    if not value or value <= 0:
+        raise ZoneResolutionError(f"valore '{text}' non valido")
+    return value
+
+
+def _ordered(first, second):
+    low, high = min(first, second), max(first, second)
+    return low, high, (low + high) / 2
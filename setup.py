@@ -39,6 +39,7 @@ def main():
         entry_points={
             'console_scripts': [
                 'garmin-planner-gui=garmin_planner_gui:main',
+                'garmin-planner=planner.cli:main',
             ],
         },
     )